@@ -0,0 +1,67 @@
+"""Compares the peak memory of fetching a large file attachment with
+``get_secret`` against streaming it to disk with ``download_secret_field``,
+against a local stand-in for Secret Server.
+
+Run it from the repository root:
+
+    python benchmarks/bench_download.py --size 64
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delinea.secrets.server import AccessTokenAuthorizer, SecretServer  # noqa: E402
+from tests.stub_server import StubSecretServer, make_secret  # noqa: E402
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=64, help="in MiB")
+    args = parser.parse_args()
+
+    with StubSecretServer(
+        [make_secret(1, attachments=1)], attachment_size=args.size * 1024 * 1024
+    ) as stub, tempfile.TemporaryDirectory() as directory:
+        secret_server = SecretServer(
+            stub.base_url,
+            AccessTokenAuthorizer(
+                stub.access_token, stub.base_url, server_type="secret_server"
+            ),
+        )
+        # Build the content up front so that only the client's allocations
+        # are traced
+        content = stub.attachment(1, "attachment-1")
+        stub.attachment = lambda id, slug: content
+        path = os.path.join(directory, "attachment.bin")
+        for label, function in (
+            ("get_secret", lambda: secret_server.get_secret(1)),
+            (
+                "download_secret_field",
+                lambda: secret_server.download_secret_field(1, "attachment-1", path),
+            ),
+        ):
+            elapsed, peak = measure(function)
+            print(
+                f"{label:>21}: {elapsed * 1000:8.1f} ms, "
+                f"peak {peak / 1024 / 1024:8.2f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
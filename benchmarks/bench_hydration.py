@@ -0,0 +1,148 @@
+"""Measures how fast ``ServerSecret`` and ``ServerFolder`` objects are built
+from the json returned by Secret Server, and how much memory each one takes,
+compared with the plain ``__dict__`` based models the SDK used to have.
+
+Run it from the repository root:
+
+    python benchmarks/bench_hydration.py --objects 20000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delinea.secrets.server import ServerFolder, ServerSecret  # noqa: E402
+from tests.stub_server import make_folder, make_secret  # noqa: E402
+
+
+# The models as they were before they had __slots__, for comparison
+def snake_case(camel_cased):
+    return [
+        (
+            re.compile("([a-z0-9])([A-Z])")
+            .sub(r"\1_\2", re.compile(r"(.)([A-Z][a-z]+)").sub(r"\1_\2", k))
+            .lower(),
+            v,
+        )
+        for (k, v) in camel_cased.items()
+    ]
+
+
+@dataclass
+class BaselineSecret:
+    @dataclass
+    class Field:
+        item_id: int
+        field_id: int
+        file_attachment_id: int
+        field_description: str
+        field_name: str
+        filename: str
+        value: str
+        slug: str
+
+        def __init__(self, **kwargs):
+            for k, v in snake_case(kwargs):
+                if k == "item_value":
+                    k = "value"
+                setattr(self, k, v)
+
+    id: int
+    folder_id: int
+    secret_template_id: int
+    site_id: int
+    active: bool
+    checked_out: bool
+    check_out_enabled: bool
+    name: str
+    secret_template_name: str
+    last_heart_beat_status: str
+    last_heart_beat_check: datetime
+    last_password_change_attempt: datetime
+    fields: dict
+
+    DEFAULT_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+    def __init__(self, **kwargs):
+        datetime_format = self.DEFAULT_DATETIME_FORMAT
+        if "datetime_format" in kwargs:
+            datetime_format = kwargs["datetime_format"]
+        for k, v in snake_case(kwargs):
+            if k in ["last_heart_beat_check", "last_password_change_attempt"]:
+                v = re.sub(r"\.[0-9]+$", "", v)
+                v = datetime.strptime(v, datetime_format)
+            setattr(self, k, v)
+        self.fields = {
+            item["slug"]: BaselineSecret.Field(**item) for item in kwargs["items"]
+        }
+
+
+@dataclass
+class BaselineFolder:
+    id: int
+    folder_name: str
+    folder_path: str
+    parent_folder_id: int
+    folder_type_id: int
+    secret_policy_id: int
+    inherit_secret_policy: bool
+    inherit_permissions: bool
+    child_folders: list
+    secret_templates: list
+
+    def __init__(self, **kwargs):
+        for k, v in snake_case(kwargs):
+            setattr(self, k, v)
+
+
+def measure(cls, documents):
+    start = time.perf_counter()
+    for document in documents:
+        cls(**document)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [cls(**document) for document in documents]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return len(documents) / elapsed, size / len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, default=20000)
+    args = parser.parse_args()
+
+    secrets = [make_secret(id) for id in range(args.objects)]
+    folders = [make_folder(id) for id in range(args.objects)]
+    for baseline, cls, documents in (
+        (BaselineSecret, ServerSecret, secrets),
+        (BaselineFolder, ServerFolder, folders),
+    ):
+        base_rate, base_size = measure(baseline, documents)
+        rate, size = measure(cls, documents)
+        for name, objects_per_second, bytes_per_object in (
+            (baseline.__name__, base_rate, base_size),
+            (cls.__name__, rate, size),
+        ):
+            print(
+                f"{name:>14}: {objects_per_second:10,.0f} objects/s, "
+                f"{bytes_per_object:7,.0f} bytes/object"
+            )
+        print(
+            f"{'':>14}  {rate / base_rate:10.1f}x as fast, "
+            f"{size / base_size:7.0%} of the memory"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compares the time taken to parse a large ``search_secrets`` response by
+decoding it to a ``str`` first, as the SDK used to, with parsing its bytes
+directly using each available JSON backend.
+
+Run it from the repository root:
+
+    python benchmarks/bench_json.py --records 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delinea.secrets.server import (  # noqa: E402
+    AccessTokenAuthorizer,
+    SecretServer,
+    orjson,
+    set_json_backend,
+)
+from tests.stub_server import StubSecretServer, make_secret  # noqa: E402
+
+
+def best_of(function, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    secrets = [make_secret(id) for id in range(1, args.records + 1)]
+    with StubSecretServer(secrets) as stub:
+        secret_server = SecretServer(
+            stub.base_url,
+            AccessTokenAuthorizer(
+                stub.access_token, stub.base_url, server_type="secret_server"
+            ),
+        )
+        query_params = {"take": args.records}
+        response = secret_server._api_get(
+            "secrets", secret_server.headers(), query_params
+        )
+        print(f"{len(response.content) / 1024 / 1024:.1f} MiB of JSON")
+
+        def text_then_json():
+            # requests caches .text, so decode the bytes as it would
+            return json.loads(response.content.decode(response.encoding or "utf-8"))
+
+        cases = [
+            ("decode then json.loads", text_then_json),
+            ("json.loads(bytes)", lambda: json.loads(response.content)),
+        ]
+        if orjson is not None:
+            cases.append(
+                ("orjson.loads(bytes)", lambda: orjson.loads(response.content))
+            )
+        for label, function in cases:
+            print(f"{label:>32}: {best_of(function) * 1000:8.1f} ms")
+
+        backends = [("json", json.loads)]
+        if orjson is not None:
+            backends.append(("orjson", orjson.loads))
+        for label, loads in backends:
+            set_json_backend(loads)
+            elapsed = best_of(
+                lambda: list(secret_server.iter_secrets(page_size=args.records))
+            )
+            print(f"{'iter_secrets with ' + label:>32}: {elapsed * 1000:8.1f} ms")
+        set_json_backend()
+
+
+if __name__ == "__main__":
+    main()
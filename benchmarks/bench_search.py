@@ -0,0 +1,66 @@
+"""Measures how fast secret search and folder lookup results are listed,
+page by page, against a local stand-in for Secret Server.
+
+Run it from the repository root:
+
+    python benchmarks/bench_search.py --records 5000 --latency 0.005
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delinea.secrets.server import AccessTokenAuthorizer, SecretServer  # noqa: E402
+from tests.stub_server import (  # noqa: E402
+    StubSecretServer,
+    make_folder,
+    make_secret,
+)
+
+
+def measure(function):
+    start = time.perf_counter()
+    count = sum(1 for _ in function())
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.005, help="in seconds")
+    args = parser.parse_args()
+
+    with StubSecretServer(
+        [make_secret(id) for id in range(1, args.records + 1)],
+        folders=[make_folder(id) for id in range(1, args.records + 1)],
+        latency=args.latency,
+    ) as stub:
+        secret_server = SecretServer(
+            stub.base_url,
+            AccessTokenAuthorizer(
+                stub.access_token, stub.base_url, server_type="secret_server"
+            ),
+        )
+        for label, function in (
+            (
+                "iter_secrets",
+                lambda: secret_server.iter_secrets(page_size=args.page_size),
+            ),
+            (
+                "iter_folders",
+                lambda: secret_server.iter_folders(page_size=args.page_size),
+            ),
+        ):
+            count, elapsed = measure(function)
+            print(
+                f"{label:>12}: {count / elapsed:10,.0f} records/s, "
+                f"{count} records in {elapsed * 1000:,.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
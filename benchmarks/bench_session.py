@@ -0,0 +1,71 @@
+"""Compares the per-request latency of sequential ``get_secret`` calls with and
+without connection reuse, and with no network at all, against a local
+stand-in for Secret Server.
+
+Run it from the repository root:
+
+    python benchmarks/bench_session.py --calls 500 --notes-size 4096
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delinea.secrets.server import (  # noqa: E402
+    AccessTokenAuthorizer,
+    InProcessTransport,
+    SecretServer,
+    create_session,
+)
+from tests.stub_server import StubSecretServer, make_secret  # noqa: E402
+
+
+def run(stub, session, calls):
+    connections = stub.connections
+    secret_server = SecretServer(
+        stub.base_url,
+        AccessTokenAuthorizer(
+            stub.access_token, stub.base_url, session, server_type="secret_server"
+        ),
+        session=session,
+    )
+    start = time.perf_counter()
+    for n in range(calls):
+        secret_server.get_secret(n % len(stub.secrets) + 1)
+    elapsed = time.perf_counter() - start
+    return elapsed / calls, stub.connections - connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument(
+        "--notes-size", type=int, default=0, help="in characters, per secret"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="in seconds")
+    args = parser.parse_args()
+
+    with StubSecretServer(
+        [make_secret(id, notes_size=args.notes_size) for id in range(1, 11)],
+        latency=args.latency,
+    ) as stub:
+        for label, session in (
+            ("new connection per request", create_session(keep_alive=False)),
+            ("pooled keep-alive session", create_session()),
+            (
+                "in-process transport",
+                create_session(transport=InProcessTransport(stub.handle)),
+            ),
+        ):
+            latency, connections = run(stub, session, args.calls)
+            print(
+                f"{label:>28}: {latency * 1000:7.3f} ms/request, "
+                f"{connections} connections for {args.calls} calls"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compares walking a folder tree one folder at a time with walking it
+concurrently, against a local stand-in for Secret Server.
+
+Run it from the repository root:
+
+    python benchmarks/bench_walk.py --breadth 4 --depth 3 --latency 0.01
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delinea.secrets.server import AccessTokenAuthorizer, SecretServer  # noqa: E402
+from tests.stub_server import (  # noqa: E402
+    StubSecretServer,
+    make_folder_tree,
+    make_secret,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--breadth", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--secrets", type=int, default=5, help="per folder")
+    parser.add_argument("--latency", type=float, default=0.01, help="in seconds")
+    args = parser.parse_args()
+
+    folders = make_folder_tree(args.breadth, args.depth)
+    secrets = [
+        make_secret(len(folders) * n + folder["id"], folder_id=folder["id"])
+        for folder in folders
+        for n in range(args.secrets)
+    ]
+    with StubSecretServer(secrets, folders=folders, latency=args.latency) as stub:
+        secret_server = SecretServer(
+            stub.base_url,
+            AccessTokenAuthorizer(
+                stub.access_token, stub.base_url, server_type="secret_server"
+            ),
+        )
+        for label, max_workers in (
+            ("one folder at a time", 1),
+            ("concurrently", None),
+        ):
+            start = time.perf_counter()
+            walked = sum(1 for _ in secret_server.walk_folder(1, max_workers))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:>20}: {walked} folders in {elapsed * 1000:8,.1f} ms, "
+                f"{walked / elapsed:8,.1f} folders/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
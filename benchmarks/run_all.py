@@ -0,0 +1,48 @@
+"""Runs every benchmark in this directory, or the ones named, with their
+default arguments.
+
+Run it from the repository root:
+
+    python benchmarks/run_all.py
+    python benchmarks/run_all.py bench_walk bench_search
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = (
+    "bench_session",
+    "bench_download",
+    "bench_search",
+    "bench_walk",
+    "bench_hydration",
+    "bench_json",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "benchmarks", nargs="*", help=f"any of {', '.join(BENCHMARKS)}; all by default"
+    )
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    failed = []
+    for name in args.benchmarks or BENCHMARKS:
+        print(f"== {name}", flush=True)
+        script = os.path.join(DIRECTORY, f"{name}.py")
+        if subprocess.run([sys.executable, script]).returncode:
+            failed.append(name)
+    if failed:
+        sys.exit(f"Failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
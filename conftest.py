@@ -62,3 +62,53 @@ def platform_server(platform_env_vars, platform_authorizer):
     from delinea.secrets.server import SecretServer
 
     return SecretServer(platform_env_vars["platform_base_url"], platform_authorizer)
+
+
+@pytest.fixture
+def stub_server():
+    from tests.stub_server import StubSecretServer
+
+    with StubSecretServer() as server:
+        yield server
+
+
+@pytest.fixture
+def stub_platform():
+    from tests.stub_server import StubSecretServer
+
+    with StubSecretServer(server_type="platform") as server:
+        yield server
+
+
+@pytest.fixture
+def make_secret_server():
+    """Returns a function that creates a :class:`SecretServer` for a stub
+    server, authorized with the stub's access token
+
+    The server type is not detected unless `server_type` is ``None``.
+    """
+    from delinea.secrets.server import AccessTokenAuthorizer, SecretServer
+
+    def make_secret_server(stub, session=None, server_type="secret_server", **kwargs):
+        return SecretServer(
+            stub.base_url,
+            AccessTokenAuthorizer(
+                stub.access_token, stub.base_url, session, server_type=server_type
+            ),
+            session=session,
+            **kwargs,
+        )
+
+    return make_secret_server
+
+
+@pytest.fixture(autouse=True)
+def forget_detected_servers():
+    """Stub servers reuse ports, so forget what other tests detected, and
+    start each test with fresh metrics
+    """
+    from delinea.secrets.server import Authorizer, SecretServer, metrics
+
+    Authorizer._detected_server_types.clear()
+    SecretServer._vault_urls.clear()
+    metrics.reset()
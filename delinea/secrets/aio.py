@@ -0,0 +1,1264 @@
+"""An :mod:`asyncio` flavour of the Delinea Secret Server SDK API
+
+The classes in this module mirror those in :mod:`delinea.secrets.server`, with
+the methods that call the REST API as coroutines. They require the optional
+`httpx <https://www.python-httpx.org/>`_ dependency:
+
+    python -m pip install python-tss-sdk[async]
+
+Example:
+
+    authorizer = AsyncPasswordGrantAuthorizer(base_url, username, password)
+    async with AsyncSecretServer(base_url, authorizer) as secret_server:
+        secret = await secret_server.get_secret(123)
+"""
+
+import asyncio
+import inspect
+import time
+import weakref
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from delinea.secrets.server import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    Authorizer,
+    PasswordGrantAuthorizer,
+    SecretCache,
+    SecretServer,
+    SecretServerCircuitOpenError,
+    SecretServerClientError,
+    SecretServerCloud,
+    SecretServerError,
+    SecretServerServiceError,
+    SecretServerTimeoutError,
+    _ChunkWriter,
+    _current_deadline,
+    _deadline,
+    _folder_read_timeout,
+    _loads,
+    _timeouts,
+    deadline,
+    metrics,
+)
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+
+
+def _import_httpx():
+    try:
+        import httpx
+    except ImportError as err:
+        raise ImportError(
+            "httpx is required to use delinea.secrets.aio; install it with "
+            "`python -m pip install python-tss-sdk[async]`"
+        ) from err
+    return httpx
+
+
+def _timeout(read=DEFAULT_READ_TIMEOUT, connect=DEFAULT_CONNECT_TIMEOUT):
+    """Returns the :class:`~httpx.Timeout` of a request, capped by the time
+    remaining until the deadline in effect
+    """
+    connect, read = _timeouts(read, connect)
+    return _import_httpx().Timeout(read, connect=connect)
+
+
+async def _within(budget, function, *args, **kwargs):
+    """Awaits `function` under the `budget` deadline; it must be run as a
+    task of its own, which has its own copy of the context
+    """
+    _deadline.set(budget)
+    return await function(*args, **kwargs)
+
+
+def create_async_client(
+    max_connections=DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    http2=False,
+    transport=None,
+):
+    """Creates a connection-pooled :class:`~httpx.AsyncClient`
+
+    :param max_connections: the maximum number of concurrent connections
+    :type max_connections: int
+    :param max_keepalive_connections: the maximum number of idle connections
+                                      kept open for reuse
+    :type max_keepalive_connections: int
+    :param http2: whether to use HTTP/2 where the server supports it, which
+                  requires the optional ``h2`` dependency
+    :type http2: bool
+    :param transport: sends the requests of the client instead of its
+                      connection pool, e.g. :func:`in_process_transport`
+    :type transport: :class:`~httpx.AsyncBaseTransport`
+    :return: the client
+    :rtype: :class:`~httpx.AsyncClient`
+    """
+    httpx = _import_httpx()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+        http2=http2,
+        transport=transport,
+    )
+
+
+def in_process_transport(handler):
+    """Returns a transport that hands each request to `handler` rather than
+    sending it over the network, as
+    :class:`~delinea.secrets.server.InProcessTransport` does
+
+    `handler` is called in the event loop, so it should not block; it may
+    be a coroutine function.
+
+    Example:
+
+        client = create_async_client(transport=in_process_transport(handler))
+
+    :param handler: a function that takes the method, URL, headers and body
+                    of each request, and returns a ``(status, headers,
+                    body)`` tuple
+    :type handler: callable
+    :rtype: :class:`~httpx.AsyncBaseTransport`
+    """
+    httpx = _import_httpx()
+
+    async def handle(request):
+        result = handler(
+            request.method, str(request.url), request.headers, request.content
+        )
+        if inspect.isawaitable(result):
+            result = await result
+        status, headers, content = result
+        return httpx.Response(status, headers=headers, content=content)
+
+    return httpx.MockTransport(handle)
+
+
+class AsyncAuthorizer(ABC):
+    """Main abstract base class for all asynchronous Authorizer access
+    methods.
+    """
+
+    SERVER_TYPES = Authorizer.SERVER_TYPES
+    DETECTION_TIMEOUT = Authorizer.DETECTION_TIMEOUT
+
+    # The locks that serialize detection per base URL, for each event loop
+    _detection_locks = weakref.WeakKeyDictionary()
+
+    add_bearer_token_authorization_header = staticmethod(
+        Authorizer.add_bearer_token_authorization_header
+    )
+
+    @property
+    def client(self):
+        """The :class:`~httpx.AsyncClient` used to make HTTP calls, created on
+        first use if one was not provided
+        """
+        if getattr(self, "_client", None) is None:
+            self._client = create_async_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    async def _perform_server_detection(self, base_url):
+        """Detects if the server is Secret Server or Platform by health check endpoints.
+
+        Both endpoints are probed at once, each with a timeout of
+        :attr:`detection_timeout` seconds, and the result is remembered for
+        `base_url` by every (asynchronous) Authorizer in the process.
+        Concurrent detections of the same `base_url` probe it only once.
+        """
+        base_url = base_url.rstrip("/")
+        server_type = Authorizer._detected_server_types.get(base_url)
+        if server_type is None:
+            locks = AsyncAuthorizer._detection_locks.setdefault(
+                asyncio.get_running_loop(), {}
+            )
+            lock = locks.get(base_url)
+            if lock is None:
+                lock = locks[base_url] = asyncio.Lock()
+            async with lock:
+                server_type = Authorizer._detected_server_types.get(base_url)
+                if server_type is None:
+                    server_type = await self._probe_server_type(base_url)
+                    Authorizer._detected_server_types[base_url] = server_type
+        self._server_type = server_type
+
+    async def _probe_server_type(self, base_url):
+        """Returns ``secret_server`` if its health check endpoint responds as
+        healthy, otherwise ``platform`` if that one does
+
+        Both endpoints are probed at once, and the other probe is cancelled
+        once the result is known.
+
+        :raise: :class:`SecretServerError` when neither does
+        """
+        probes = [
+            asyncio.ensure_future(self._validate_health_endpoint(url))
+            for url in Authorizer._health_endpoints(base_url)
+        ]
+        try:
+            for probe, server_type in zip(probes, self.SERVER_TYPES):
+                if await probe:
+                    return server_type
+        finally:
+            for probe in probes:
+                probe.cancel()
+        raise SecretServerError(
+            "Unable to detect server type via health check endpoints."
+        )
+
+    _set_server_type = Authorizer._set_server_type
+
+    async def _validate_health_endpoint(self, url):
+        """Validates if an endpoint returns healthy status."""
+
+        def send():
+            timeout = getattr(self, "detection_timeout", None) or self.DETECTION_TIMEOUT
+            return self.client.get(url, timeout=_timeout(timeout, timeout))
+
+        try:
+            response = await metrics.instrument_async("health", url, send)()
+        except Exception:
+            return False
+        return Authorizer._is_healthy(response)
+
+    async def server_type(self):
+        """Returns the detected server type, detecting it on first use"""
+        if not hasattr(self, "_server_type"):
+            await self._perform_server_detection(self.base_url)
+        return self._server_type
+
+    @abstractmethod
+    async def get_access_token(self):
+        """Returns the access_token from a Grant Request"""
+
+    async def headers(self, existing_headers={}):
+        """Returns a dictionary containing headers for REST API calls
+
+        The `Authorization` header is built once per access token and a copy
+        of it is returned on each call, so callers may modify the result.
+        """
+        access_token = await self.get_access_token()
+        cached = getattr(self, "_headers", None)
+        if cached is None or cached[0] != access_token:
+            cached = (
+                access_token,
+                self.add_bearer_token_authorization_header(access_token),
+            )
+            self._headers = cached
+        return {**cached[1], **existing_headers}
+
+
+class AsyncAccessTokenAuthorizer(AsyncAuthorizer):
+    """Allows the use of a pre-existing access token to authorize REST API
+    calls.
+
+    Unlike :class:`~delinea.secrets.server.AccessTokenAuthorizer`, the server
+    type is detected on first use rather than on construction.
+    """
+
+    async def get_access_token(self):
+        return self.access_token
+
+    def __init__(
+        self,
+        access_token,
+        base_url,
+        client=None,
+        server_type=None,
+        detection_timeout=None,
+    ):
+        self.access_token = access_token
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+        self.detection_timeout = detection_timeout
+        if server_type is not None:
+            self._set_server_type(server_type)
+
+
+class AsyncPasswordGrantAuthorizer(AsyncAuthorizer):
+    """Allows the use of a username and password to be used to authorize REST
+    API calls.
+    """
+
+    TOKEN_PATH_URI = PasswordGrantAuthorizer.TOKEN_PATH_URI
+    PLATFORM_TOKEN_PATH_URI = PasswordGrantAuthorizer.PLATFORM_TOKEN_PATH_URI
+
+    _grant_request = PasswordGrantAuthorizer._grant_request
+
+    async def get_access_grant(self, token_url, grant_request):
+        """Gets an *OAuth2 Access Grant* by calling the Secret Server REST API
+        ``token`` endpoint
+
+        :raise :class:`SecretServerError` when the server returns anything
+                other than a valid Access Grant
+        """
+
+        def send():
+            return self.client.post(token_url, data=grant_request, timeout=_timeout())
+
+        send = metrics.instrument_async("token", token_url, send)
+        if self.retry_policy is None:
+            response = await send()
+        else:
+            response = await self.retry_policy.call_async(
+                token_url, send, (_import_httpx().TransportError,)
+            )
+
+        try:  # TSS returns a 200 (OK) containing HTML for some error conditions
+            return _loads(SecretServer.process(response).content)
+        except ValueError:
+            raise SecretServerError(response)
+
+    _grant_expired = staticmethod(PasswordGrantAuthorizer._grant_expired)
+    _expired = PasswordGrantAuthorizer._expired
+
+    async def _refresh(self, seconds_of_drift=300):
+        """Refreshes the *OAuth2 Access Grant* if it has expired or will in the next
+        `seconds_of_drift` seconds.
+
+        Concurrent callers wait for a single refresh rather than each
+        requesting a grant of their own.
+
+        :raise :class:`SecretServerError` when the server returns anything other
+               than a valid Access Grant
+        """
+
+        if not self._expired(seconds_of_drift):
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._expired(seconds_of_drift):
+                return
+            await self.server_type()
+            grant_request = self._grant_request()
+            self.access_grant = await self.get_access_grant(
+                self.token_url, grant_request
+            )
+            self.access_grant_refreshed = datetime.now()
+
+    def __init__(
+        self,
+        base_url,
+        username,
+        password,
+        token_path_uri=None,
+        domain=None,
+        client=None,
+        server_type=None,
+        detection_timeout=None,
+        retry_policy=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+        self.retry_policy = retry_policy
+        self.username = username
+        self.password = password
+        self.domain = domain
+        self.token_path_uri = token_path_uri  # May be None, will decide in _refresh
+        self.token_url = None
+        self.detection_timeout = detection_timeout
+        if server_type is not None:
+            self._set_server_type(server_type)
+        self._lock = None
+
+    async def get_access_token(self):
+        await self._refresh()
+        return self.access_grant["access_token"]
+
+
+class AsyncDomainPasswordGrantAuthorizer(AsyncPasswordGrantAuthorizer):
+    """Allows domain access to be used to authorize REST API calls."""
+
+    def __init__(
+        self,
+        base_url,
+        username,
+        domain,
+        password,
+        token_path_uri=None,
+        client=None,
+        server_type=None,
+        detection_timeout=None,
+        retry_policy=None,
+    ):
+        super().__init__(
+            base_url,
+            username,
+            password,
+            token_path_uri=token_path_uri,
+            domain=domain,
+            client=client,
+            server_type=server_type,
+            detection_timeout=detection_timeout,
+            retry_policy=retry_policy,
+        )
+
+
+class AsyncSecretServer:
+    """A class that uses an *OAuth2 Bearer Token* to access the Secret Server
+    REST API asynchronously. It uses an :class:`AsyncAuthorizer` to determine
+    the Authorization method required to access the Secret Server at
+    :attr:`base_url`.
+
+    Errors are mapped exactly as :meth:`SecretServer.process` maps them.
+    """
+
+    API_PATH_URI = SecretServer.API_PATH_URI
+    MAX_ATTACHMENT_WORKERS = SecretServer.MAX_ATTACHMENT_WORKERS
+    DOWNLOAD_CHUNK_SIZE = SecretServer.DOWNLOAD_CHUNK_SIZE
+    VAULT_URL_TTL = SecretServer.VAULT_URL_TTL
+    DEFAULT_PAGE_SIZE = SecretServer.DEFAULT_PAGE_SIZE
+    SECRET_ID_CACHE_SIZE = SecretServer.SECRET_ID_CACHE_SIZE
+    SECRET_ID_TTL = SecretServer.SECRET_ID_TTL
+    DEFAULT_MAX_WORKERS = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+
+    process = staticmethod(SecretServer.process)
+    _parse = staticmethod(SecretServer._parse)
+    _attachment_value = staticmethod(SecretServer._attachment_value)
+    _normalize_path = staticmethod(SecretServer._normalize_path)
+    _resolves_to = staticmethod(SecretServer._resolves_to)
+
+    async def headers(self):
+        """Returns a dictionary containing HTTP headers."""
+        return await self.authorizer.headers()
+
+    def __init__(
+        self,
+        base_url,
+        authorizer: AsyncAuthorizer,
+        api_path_uri=API_PATH_URI,
+        client=None,
+        retry_policy=None,
+    ):
+        """
+        :param base_url: The base URL e.g. ``http://localhost/SecretServer``
+        :type base_url: str
+        :param authorizer: The authorization method to be used
+        :type authorizer: AsyncAuthorizer
+        :param api_path_uri: Defaults to ``/api/v1``
+        :type api_path_uri: str
+        :param client: the connection-pooled client to use; defaults to the
+                       client of the `authorizer`, see
+                       :func:`create_async_client`
+        :type client: :class:`~httpx.AsyncClient`
+        :param retry_policy: retries calls that fail transiently; defaults to
+                             the retry policy of the `authorizer`, if any
+        :type retry_policy: :class:`~delinea.secrets.server.RetryPolicy`
+        """
+        self.base_url = base_url.rstrip("/")
+        self.platform_url = self.base_url
+        self.authorizer = authorizer
+        self._api_path_uri = api_path_uri
+        if client is None:
+            client = getattr(authorizer, "client", None) or create_async_client()
+        self.client = client
+        if retry_policy is None:
+            retry_policy = getattr(authorizer, "retry_policy", None)
+        self.retry_policy = retry_policy
+        self._vault_lock = None
+        # The call in progress for each secret, shared by concurrent readers
+        self._reads = {}
+        # The id, folder id and name of the secret at each resolved path
+        self._secret_ids = SecretCache(self.SECRET_ID_CACHE_SIZE, self.SECRET_ID_TTL)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the underlying client and its connections"""
+        await self.client.aclose()
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/{self._api_path_uri.strip('/')}"
+
+    async def _get(
+        self,
+        path,
+        query_params=None,
+        headers=None,
+        timeout=DEFAULT_READ_TIMEOUT,
+        stream=False,
+    ):
+        """Calls the REST API at `path`, relative to :attr:`api_url`
+
+        When a Platform vault cannot be reached, or fails with a service
+        error, its URL is resolved again and the call is retried once, unless
+        the circuit breaker rejected the call. When `stream` is true, the
+        body of a successful response is not read, and the caller must close
+        the response.
+        """
+        if headers is None:
+            headers = await self.headers()
+        try:
+            return self.process(
+                await self._send_get(path, headers, query_params, timeout, stream)
+            )
+        except SecretServerCircuitOpenError:
+            raise
+        except (_import_httpx().TransportError, SecretServerServiceError):
+            if not self._forget_vault_url():
+                raise
+        await self.ensure_vault_url()
+        return self.process(
+            await self._send_get(path, headers, query_params, timeout, stream)
+        )
+
+    async def _send_get(self, path, headers, query_params, timeout, stream=False):
+        url = f"{self.api_url}/{path}"
+
+        async def send():
+            request = self.client.build_request(
+                "GET",
+                url,
+                params=query_params,
+                headers=headers,
+                timeout=_timeout(timeout),
+            )
+            response = await self.client.send(request, stream=stream)
+            if stream and not 200 <= response.status_code < 300:
+                # Errors are processed from the body, which also closes it
+                await response.aread()
+            return response
+
+        send = metrics.instrument_async(SecretServer._endpoint(path), url, send, stream)
+        if self.retry_policy is None:
+            return await send()
+        return await self.retry_policy.call_async(
+            url, send, (_import_httpx().TransportError,)
+        )
+
+    def _is_platform(self):
+        return getattr(self.authorizer, "_server_type", None) == "platform"
+
+    _forget_vault_url = SecretServer._forget_vault_url
+
+    async def ensure_vault_url(self):
+        """For platform, fetch and set the vault URL before making API calls.
+
+        Vault URLs are shared with every :class:`SecretServer` and
+        :class:`AsyncSecretServer` in the process for :attr:`VAULT_URL_TTL`
+        seconds.
+        """
+        # Only needed for platform scenario
+        if await self.authorizer.server_type() != "platform":
+            return
+        entry = SecretServer._vault_urls.get(self.platform_url)
+        if entry is None or time.monotonic() - entry[1] >= self.VAULT_URL_TTL:
+            if self._vault_lock is None:
+                self._vault_lock = asyncio.Lock()
+            async with self._vault_lock:
+                entry = SecretServer._vault_urls.get(self.platform_url)
+                if entry is None or time.monotonic() - entry[1] >= self.VAULT_URL_TTL:
+                    entry = await self._resolve_vault_url()
+        self.base_url = entry[0]
+
+    async def _resolve_vault_url(self):
+        access_token = await self.authorizer.get_access_token()
+        vaults_endpoint = self.platform_url + "/vaultbroker/api/vaults"
+        headers = {"Authorization": f"Bearer {access_token}"}
+        resp = await metrics.instrument_async(
+            "vaultbroker",
+            vaults_endpoint,
+            lambda: self.client.get(
+                vaults_endpoint, headers=headers, timeout=_timeout()
+            ),
+        )()
+        if resp.status_code != 200:
+            raise SecretServerError(
+                f"Failed to fetch vault details: HTTP {resp.status_code} - {resp.text}"
+            )
+        try:
+            data = _loads(resp.content)
+        except Exception as ex:
+            raise SecretServerError(f"Failed to parse vault details: {ex}")
+        entry = (SecretServer._default_vault_url(data), time.monotonic())
+        SecretServer._vault_urls[self.platform_url] = entry
+        return entry
+
+    async def get_secret_json(self, id, query_params=None, timeout=None):
+        """Gets a Secret from Secret Server
+
+        :param id: the id of the secret
+        :type id: int
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a JSON formatted string representation of the secret
+        :rtype: ``str``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            headers = await self.headers()
+            await self.ensure_vault_url()
+            return (await self._get(f"secrets/{id}", query_params, headers)).text
+
+    async def get_folder_json(
+        self, id, query_params=None, get_all_children=True, timeout=None
+    ):
+        """Gets a Folder from Secret Server
+
+        :param id: the id of the folder
+        :type id: int
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a JSON formatted string representation of the folder
+        :rtype: ``str``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the folder
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            return (
+                await self._get_folder_response(id, query_params, get_all_children)
+            ).text
+
+    async def _get_folder_response(self, id, query_params=None, get_all_children=True):
+        headers = await self.headers()
+        await self.ensure_vault_url()
+
+        if get_all_children:
+            query_params = {**(query_params or {}), "getAllChildren": "true"}
+
+        return await self._get(
+            f"folders/{id}", query_params, headers, timeout=_folder_read_timeout()
+        )
+
+    async def get_secret(
+        self, id, fetch_file_attachments=True, query_params=None, timeout=None
+    ):
+        """Gets a secret
+
+        :param id: the id of the secret
+        :type id: int
+        :param fetch_file_attachments: whether or not to fetch file attachments
+                                       and replace itemValue with the contents
+                                       for each item (field), automatically;
+                                       up to :attr:`MAX_ATTACHMENT_WORKERS`
+                                       are fetched at once. The contents are
+                                       ``str`` for textual content types and
+                                       ``bytes`` otherwise.
+        :type fetch_file_attachments: bool
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``dict`` representation of the secret
+        :rtype: ``dict``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            if query_params is not None:
+                return await self._fetch_secret(
+                    id, fetch_file_attachments, query_params
+                )
+            return await self._coalesced(
+                ("id", id, fetch_file_attachments),
+                lambda: self._fetch_secret(id, fetch_file_attachments),
+            )
+
+    async def _coalesced(self, key, load):
+        """Returns a copy of the result of awaiting `load()`, sharing a single
+        call, and its result or exception, between concurrent callers with the
+        same `key`
+        """
+        task = self._reads.get(key)
+        if task is None:
+            task = self._reads[key] = asyncio.ensure_future(load())
+
+            def forget(task):
+                if self._reads.get(key) is task:
+                    del self._reads[key]
+
+            task.add_done_callback(forget)
+        # A caller that is cancelled, or whose deadline passes, does not
+        # cancel the call for the others
+        budget = _deadline.get()
+        if budget is None:
+            return SecretServer._copy_secret(await asyncio.shield(task))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), budget.remaining())
+        except asyncio.TimeoutError:
+            raise SecretServerTimeoutError("The deadline of the call has passed")
+        return SecretServer._copy_secret(result)
+
+    async def _fetch_secret(self, id, fetch_file_attachments=True, query_params=None):
+        headers = await self.headers()
+        await self.ensure_vault_url()
+        return await self._get_secret(id, headers, fetch_file_attachments, query_params)
+
+    async def _get_secret(
+        self,
+        id,
+        headers,
+        fetch_file_attachments=True,
+        query_params=None,
+        attachment_workers=None,
+    ):
+        """Gets a secret, fetching up to `attachment_workers`, by default
+        :attr:`MAX_ATTACHMENT_WORKERS`, of its file attachments at once
+        """
+        secret = self._parse(await self._get(f"secrets/{id}", query_params, headers))
+
+        if fetch_file_attachments:
+            semaphore = asyncio.Semaphore(
+                attachment_workers or self.MAX_ATTACHMENT_WORKERS
+            )
+
+            async def fetch(item):
+                async with semaphore:
+                    item["itemValue"] = self._attachment_value(
+                        await self._get(
+                            f"secrets/{id}/fields/{item['slug']}",
+                            query_params,
+                            headers,
+                        )
+                    )
+
+            await asyncio.gather(
+                *(fetch(item) for item in secret["items"] if item["fileAttachmentId"])
+            )
+        return secret
+
+    async def download_secret_field(
+        self,
+        id,
+        slug,
+        dest,
+        chunk_size=DOWNLOAD_CHUNK_SIZE,
+        query_params=None,
+        timeout=None,
+    ):
+        """Streams the contents of a secret field, typically a file attachment,
+        to `dest` without holding more than `chunk_size` bytes in memory
+
+        Writes to `dest` are synchronous.
+
+        :param id: the id of the secret
+        :type id: int
+        :param slug: the slug of the field
+        :type slug: str
+        :param dest: a file path, a binary file object or a writable buffer
+                     such as a ``bytearray``, large enough for the contents;
+                     a file path is only replaced once the download is
+                     complete
+        :type dest: str, :class:`os.PathLike`, file object or buffer
+        :param chunk_size: the number of bytes to read at a time
+        :type chunk_size: int
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: the number of bytes written
+        :rtype: ``int``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        :raise: :class:`ValueError` when `dest` is a buffer that is too small
+        """
+        with deadline(timeout):
+            headers = await self.headers()
+            await self.ensure_vault_url()
+            response = await self._get(
+                f"secrets/{id}/fields/{slug}", query_params, headers, stream=True
+            )
+            budget = _deadline.get()
+            try:
+                with _ChunkWriter(dest) as writer:
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        if budget is not None:
+                            budget.remaining()
+                        writer.write(chunk)
+                return writer.written
+            finally:
+                await response.aclose()
+
+    async def get_secrets(
+        self, ids, fetch_file_attachments=True, max_workers=None, timeout=None
+    ):
+        """Gets several secrets concurrently
+
+        The access token and, for Platform, the vault URL are resolved once
+        for the whole batch. A failure to fetch one secret does not affect
+        the others; the error raised is returned in place of that secret.
+
+        :param ids: the ids of the secrets
+        :type ids: iterable
+        :param fetch_file_attachments: whether or not to fetch file attachments
+                                       and replace itemValue with the contents
+                                       for each item (field), automatically
+        :type fetch_file_attachments: bool
+        :param max_workers: the maximum number of secrets fetched at once;
+                            defaults to :attr:`DEFAULT_MAX_WORKERS`
+        :type max_workers: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``list`` containing, in the order of `ids`, either the
+                 ``dict`` representation of each secret or the
+                 :class:`SecretServerError` raised when fetching it
+        :rtype: ``list``
+        :raise: :class:`SecretServerError` when the access token or the vault
+                URL cannot be obtained
+        """
+        with deadline(timeout):
+            httpx = _import_httpx()
+            headers = await self.headers()
+            await self.ensure_vault_url()
+            semaphore = asyncio.Semaphore(max_workers or self.DEFAULT_MAX_WORKERS)
+
+            async def get_secret(id):
+                async with semaphore:
+                    try:
+                        return await self._coalesced(
+                            ("id", id, fetch_file_attachments),
+                            lambda: self._get_secret(
+                                id,
+                                headers,
+                                fetch_file_attachments,
+                                attachment_workers=1,
+                            ),
+                        )
+                    except SecretServerError as err:
+                        return err
+                    except httpx.HTTPError as err:
+                        return SecretServerError(str(err))
+
+            return list(await asyncio.gather(*(get_secret(id) for id in ids)))
+
+    async def get_folder(
+        self, id, query_params=None, get_all_children=False, timeout=None
+    ):
+        """Gets a folder
+
+        :param id: the id of the folder
+        :type id: int
+        :param get_all_children: Whether to retrieve all child folders of the
+                                 requested folder
+        :type get_all_children: bool
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``dict`` representation of the folder
+        :rtype: ``dict``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the folder
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            return self._parse(
+                await self._get_folder_response(id, query_params, get_all_children)
+            )
+
+    async def get_secret_by_path(
+        self, secret_path, fetch_file_attachments=True, timeout=None
+    ):
+        """Gets a secret by path
+
+        :param secret_path: full path of the secret
+        :type secret_path: str
+        :param fetch_file_attachments: whether or not to fetch file attachments
+                                       and replace itemValue with the contents
+                                       for each item (field), automatically
+        :type fetch_file_attachments: bool
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``dict`` representation of the secret
+        :rtype: ``dict``
+        """
+        path = self._normalize_path(secret_path)
+        with deadline(timeout):
+            return await self._coalesced(
+                ("path", path, fetch_file_attachments),
+                lambda: self._fetch_secret_by_path(path, fetch_file_attachments),
+            )
+
+    async def _fetch_secret_by_path(self, path, fetch_file_attachments=True):
+        # Paths the server has already resolved are fetched by id, as long as
+        # the secret is still where the path says it is
+        key = ("path", path.casefold())
+        resolved = self._secret_ids.get(key)
+        if resolved is not None:
+            id, folder_id, name = resolved
+            try:
+                secret = await self._fetch_secret(id, fetch_file_attachments)
+            except SecretServerClientError:
+                secret = None
+            if secret is not None and self._resolves_to(path, secret, folder_id):
+                return secret
+            self._secret_ids.discard(key)
+
+        secret = await self._fetch_secret(
+            0, fetch_file_attachments, query_params={"secretPath": path}
+        )
+        self._secret_ids.set(key, (secret["id"], secret["folderId"], secret["name"]))
+        return secret
+
+    async def get_folder_by_path(
+        self, folder_path, get_all_children=True, timeout=None
+    ):
+        """Gets a folder by path
+
+        :param folder_path: full path of the folder
+        :type folder_path: str
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``dict`` representation of the folder
+        :rtype: ``dict``
+        """
+        with deadline(timeout):
+            params = {"folderPath": self._normalize_path(folder_path)}
+            return await self.get_folder(
+                id=0,
+                get_all_children=get_all_children,
+                query_params=params,
+            )
+
+    async def search_secrets(self, query_params=None, timeout=None):
+        """Get Secrets from Secret Server
+
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a JSON formatted string representation of the secrets
+        :rtype: ``str``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            headers = await self.headers()
+            await self.ensure_vault_url()
+            return (await self._get("secrets", query_params, headers)).text
+
+    async def lookup_folders(self, query_params=None, timeout=None):
+        """Lookup Folders from Secret Server
+
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a JSON formatted string representation of the folders, containing only id and name
+        :rtype: ``str``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            headers = await self.headers()
+            await self.ensure_vault_url()
+            return (
+                await self._get(
+                    "folders/lookup",
+                    query_params,
+                    headers,
+                    timeout=_folder_read_timeout(),
+                )
+            ).text
+
+    def iter_secrets(
+        self, query_params=None, page_size=DEFAULT_PAGE_SIZE, timeout=None
+    ):
+        """Iterates asynchronously over the Secrets that match `query_params`,
+        one page of `page_size` records at a time, fetching the next page in
+        the background while the current one is consumed
+
+        :param query_params: query parameters to pass to the endpoint, other
+                             than ``take``
+        :type query_params: dict
+        :param page_size: the number of records to get per request
+        :type page_size: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: an asynchronous iterator over the records, each a ``dict``
+        :rtype: ``AsyncIterator[dict]``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        return self._iter_pages(
+            "secrets", query_params, page_size, _current_deadline(timeout)
+        )
+
+    def iter_folders(
+        self, query_params=None, page_size=DEFAULT_PAGE_SIZE, timeout=None
+    ):
+        """Iterates asynchronously over the Folders that match `query_params`
+        using the lookup endpoint, one page of `page_size` records at a time,
+        fetching the next page in the background while the current one is
+        consumed
+
+        :param query_params: query parameters to pass to the endpoint, other
+                             than ``take``
+        :type query_params: dict
+        :param page_size: the number of records to get per request
+        :type page_size: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: an asynchronous iterator over the records, each a ``dict``
+                 containing only id and value (the name)
+        :rtype: ``AsyncIterator[dict]``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        return self._iter_pages(
+            "folders/lookup", query_params, page_size, _current_deadline(timeout)
+        )
+
+    async def _get_page(self, path, query_params):
+        headers = await self.headers()
+        await self.ensure_vault_url()
+        if path.startswith("folders"):
+            timeout = _folder_read_timeout()
+        else:
+            timeout = DEFAULT_READ_TIMEOUT
+        return self._parse(await self._get(path, query_params, headers, timeout))
+
+    async def _iter_pages(self, path, query_params, page_size, budget=None):
+        """Iterates over the records of every page, each fetched under the
+        `budget` deadline
+        """
+        params = dict(query_params or {}, take=page_size)
+        skip = int(params.pop("skip", 0))
+        page = asyncio.ensure_future(
+            _within(budget, self._get_page, path, dict(params, skip=skip))
+        )
+        try:
+            while page is not None:
+                result = await page
+                records = result.get("records") or []
+                skip += len(records)
+                page = None
+                if records and result.get("hasNext", len(records) == page_size):
+                    page = asyncio.ensure_future(
+                        _within(budget, self._get_page, path, dict(params, skip=skip))
+                    )
+                for record in records:
+                    yield record
+        finally:
+            # When the caller stops early, the prefetched page is discarded
+            if page is not None:
+                page.cancel()
+
+    async def _list_pages(self, path, query_params, page_size=DEFAULT_PAGE_SIZE):
+        """Returns the records of every page, fetched one after the other in
+        the calling task, for callers that already run concurrently
+        """
+        params = dict(query_params, take=page_size)
+        records = []
+        while True:
+            result = await self._get_page(path, dict(params, skip=len(records)))
+            page = result.get("records") or []
+            records += page
+            if not page or not result.get("hasNext", len(page) == page_size):
+                return records
+
+    async def get_secret_ids_by_folderid(self, folder_id, timeout=None):
+        """Gets a list of secrets ids by folder_id
+
+        :param folder_id: the id of the folder
+        :type id: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``list`` of the secret id's
+        :rtype: ``list``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            return [
+                secret["id"]
+                async for secret in self.iter_secrets({"filter.folderId": folder_id})
+            ]
+
+    async def get_child_folder_ids_by_folderid(self, folder_id, timeout=None):
+        """Gets a list of child folder ids by folder_id
+
+        :param folder_id: the id of the folder
+        :type id: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: a ``list`` of the child folder id's
+        :rtype: ``list``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            params = {
+                "filter.parentFolderId": folder_id,
+                "filter.limitToDirectDescendents": True,
+            }
+            return [folder["id"] async for folder in self.iter_folders(params)]
+
+    def walk_folder(self, folder, max_workers=None, timeout=None):
+        """Walks the folder tree under `folder`, breadth first, listing up to
+        `max_workers` folders at a time, and yields each folder's id along with
+        the ids of the secrets directly in it, as soon as they are known
+
+        The order of the results is not defined.
+
+        :param folder: the id or the full path of the folder to walk
+        :type folder: int or str
+        :param max_workers: the maximum number of folders to list concurrently,
+                            :attr:`DEFAULT_MAX_WORKERS` by default
+        :type max_workers: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see
+                        :func:`~delinea.secrets.server.deadline`
+        :type timeout: float
+        :return: an asynchronous iterator of ``(folder_id, secret_ids)`` tuples
+        :rtype: ``AsyncIterator[tuple[int, list]]``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access a folder
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        # Like iter_secrets, the deadline starts now, not on the first
+        # iteration
+        return self._walk_folder(folder, max_workers, _current_deadline(timeout))
+
+    async def _walk_folder(self, folder, max_workers, budget):
+        if isinstance(folder, str):
+            folder = (
+                await asyncio.ensure_future(
+                    _within(
+                        budget,
+                        self.get_folder_by_path,
+                        folder,
+                        get_all_children=False,
+                    )
+                )
+            )["id"]
+        semaphore = asyncio.Semaphore(max_workers or self.DEFAULT_MAX_WORKERS)
+
+        async def list_folder(folder_id):
+            async with semaphore:
+                child_folders = await self._list_pages(
+                    "folders/lookup",
+                    {
+                        "filter.parentFolderId": folder_id,
+                        "filter.limitToDirectDescendents": True,
+                    },
+                )
+                secrets = await self._list_pages(
+                    "secrets", {"filter.folderId": folder_id}
+                )
+            return (
+                folder_id,
+                [child_folder["id"] for child_folder in child_folders],
+                [secret["id"] for secret in secrets],
+            )
+
+        pending = {asyncio.ensure_future(_within(budget, list_folder, folder))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    folder_id, child_folder_ids, secret_ids = task.result()
+                    pending.update(
+                        asyncio.ensure_future(
+                            _within(budget, list_folder, child_folder_id)
+                        )
+                        for child_folder_id in child_folder_ids
+                    )
+                    yield folder_id, secret_ids
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class AsyncSecretServerCloud(AsyncSecretServer):
+    """A class that uses bearer token authentication to access the Secret
+    Server Cloud REST API asynchronously.
+
+    It uses :attr:`tenant`, :attr:`tld` with :attr:`URL_TEMPLATE`, to create
+    request URLs.
+    """
+
+    DEFAULT_TLD = SecretServerCloud.DEFAULT_TLD
+    URL_TEMPLATE = SecretServerCloud.URL_TEMPLATE
+
+    def __init__(
+        self,
+        tenant=None,
+        authorizer=None,
+        tld=DEFAULT_TLD,
+        base_url=None,
+        client=None,
+    ):
+        if authorizer is None or not isinstance(authorizer, AsyncAuthorizer):
+            raise ValueError(
+                "authorizer must be provided and must be of type AsyncAuthorizer"
+            )
+        if tenant:
+            url = self.URL_TEMPLATE.format(tenant, tld)
+        elif base_url:
+            url = base_url.rstrip("/")
+        else:
+            raise ValueError("Must provide either tenant or base_url")
+        super().__init__(url, authorizer, client=client)
@@ -14,13 +14,443 @@ Example:
     secret = ServerSecret(**secret_server.get_secret(123))
 """
 
+import asyncio
+import hashlib
+import io
 import json
+import os
+import random
 import re
+import ssl
+import tempfile
+import threading
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from http.client import responses
+from importlib.util import find_spec
+from itertools import accumulate, compress, count, repeat
+from operator import eq
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parses every REST API response, directly from its bytes; see set_json_backend
+_json_backend = orjson.loads if orjson else json.loads
+
+
+def set_json_backend(loads=None):
+    """Sets the function that parses REST API responses
+
+    By default, responses are parsed with :func:`orjson.loads` when
+    `orjson <https://github.com/ijl/orjson>`_ is installed, and with
+    :func:`json.loads` otherwise.
+
+    :param loads: a function that takes the ``bytes`` of a response and
+                  returns the parsed object, raising :class:`ValueError` when
+                  it is not valid JSON; ``None`` restores the default
+    :type loads: callable
+    """
+    global _json_backend
+    if loads is None:
+        loads = orjson.loads if orjson else json.loads
+    _json_backend = loads
+
+
+def _loads(content):
+    return _json_backend(content)
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def create_session(
+    pool_connections=DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize=DEFAULT_POOL_MAXSIZE,
+    keep_alive=True,
+    transport=None,
+):
+    """Creates a connection-pooled :class:`~requests.Session`
+
+    A single session can be shared by a :class:`SecretServer` and its
+    :class:`Authorizer` so that every REST API call reuses open (TLS)
+    connections rather than performing a new handshake each time.
+
+    :param pool_connections: the number of per-host connection pools to cache
+    :type pool_connections: int
+    :param pool_maxsize: the maximum number of connections kept in each pool
+    :type pool_maxsize: int
+    :param keep_alive: whether to keep connections open between requests
+    :type keep_alive: bool
+    :param transport: sends the requests of the session instead of a pooled
+                      :class:`~requests.adapters.HTTPAdapter`, e.g. an
+                      :class:`HTTP2Transport` or an :class:`InProcessTransport`
+    :type transport: :class:`~requests.adapters.BaseAdapter`
+    :return: the session
+    :rtype: :class:`~requests.Session`
+    """
+    session = requests.Session()
+    adapter = transport or HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+
+# The deadline of the call in progress in this thread or task; see deadline()
+_deadline = ContextVar("deadline", default=None)
+
+
+class Deadline:
+    """The time by which every REST API call made for one logical call, such
+    as :meth:`SecretServer.get_secret` and the file attachments it fetches,
+    must complete
+    """
+
+    def __init__(self, timeout, connect_timeout=None):
+        """
+        :param timeout: the number of seconds from now
+        :type timeout: float
+        :param connect_timeout: the maximum number of seconds each request may
+                                take to connect; defaults to
+                                :data:`DEFAULT_CONNECT_TIMEOUT`
+        :type connect_timeout: float
+        """
+        self.expires = time.monotonic() + timeout
+        self.connect_timeout = connect_timeout
+
+    def remaining(self):
+        """Returns the number of seconds left
+
+        :raise: :class:`SecretServerTimeoutError` when there are none
+        """
+        remaining = self.expires - time.monotonic()
+        if remaining <= 0:
+            raise SecretServerTimeoutError("The deadline of the call has passed")
+        return remaining
+
+
+def _current_deadline(timeout=None, connect_timeout=None):
+    """Returns a deadline `timeout` seconds from now, or the deadline in
+    effect if it is earlier or `timeout` is ``None``
+    """
+    outer = _deadline.get()
+    if timeout is None:
+        return outer
+    budget = Deadline(timeout, connect_timeout)
+    if outer is not None and outer.expires <= budget.expires:
+        return outer
+    return budget
+
+
+@contextmanager
+def deadline(timeout, connect_timeout=None):
+    """Limits the REST API calls made in the ``with`` block to `timeout`
+    seconds in total
+
+    The limit applies to the calls made by the current thread or task, and by
+    the threads or tasks the SDK starts for them. Each request is given the
+    time remaining as its read timeout, unless its own is shorter, and a call
+    started once the time is up raises :class:`SecretServerTimeoutError`.
+    Deadlines nest, but an inner deadline never extends an outer one, and a
+    `timeout` of ``None`` leaves the deadline in effect unchanged.
+
+    Every public method of :class:`SecretServer` also takes a `timeout`.
+
+    Example:
+
+        with deadline(2):
+            secret = secret_server.get_secret(123)
+
+    :param timeout: the number of seconds the calls may take
+    :type timeout: float
+    :param connect_timeout: the maximum number of seconds each request may
+                            take to connect; defaults to
+                            :data:`DEFAULT_CONNECT_TIMEOUT`
+    :type connect_timeout: float
+    """
+    token = _deadline.set(_current_deadline(timeout, connect_timeout))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _with_deadline(function, budget):
+    """Returns `function` wrapped to run under the `budget` deadline in
+    whichever thread calls it
+    """
+
+    def call(*args, **kwargs):
+        token = _deadline.set(budget)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _deadline.reset(token)
+
+    return call
+
+
+def _timeouts(read=DEFAULT_READ_TIMEOUT, connect=DEFAULT_CONNECT_TIMEOUT):
+    """Returns the ``(connect, read)`` timeouts of a request, capped by the
+    time remaining until the deadline in effect
+
+    :param read: the read timeout, or ``None`` for no timeout
+    :raise: :class:`SecretServerTimeoutError` when the deadline has passed
+    """
+    budget = _deadline.get()
+    if budget is None:
+        return connect, read
+    remaining = budget.remaining()
+    if budget.connect_timeout is not None:
+        connect = budget.connect_timeout
+    return min(connect, remaining), remaining if read is None else min(read, remaining)
+
+
+def _folder_read_timeout():
+    """Returns the read timeout of folder calls, whose responses can be large:
+    :data:`DEFAULT_READ_TIMEOUT`, or, under a deadline, the time remaining
+    until it, however long
+    """
+    return DEFAULT_READ_TIMEOUT if _deadline.get() is None else None
+
+
+def _build_response(request, status, headers, raw, transport):
+    """Returns a :class:`~requests.Response` to `request` whose body is read
+    from `raw`
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.reason = responses.get(status, "")
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = raw
+    response.url = request.url
+    response.request = request
+    response.connection = transport
+    return response
+
+
+class InProcessTransport(BaseAdapter):
+    """Hands each request to a Python function rather than sending it over
+    the network, so that the SDK can be tested or benchmarked against a stand-in
+    for Secret Server without any network overhead
+
+    `handler` is called with the method, URL, headers and body (``bytes``) of
+    each request, from the thread that makes it, and returns the status,
+    headers and body of the response.
+
+    Example:
+
+        session = create_session(transport=InProcessTransport(handler))
+        authorizer = AccessTokenAuthorizer(token, base_url, session)
+        secret_server = SecretServer(base_url, authorizer, session=session)
+    """
+
+    def __init__(self, handler):
+        """
+        :param handler: a function that returns a ``(status, headers, body)``
+                        tuple for each request
+        :type handler: callable
+        """
+        super().__init__()
+        self.handler = handler
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+        status, headers, content = self.handler(
+            request.method, request.url, request.headers, body or b""
+        )
+        return _build_response(request, status, headers, io.BytesIO(content), self)
+
+    def close(self):
+        pass
+
+
+class _StreamedBody:
+    """Reads the body of an :class:`httpx.Response` as
+    :attr:`requests.Response.raw` is read
+    """
+
+    def __init__(self, response, errors):
+        self._response = response
+        self._chunks = response.iter_bytes()
+        self._buffer = b""
+        self._errors = errors
+
+    def read(self, size=-1):
+        try:
+            while size is None or size < 0 or len(self._buffer) < size:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+        except self._errors as err:
+            raise requests.ConnectionError(err)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self):
+        self._response.close()
+
+
+class HTTP2Transport(BaseAdapter):
+    """Sends requests with `httpx <https://www.python-httpx.org/>`_, over
+    HTTP/2 where the server supports it, so that concurrent calls to a Secret
+    Server node are multiplexed over a single connection
+
+    It requires the optional ``httpx`` and ``h2`` dependencies:
+
+        python -m pip install python-tss-sdk[http2]
+
+    Example:
+
+        session = create_session(transport=HTTP2Transport())
+    """
+
+    # Connection-specific headers, which HTTP/2 does not allow
+    HOP_BY_HOP_HEADERS = frozenset(
+        ("connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade")
+    )
+
+    def __init__(self, max_connections=DEFAULT_POOL_MAXSIZE):
+        """
+        :param max_connections: the maximum number of connections per client
+        :type max_connections: int
+        :raise: :class:`ImportError` when ``httpx`` or ``h2`` is not installed
+        """
+        try:
+            import httpx
+
+            if find_spec("h2") is None:
+                raise ImportError("No module named 'h2'")
+        except ImportError as err:
+            raise ImportError(
+                "httpx and h2 are required to use HTTP2Transport; install them "
+                "with `python -m pip install python-tss-sdk[http2]`"
+            ) from err
+
+        super().__init__()
+        self._httpx = httpx
+        self.max_connections = max_connections
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, verify, cert):
+        """Returns the client for the `verify` and `cert` settings of a
+        request, creating it on first use
+        """
+        key = (verify, cert)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                context = verify
+                if verify:
+                    context = ssl.create_default_context(
+                        cafile=verify if isinstance(verify, str) else None
+                    )
+                    if cert:
+                        context.load_cert_chain(
+                            *(cert if isinstance(cert, tuple) else (cert,))
+                        )
+                client = self._clients[key] = self._httpx.Client(
+                    http2=True,
+                    verify=context,
+                    limits=self._httpx.Limits(max_connections=self.max_connections),
+                )
+        return client
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        httpx = self._httpx
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        else:
+            timeout = httpx.Timeout(timeout)
+        client = self._client(verify, cert)
+        headers = {
+            name: value
+            for name, value in request.headers.items()
+            if name.lower() not in self.HOP_BY_HOP_HEADERS
+        }
+        try:
+            response = client.send(
+                client.build_request(
+                    request.method,
+                    request.url,
+                    headers=headers,
+                    content=request.body,
+                    timeout=timeout,
+                ),
+                stream=True,
+            )
+        except httpx.TimeoutException as err:
+            raise requests.Timeout(err, request=request)
+        except httpx.TransportError as err:
+            raise requests.ConnectionError(err, request=request)
+        return _build_response(
+            request,
+            response.status_code,
+            response.headers,
+            _StreamedBody(response, httpx.TransportError),
+            self,
+        )
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+
+_WORD_BOUNDARY = re.compile(r"(.)([A-Z][a-z]+)")
+_CASE_BOUNDARY = re.compile("([a-z0-9])([A-Z])")
+
+
+@lru_cache(maxsize=1024)
+def _snake_case(key):
+    """Transforms a camelCase key to snake_case, memoized as the REST API only
+    ever returns a few hundred distinct keys
+    """
+    return _CASE_BOUNDARY.sub(r"\1_\2", _WORD_BOUNDARY.sub(r"\1_\2", key)).lower()
 
 
 @dataclass
@@ -32,18 +462,30 @@ class ServerSecret:
 
         Transforms the keys of the given map from camelCase to snake_case.
         """
-        return [
-            (
-                re.compile("([a-z0-9])([A-Z])")
-                .sub(r"\1_\2", re.compile(r"(.)([A-Z][a-z]+)").sub(r"\1_\2", k))
-                .lower(),
-                v,
-            )
-            for (k, v) in camel_cased.items()
-        ]
+        return [(_snake_case(k), v) for (k, v) in camel_cased.items()]
 
     @dataclass
     class Field:
+        # Slots for the attributes the REST API returns, and a __dict__ for
+        # any others
+        __slots__ = (
+            "item_id",
+            "field_id",
+            "file_attachment_id",
+            "field_description",
+            "field_name",
+            "filename",
+            "value",
+            "slug",
+            "is_file",
+            "is_notes",
+            "is_password",
+            "is_list",
+            "list_type",
+            "_loader",
+            "__dict__",
+        )
+
         item_id: int
         field_id: int
         file_attachment_id: int
@@ -53,13 +495,95 @@ class ServerSecret:
         value: str
         slug: str
 
-        def __init__(self, **kwargs):
+        def __init__(self, loader=None, **kwargs):
             # The REST API returns attributes with camelCase names which we
             # replace with snake_case per Python conventions
             for k, v in ServerSecret.snake_case(kwargs):
                 if k == "item_value":
+                    if loader is not None:
+                        # value is fetched by __getattr__ on first access
+                        continue
                     k = "value"
                 setattr(self, k, v)
+            self._loader = loader
+
+        def __getattr__(self, name):
+            # Only called when the attribute is not set i.e., for the value of
+            # a lazily loaded file attachment
+            if name == "value" and self._loader is not None:
+                self.value = self._loader()
+                self._loader = None
+                return self.value
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        def _loaded_values(self):
+            """The attributes compared by ``==`` and shown by ``repr``, leaving
+            out a lazily loaded value that has not been loaded yet
+            """
+            return [
+                (f.name, getattr(self, f.name))
+                for f in fields(self)
+                if f.name != "value" or self._loader is None
+            ]
+
+        def __repr__(self):
+            attributes = ", ".join(f"{k}={v!r}" for k, v in self._loaded_values())
+            return f"{type(self).__qualname__}({attributes})"
+
+        def __eq__(self, other):
+            if other.__class__ is not self.__class__:
+                return NotImplemented
+            return self._loaded_values() == other._loaded_values()
+
+    # Slots for the attributes the REST API returns, and a __dict__ for any
+    # others
+    __slots__ = (
+        "id",
+        "folder_id",
+        "secret_template_id",
+        "site_id",
+        "active",
+        "checked_out",
+        "check_out_enabled",
+        "name",
+        "secret_template_name",
+        "last_heart_beat_status",
+        "last_heart_beat_check",
+        "last_password_change_attempt",
+        "fields",
+        "items",
+        "launcher_connect_as_secret_id",
+        "check_out_minutes_remaining",
+        "check_out_user_display_name",
+        "check_out_user_id",
+        "is_restricted",
+        "is_out_of_sync",
+        "out_of_sync_reason",
+        "auto_change_enabled",
+        "auto_change_next_password",
+        "requires_approval_for_access",
+        "requires_comment",
+        "check_out_interval_minutes",
+        "check_out_change_password_enabled",
+        "access_request_workflow_map_id",
+        "proxy_enabled",
+        "session_recording_enabled",
+        "restrict_ssh_commands",
+        "jumpbox_route_id",
+        "allow_owners_unrestricted_ssh_commands",
+        "is_double_lock",
+        "double_lock_id",
+        "enable_inherit_permissions",
+        "password_type_web_script_id",
+        "enable_inherit_secret_policy",
+        "secret_policy_id",
+        "failed_password_change_attempts",
+        "response_codes",
+        "web_launcher_requires_incognito_mode",
+        "__dict__",
+    )
 
     id: int
     folder_id: int
@@ -78,21 +602,49 @@ class ServerSecret:
     DEFAULT_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 
     def __init__(self, **kwargs):
+        """When a `secret_server` is passed, the value of each file attachment
+        field is fetched through it on first access, then kept, so the json
+        should come from ``get_secret(id, fetch_file_attachments=False)``
+        """
         # The REST API returns attributes with camelCase names which we replace
         # with snake_case per Python conventions
+        secret_server = kwargs.pop("secret_server", None)
+        id = kwargs["id"] if secret_server is not None else None
         datetime_format = self.DEFAULT_DATETIME_FORMAT
         if "datetime_format" in kwargs:
             datetime_format = kwargs["datetime_format"]
         for k, v in self.snake_case(kwargs):
-            if k in ["last_heart_beat_check", "last_password_change_attempt"]:
+            if k in ("last_heart_beat_check", "last_password_change_attempt"):
                 # @dataclass does not marshal timestamps into datetimes automatically
-                v = re.sub(r"\.[0-9]+$", "", v)
-                v = datetime.strptime(v, datetime_format)
+                v = self._parse_datetime(v, datetime_format)
             setattr(self, k, v)
         self.fields = {
-            item["slug"]: ServerSecret.Field(**item) for item in kwargs["items"]
+            item["slug"]: ServerSecret.Field(
+                loader=self._attachment_loader(secret_server, id, item),
+                **item,
+            )
+            for item in kwargs["items"]
         }
 
+    @classmethod
+    def _parse_datetime(cls, value, datetime_format):
+        """Parses a timestamp, ignoring fractional seconds"""
+        # fromisoformat is several times faster than strptime, so it handles
+        # the usual YYYY-MM-DDTHH:MM:SS[.fffffff] timestamps
+        if (
+            datetime_format == cls.DEFAULT_DATETIME_FORMAT
+            and value[10:11] == "T"
+            and (len(value) == 19 or value[19] == "." and value[20:].isdigit())
+        ):
+            return datetime.fromisoformat(value[:19])
+        return datetime.strptime(re.sub(r"\.[0-9]+$", "", value), datetime_format)
+
+    @staticmethod
+    def _attachment_loader(secret_server, id, item):
+        if secret_server is None or not item.get("fileAttachmentId"):
+            return None
+        return lambda: secret_server.get_secret_field(id, item["slug"])
+
 
 @dataclass
 class ServerFolder:
@@ -103,18 +655,12 @@ class ServerFolder:
 
         Transforms the keys of the given map from camelCase to snake_case.
         """
-        return [
-            (
-                re.compile("([a-z0-9])([A-Z])")
-                .sub(r"\1_\2", re.compile(r"(.)([A-Z][a-z]+)").sub(r"\1_\2", k))
-                .lower(),
-                v,
-            )
-            for (k, v) in camel_cased.items()
-        ]
+        return [(_snake_case(k), v) for (k, v) in camel_cased.items()]
 
     @dataclass
     class Field:
+        __slots__ = ("item_id", "value", "slug", "__dict__")
+
         item_id: int
         value: str
         slug: str
@@ -127,6 +673,22 @@ class ServerFolder:
                     k = "value"
                 setattr(self, k, v)
 
+    # Slots for the attributes the REST API returns, and a __dict__ for any
+    # others
+    __slots__ = (
+        "id",
+        "folder_name",
+        "folder_path",
+        "parent_folder_id",
+        "folder_type_id",
+        "secret_policy_id",
+        "inherit_secret_policy",
+        "inherit_permissions",
+        "child_folders",
+        "secret_templates",
+        "__dict__",
+    )
+
     id: int
     folder_name: str
     folder_path: str
@@ -145,6 +707,195 @@ class ServerFolder:
             setattr(self, k, v)
 
 
+class SecretBatch:
+    """A compact, column-oriented container for many secrets
+
+    It is built from the records returned by :meth:`SecretServer.iter_secrets`
+    or :meth:`SecretServer.search_secrets`, or from the secrets returned by
+    :meth:`SecretServer.get_secrets`. The attributes in :attr:`COLUMNS` are
+    stored in one :class:`array.array` or ``list`` each, rather than in one
+    ``dict`` per secret. Other attributes are dropped, except for the fields
+    of secrets. :class:`ServerSecret` objects are only built on demand.
+
+    Missing integers are stored as ``-1``, missing booleans as ``False`` and
+    missing strings as ``None``.
+
+    Example:
+
+        batch = SecretBatch(secret_server.iter_secrets({"filter.folderId": 1}))
+        for id, name in batch.filter(active=True).select("id", "name"):
+            print(id, name)
+    """
+
+    # (attribute, REST API key, array typecode or None for a list)
+    COLUMNS = (
+        ("id", "id", "q"),
+        ("folder_id", "folderId", "q"),
+        ("secret_template_id", "secretTemplateId", "q"),
+        ("site_id", "siteId", "q"),
+        ("active", "active", "b"),
+        ("checked_out", "checkedOut", "b"),
+        ("check_out_enabled", "checkOutEnabled", "b"),
+        ("name", "name", None),
+        ("secret_template_name", "secretTemplateName", None),
+        ("last_heart_beat_status", "lastHeartBeatStatus", None),
+        ("last_heart_beat_check", "lastHeartBeatCheck", None),
+        ("last_password_change_attempt", "lastPasswordChangeAttempt", None),
+    )
+    # Columns with few distinct values, which are stored once per batch
+    _SHARED = ("secret_template_name", "last_heart_beat_status")
+    # Columns stored as 0 or 1, which are read back as bool
+    _BOOLS = frozenset(
+        attribute for attribute, _, typecode in COLUMNS if typecode == "b"
+    )
+
+    def __init__(self, secrets=()):
+        """
+        :param secrets: search records or secrets, as ``dict`` objects; any
+                        :class:`SecretServerError` is skipped and kept in
+                        :attr:`errors`
+        :type secrets: iterable
+        """
+        self.errors = []
+        self._columns = {
+            attribute: array(typecode) if typecode else []
+            for attribute, _, typecode in self.COLUMNS
+        }
+        # The items (fields) of each secret, or None for search records
+        self._items = []
+        shared = {}
+        for secret in secrets:
+            if isinstance(secret, SecretServerError):
+                self.errors.append(secret)
+                continue
+            for attribute, key, typecode in self.COLUMNS:
+                value = secret.get(key)
+                if typecode == "q":
+                    value = -1 if value is None else value
+                elif typecode == "b":
+                    value = bool(value)
+                elif attribute in self._SHARED:
+                    value = shared.setdefault(value, value)
+                self._columns[attribute].append(value)
+            self._items.append(secret.get("items"))
+
+    def __len__(self):
+        return len(self._items)
+
+    def column(self, attribute):
+        """Returns the column of `attribute`, which must not be modified;
+        booleans are stored as ``1`` and ``0``
+
+        :param attribute: the snake_case name of an attribute in
+                          :attr:`COLUMNS`
+        :type attribute: str
+        :rtype: :class:`array.array` or ``list``
+        """
+        return self._columns[attribute]
+
+    def select(self, *attributes):
+        """Returns a ``tuple`` of the values of `attributes` for each secret
+
+        :rtype: ``list``
+        """
+        return list(zip(*(self._values(attribute) for attribute in attributes)))
+
+    def _values(self, attribute):
+        column = self._columns[attribute]
+        return map(bool, column) if attribute in self._BOOLS else column
+
+    def _value(self, attribute, index):
+        value = self._columns[attribute][index]
+        return bool(value) if attribute in self._BOOLS else value
+
+    def filter(self, predicate=None, **values):
+        """Returns a new batch of the secrets whose attributes equal `values`
+        e.g., ``filter(folder_id=1, active=True)``, and for which
+        `predicate`, called with the value of each attribute as keyword
+        arguments, returns ``True``
+
+        :param predicate: an optional function of the attributes
+        :type predicate: callable
+        :rtype: :class:`SecretBatch`
+        """
+        indices = None
+        for attribute, value in values.items():
+            column = self._columns[attribute]
+            if indices is None:
+                # Compare the whole column at C speed
+                indices = list(
+                    compress(range(len(column)), map(eq, column, repeat(value)))
+                )
+            else:
+                indices = [index for index in indices if column[index] == value]
+        if indices is None:
+            indices = range(len(self))
+        if predicate is not None:
+            indices = [
+                index
+                for index in indices
+                if predicate(
+                    **{
+                        attribute: self._value(attribute, index)
+                        for attribute in self._columns
+                    }
+                )
+            ]
+        return self.take(indices)
+
+    def take(self, indices):
+        """Returns a new batch of the secrets at `indices`
+
+        :param indices: positions in this batch
+        :type indices: iterable
+        :rtype: :class:`SecretBatch`
+        """
+        indices = list(indices)
+        batch = SecretBatch()
+        for attribute, _, typecode in self.COLUMNS:
+            column = self._columns[attribute]
+            values = [column[index] for index in indices]
+            batch._columns[attribute] = array(typecode, values) if typecode else values
+        batch._items = [self._items[index] for index in indices]
+        return batch
+
+    def secret(self, index, secret_server=None):
+        """Builds a :class:`ServerSecret` for the secret at `index`
+
+        Search records have no fields, so the secret is fetched through
+        `secret_server` instead.
+
+        :param index: the position of the secret in the batch
+        :type index: int
+        :param secret_server: fetches secrets that have no fields
+        :type secret_server: :class:`SecretServer`
+        :rtype: :class:`ServerSecret`
+        :raise: :class:`ValueError` when the secret has no fields and there is
+                no `secret_server`
+        """
+        items = self._items[index]
+        if items is None:
+            if secret_server is None:
+                raise ValueError(
+                    "search records have no fields; pass a secret_server to "
+                    "fetch the secret"
+                )
+            return ServerSecret(**secret_server.get_secret(self._columns["id"][index]))
+        secret = {
+            key: self._value(attribute, index)
+            for attribute, key, _ in self.COLUMNS
+            if self._columns[attribute][index] is not None
+        }
+        return ServerSecret(**secret, items=items)
+
+    def secrets(self, secret_server=None):
+        """Iterates over the :class:`ServerSecret` of each secret in the batch,
+        see :meth:`secret`
+        """
+        for index in range(len(self)):
+            yield self.secret(index, secret_server)
+
+
 class SecretServerError(Exception):
     """An Exception that includes a message and the server response"""
 
@@ -161,9 +912,29 @@ class SecretServerServiceError(SecretServerError):
     """An Exception that represents a service error i.e. ``500``."""
 
 
+class SecretServerCircuitOpenError(SecretServerServiceError):
+    """An Exception raised, without calling the server, while the circuit
+    breaker of a :class:`RetryPolicy` is open for the server's host
+    """
+
+
+class SecretServerTimeoutError(SecretServerError):
+    """An Exception raised, without calling the server, when the
+    :func:`deadline` of a call has passed
+    """
+
+
 class Authorizer(ABC):
     """Main abstract base class for all Authorizer access methods."""
 
+    SERVER_TYPES = ("secret_server", "platform")
+    DETECTION_TIMEOUT = 10
+
+    # The server type detected for each base URL, shared process-wide
+    _detected_server_types = {}
+    _detection_locks = {}
+    _detection_lock = threading.Lock()
+
     @staticmethod
     def add_bearer_token_authorization_header(bearer_token, existing_headers={}):
         """Adds an HTTP `Authorization` header containing the `Bearer` token
@@ -179,35 +950,99 @@ class Authorizer(ABC):
             **existing_headers,
         }
 
+    @property
+    def session(self):
+        """The :class:`~requests.Session` used to make HTTP calls, created on
+        first use if one was not provided
+        """
+        if getattr(self, "_session", None) is None:
+            self._session = create_session()
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    @staticmethod
+    def _health_endpoints(base_url):
+        """Returns the Secret Server and the Platform health check URLs"""
+        return (
+            base_url.rstrip("/") + "/api/v1/healthcheck",
+            base_url.rstrip("/") + "/health",
+        )
+
     def _perform_server_detection(self, base_url):
-        """Detects if the server is Secret Server or Platform by health check endpoints."""
-        secret_server_endpoint = base_url.rstrip("/") + "/api/v1/healthcheck"
-        platform_endpoint = base_url.rstrip("/") + "/health"
+        """Detects if the server is Secret Server or Platform by health check endpoints.
 
-        if self._validate_health_endpoint(secret_server_endpoint):
-            self._server_type = "secret_server"
-            return
-        if self._validate_health_endpoint(platform_endpoint):
-            self._server_type = "platform"
-            return
+        Both endpoints are probed at once, each with a timeout of
+        :attr:`detection_timeout` seconds, and the result is remembered for
+        `base_url` by every :class:`Authorizer` in the process.
+        """
+        base_url = base_url.rstrip("/")
+        with Authorizer._detection_lock:
+            lock = Authorizer._detection_locks.setdefault(base_url, threading.Lock())
+        with lock:
+            server_type = Authorizer._detected_server_types.get(base_url)
+            if server_type is None:
+                server_type = self._probe_server_type(base_url)
+                Authorizer._detected_server_types[base_url] = server_type
+        self._server_type = server_type
+
+    def _probe_server_type(self, base_url):
+        """Returns ``secret_server`` if its health check endpoint responds as
+        healthy, otherwise ``platform`` if that one does
+
+        Both endpoints are probed at once, and both probes have finished when
+        this returns.
+
+        :raise: :class:`SecretServerError` when neither does
+        """
+        validate = _with_deadline(self._validate_health_endpoint, _deadline.get())
+        with ThreadPoolExecutor(max_workers=len(self.SERVER_TYPES)) as executor:
+            probes = [
+                executor.submit(validate, url)
+                for url in self._health_endpoints(base_url)
+            ]
+            for probe, server_type in zip(probes, self.SERVER_TYPES):
+                if probe.result():
+                    return server_type
         raise SecretServerError(
             "Unable to detect server type via health check endpoints."
         )
 
+    def _set_server_type(self, server_type):
+        """Sets the server type instead of detecting it
+
+        :raise: :class:`ValueError` when `server_type` is not one of
+                :attr:`SERVER_TYPES`
+        """
+        if server_type not in self.SERVER_TYPES:
+            raise ValueError(f"server_type must be one of {self.SERVER_TYPES}")
+        self._server_type = server_type
+
     def _validate_health_endpoint(self, url):
         """Validates if an endpoint returns healthy status."""
+
+        def send():
+            timeout = getattr(self, "detection_timeout", None) or self.DETECTION_TIMEOUT
+            return self.session.get(url, timeout=_timeouts(timeout, timeout))
+
         try:
-            response = requests.get(url, timeout=60)
+            response = metrics.instrument("health", url, send)()
         except Exception:
             return False
+        return self._is_healthy(response)
 
+    @staticmethod
+    def _is_healthy(response):
+        """Whether a health check endpoint response reports a healthy status"""
         try:
             response_body = response.content
         except Exception:
             return False
 
         try:
-            json_data = response.json()
+            json_data = _loads(response_body)
             return json_data.get("Healthy", False)
         except Exception:
             return b"Healthy" in response_body or b"healthy" in response_body
@@ -217,10 +1052,20 @@ class Authorizer(ABC):
         """Returns the access_token from a Grant Request"""
 
     def headers(self, existing_headers={}):
-        """Returns a dictionary containing headers for REST API calls"""
-        return self.add_bearer_token_authorization_header(
-            self.get_access_token(), existing_headers
-        )
+        """Returns a dictionary containing headers for REST API calls
+
+        The `Authorization` header is built once per access token and a copy
+        of it is returned on each call, so callers may modify the result.
+        """
+        access_token = self.get_access_token()
+        cached = getattr(self, "_headers", None)
+        if cached is None or cached[0] != access_token:
+            cached = (
+                access_token,
+                self.add_bearer_token_authorization_header(access_token),
+            )
+            self._headers = cached
+        return {**cached[1], **existing_headers}
 
 
 class AccessTokenAuthorizer(Authorizer):
@@ -231,10 +1076,121 @@ class AccessTokenAuthorizer(Authorizer):
     def get_access_token(self):
         return self.access_token
 
-    def __init__(self, access_token, base_url):
+    def __init__(
+        self,
+        access_token,
+        base_url,
+        session=None,
+        server_type=None,
+        detection_timeout=None,
+    ):
+        """
+        :param server_type: either ``"secret_server"`` or ``"platform"``; it
+                            is detected from the health check endpoints if
+                            it is ``None``
+        :type server_type: str
+        :param detection_timeout: the timeout, in seconds, of each health
+                                  check; defaults to
+                                  :attr:`DETECTION_TIMEOUT`
+        :type detection_timeout: float
+        """
         self.access_token = access_token
         self.base_url = base_url.rstrip("/")
-        self._perform_server_detection(self.base_url)
+        self.session = session
+        self.detection_timeout = detection_timeout
+        if server_type is None:
+            self._perform_server_detection(self.base_url)
+        else:
+            self._set_server_type(server_type)
+
+
+class FileTokenCache:
+    """A cache of *OAuth2 Access Grants* on disk, shared between processes
+
+    Each grant is kept in a file, readable only by its owner, named after a
+    hash of the base URL, username and domain it was granted for. A lock file
+    alongside it ensures that only one process at a time requests a new grant
+    for the same credentials.
+
+    Example:
+
+        authorizer = PasswordGrantAuthorizer(
+            base_url, username, password, token_cache=FileTokenCache()
+        )
+    """
+
+    def __init__(self, directory=None):
+        """
+        :param directory: where to keep the cache files; defaults to
+                          ``delinea-tss`` in ``$XDG_CACHE_HOME`` or ``~/.cache``
+        :type directory: str
+        """
+        if directory is None:
+            directory = os.path.join(
+                os.environ.get("XDG_CACHE_HOME")
+                or os.path.join(os.path.expanduser("~"), ".cache"),
+                "delinea-tss",
+            )
+        self.directory = directory
+
+    @staticmethod
+    def key(base_url, username, domain=None):
+        """Returns the cache key for the given credentials"""
+        return hashlib.sha256(
+            "\n".join((base_url.rstrip("/"), username, domain or "")).encode()
+        ).hexdigest()
+
+    def _path(self, key, suffix=".json"):
+        return os.path.join(self.directory, key + suffix)
+
+    @contextmanager
+    def lock(self, key):
+        """Holds an exclusive, cross-process lock on `key` while in the
+        ``with`` block
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        fd = os.open(self._path(key, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def load(self, key):
+        """Returns the entry cached under `key` or ``None`` if there is no
+        readable entry
+        """
+        try:
+            with open(self._path(key)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, entry):
+        """Atomically replaces the entry cached under `key`"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as file:
+            json.dump(entry, file)
+        os.replace(temporary_path, path)
+
+    def delete(self, key):
+        """Removes the entry cached under `key`, if any"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
 
 
 class PasswordGrantAuthorizer(Authorizer):
@@ -246,104 +1202,1189 @@ class PasswordGrantAuthorizer(Authorizer):
     PLATFORM_TOKEN_PATH_URI = "/identity/api/oauth2/token/xpmplatform"
 
     @staticmethod
-    def get_access_grant(token_url, grant_request):
+    def get_access_grant(token_url, grant_request, session=None, retry_policy=None):
         """Gets an *OAuth2 Access Grant* by calling the Secret Server REST API
         ``token`` endpoint
 
+        :param session: the session to make the call with; a one-off
+                        connection is used if it is ``None``
+        :type session: :class:`~requests.Session`
+        :param retry_policy: retries the call when it fails transiently
+        :type retry_policy: :class:`RetryPolicy`
         :raise :class:`SecretServerError` when the server returns anything
                 other than a valid Access Grant
         """
 
-        response = requests.post(token_url, grant_request, timeout=60)
+        def send():
+            return (session or requests).post(
+                token_url, grant_request, timeout=_timeouts()
+            )
+
+        send = metrics.instrument("token", token_url, send)
+        response = retry_policy.call(token_url, send) if retry_policy else send()
 
         try:  # TSS returns a 200 (OK) containing HTML for some error conditions
-            return json.loads(SecretServer.process(response).content)
-        except json.JSONDecodeError:
+            return _loads(SecretServer.process(response).content)
+        except ValueError:
             raise SecretServerError(response)
 
-    def _refresh(self, seconds_of_drift=300):
+    @staticmethod
+    def _grant_expired(access_grant, refreshed, seconds_of_drift):
+        """Whether a grant has expired or will in the next `seconds_of_drift`
+        seconds, which are capped at half the lifetime of the grant
+        """
+        expires_in = access_grant["expires_in"]
+        return (
+            refreshed
+            + timedelta(seconds=expires_in - min(seconds_of_drift, expires_in / 2))
+            <= datetime.now()
+        )
+
+    def _expired(self, seconds_of_drift):
+        """Whether the current grant, if any, has expired or will in the next
+        `seconds_of_drift` seconds
+        """
+        if not hasattr(self, "access_grant"):
+            return True
+        return self._grant_expired(
+            self.access_grant, self.access_grant_refreshed, seconds_of_drift
+        )
+
+    def _refresh(self, seconds_of_drift=300, force=False, refreshed=None):
         """Refreshes the *OAuth2 Access Grant* if it has expired or will in the next
-        `seconds_of_drift` seconds.
+        `seconds_of_drift` seconds, or regardless if `force` is ``True``.
+
+        It is thread-safe; when several threads find the grant expired, one
+        of them requests a new grant while the others wait for it. When
+        `refreshed` is given, nothing is done if the grant has been renewed
+        since that time.
 
         :raise :class:`SecretServerError` when the server returns anything other
                than a valid Access Grant
         """
 
-        if (
-            hasattr(self, "access_grant")
-            and self.access_grant_refreshed
-            + timedelta(seconds=self.access_grant["expires_in"] + seconds_of_drift)
-            > datetime.now()
-        ):
+        if self._is_current(seconds_of_drift, force, refreshed):
             return
-        else:
-            # Detect server type if not already done
-            if not hasattr(self, "_server_type"):
-                self._perform_server_detection(self.base_url)
-            # Decide token_path_uri if not provided
-            if not self.token_path_uri:
-                if self._server_type == "secret_server":
-                    self.token_path_uri = self.TOKEN_PATH_URI
-                elif self._server_type == "platform":
-                    self.token_path_uri = self.PLATFORM_TOKEN_PATH_URI
-                else:
-                    raise SecretServerError("Unknown server type for token request.")
-            if self._server_type == "secret_server":
-                self.token_url = (
-                    self.base_url.rstrip("/") + "/" + self.token_path_uri.strip("/")
+        with self._refresh_lock:
+            # Another thread may have refreshed the grant while this one waited
+            if self._is_current(seconds_of_drift, force, refreshed):
+                return
+            if self.token_cache is None:
+                self._request_access_grant()
+                return
+            key = self.token_cache.key(self.base_url, self.username, self.domain)
+            with self.token_cache.lock(key):
+                # Another process may have refreshed the grant in the meantime
+                if not force and self._load_cached_access_grant(key, seconds_of_drift):
+                    return
+                self._request_access_grant()
+                self.token_cache.save(
+                    key,
+                    {
+                        "access_grant": self.access_grant,
+                        "refreshed": self.access_grant_refreshed.timestamp(),
+                        "server_type": self._server_type,
+                        "token_url": self.token_url,
+                    },
                 )
-                grant_request = {
-                    "username": self.username,
-                    "password": self.password,
-                    "grant_type": "password",
-                }
-                if hasattr(self, "domain") and self.domain:
-                    grant_request["domain"] = self.domain
-                self.access_grant = self.get_access_grant(self.token_url, grant_request)
-                self.access_grant_refreshed = datetime.now()
+
+    def _is_current(self, seconds_of_drift, force, refreshed):
+        """Whether the grant does not need to be refreshed"""
+        if refreshed is not None and refreshed != getattr(
+            self, "access_grant_refreshed", None
+        ):
+            return True
+        return not force and not self._expired(seconds_of_drift)
+
+    def _request_access_grant(self):
+        # Detect server type if not already done
+        if not hasattr(self, "_server_type"):
+            self._perform_server_detection(self.base_url)
+        grant_request = self._grant_request()
+        self.access_grant = self.get_access_grant(
+            self.token_url, grant_request, self.session, self.retry_policy
+        )
+        self.access_grant_refreshed = datetime.now()
+
+    def _load_cached_access_grant(self, key, seconds_of_drift):
+        """Adopts the grant in :attr:`token_cache`, if there is one that has
+        not expired
+
+        :return: whether a grant was adopted
+        :rtype: bool
+        """
+        entry = self.token_cache.load(key)
+        if entry is None:
+            return False
+        try:
+            access_grant = entry["access_grant"]
+            refreshed = datetime.fromtimestamp(entry["refreshed"])
+            server_type = entry["server_type"]
+            token_url = entry["token_url"]
+            if self._grant_expired(access_grant, refreshed, seconds_of_drift):
+                return False
+        except (KeyError, TypeError, ValueError):
+            return False
+        self.access_grant = access_grant
+        self.access_grant_refreshed = refreshed
+        self._server_type = server_type
+        self.token_url = token_url
+        return True
+
+    def _grant_request(self):
+        """Sets :attr:`token_url` for the detected server type and returns the
+        matching grant request
+
+        :raise :class:`SecretServerError` when the server type is unknown
+        """
+        # Decide token_path_uri if not provided
+        if not self.token_path_uri:
+            if self._server_type == "secret_server":
+                self.token_path_uri = self.TOKEN_PATH_URI
             elif self._server_type == "platform":
-                self.token_url = (
-                    self.base_url.rstrip("/") + "/" + self.token_path_uri.strip("/")
-                )
-                grant_request = {
-                    "client_id": self.username,
-                    "client_secret": self.password,
-                    "grant_type": "client_credentials",
-                    "scope": "xpmheadless",
-                }
-                self.access_grant = self.get_access_grant(self.token_url, grant_request)
-                self.access_grant_refreshed = datetime.now()
+                self.token_path_uri = self.PLATFORM_TOKEN_PATH_URI
             else:
                 raise SecretServerError("Unknown server type for token request.")
+        if self._server_type == "secret_server":
+            self.token_url = (
+                self.base_url.rstrip("/") + "/" + self.token_path_uri.strip("/")
+            )
+            grant_request = {
+                "username": self.username,
+                "password": self.password,
+                "grant_type": "password",
+            }
+            if hasattr(self, "domain") and self.domain:
+                grant_request["domain"] = self.domain
+            return grant_request
+        elif self._server_type == "platform":
+            self.token_url = (
+                self.base_url.rstrip("/") + "/" + self.token_path_uri.strip("/")
+            )
+            return {
+                "client_id": self.username,
+                "client_secret": self.password,
+                "grant_type": "client_credentials",
+                "scope": "xpmheadless",
+            }
+        else:
+            raise SecretServerError("Unknown server type for token request.")
+
+    def __init__(
+        self,
+        base_url,
+        username,
+        password,
+        token_path_uri=None,
+        domain=None,
+        session=None,
+        background_refresh=False,
+        token_cache=None,
+        server_type=None,
+        detection_timeout=None,
+        retry_policy=None,
+    ):
+        """
+        :param server_type: either ``"secret_server"`` or ``"platform"``; it
+                            is detected from the health check endpoints if
+                            it is ``None``
+        :type server_type: str
+        :param detection_timeout: the timeout, in seconds, of each health
+                                  check; defaults to
+                                  :attr:`DETECTION_TIMEOUT`
+        :type detection_timeout: float
+        :param background_refresh: whether to call
+                                   :meth:`start_background_refresh` with its
+                                   defaults on construction
+        :type background_refresh: bool
+        :param token_cache: shares access grants with other processes using
+                            the same credentials; grants are only kept in
+                            memory by default
+        :type token_cache: :class:`FileTokenCache`
+        :param retry_policy: retries ``token`` requests, and the REST API
+                             calls of servers using this authorizer, that
+                             fail transiently; calls are not retried by
+                             default
+        :type retry_policy: :class:`RetryPolicy`
+        """
+        self.base_url = base_url.rstrip("/")
+        self.session = session
+        self.retry_policy = retry_policy
+        self.username = username
+        self.password = password
+        self.domain = domain
+        self.token_path_uri = token_path_uri  # May be None, will decide in _refresh
+        self.token_url = None
+        self.grant_request = None
+        self.token_cache = token_cache
+        self.detection_timeout = detection_timeout
+        if server_type is not None:
+            self._set_server_type(server_type)
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._stop_refresher = threading.Event()
+        if background_refresh:
+            self.start_background_refresh()
+
+    def get_access_token(self):
+        self._refresh()
+        return self.access_grant["access_token"]
+
+    def start_background_refresh(
+        self,
+        refresh_ratio=0.75,
+        jitter=0.1,
+        min_backoff=1,
+        max_backoff=60,
+    ):
+        """Starts a daemon thread that gets the first grant straight away and
+        then renews it ahead of its expiry, so that REST API calls do not wait
+        for the ``token`` endpoint.
+
+        Each grant is renewed once a random fraction, between
+        `refresh_ratio` - `jitter` and `refresh_ratio`, of its usable lifetime
+        has passed, so that processes started together do not renew together.
+        The usable lifetime ends when REST API calls would refresh the grant
+        themselves: 5 minutes before it expires, or halfway through for grants
+        of 10 minutes or less. A grant that has been renewed meanwhile is not
+        renewed again. Failed attempts are retried with exponential backoff;
+        should the grant expire meanwhile, REST API calls refresh it as usual.
+
+        :param refresh_ratio: the latest fraction of the usable grant lifetime
+                              at which to renew it
+        :type refresh_ratio: float
+        :param jitter: the width of the random renewal window, as a fraction of
+                       the usable grant lifetime
+        :type jitter: float
+        :param min_backoff: the seconds to wait after the first failure
+        :type min_backoff: float
+        :param max_backoff: the most seconds to wait between attempts
+        :type max_backoff: float
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop_refresher.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_in_background,
+            args=(refresh_ratio, jitter, min_backoff, max_backoff),
+            name="PasswordGrantAuthorizer-refresh",
+            daemon=True,
+        )
+        self._refresher.start()
+
+    def stop_background_refresh(self):
+        """Stops the thread started by :meth:`start_background_refresh`"""
+        self._stop_refresher.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh_in_background(self, refresh_ratio, jitter, min_backoff, max_backoff):
+        backoff = min_backoff
+        delay = 0
+        refreshed = None
+        while not self._stop_refresher.wait(delay):
+            try:
+                self._refresh(force=refreshed is not None, refreshed=refreshed)
+            except Exception:
+                delay = random.uniform(backoff / 2, backoff)
+                backoff = min(backoff * 2, max_backoff)
+                continue
+            backoff = min_backoff
+            refreshed = self.access_grant_refreshed
+            expires_in = self.access_grant["expires_in"]
+            # The drift that get_access_token refreshes the grant ahead by
+            lifetime = expires_in - min(300, expires_in / 2)
+            age = (datetime.now() - refreshed).total_seconds()
+            delay = max(
+                lifetime * random.uniform(refresh_ratio - jitter, refresh_ratio) - age,
+                0,
+            )
+
+
+class DomainPasswordGrantAuthorizer(PasswordGrantAuthorizer):
+    """Allows domain access to be used to authorize REST API calls."""
+
+    def __init__(
+        self,
+        base_url,
+        username,
+        domain,
+        password,
+        token_path_uri=None,
+        session=None,
+        background_refresh=False,
+        token_cache=None,
+        server_type=None,
+        detection_timeout=None,
+        retry_policy=None,
+    ):
+        super().__init__(
+            base_url,
+            username,
+            password,
+            token_path_uri=token_path_uri,
+            domain=domain,
+            session=session,
+            background_refresh=background_refresh,
+            token_cache=token_cache,
+            server_type=server_type,
+            detection_timeout=detection_timeout,
+            retry_policy=retry_policy,
+        )
+
+
+class RetryPolicy:
+    """Retries idempotent REST API calls, i.e. ``GET`` and ``token`` requests,
+    that fail with a connection error or a :attr:`retry_statuses` response
+
+    Retries wait an exponentially increasing, jittered delay: `backoff`
+    seconds, doubled for each further attempt, up to `max_backoff` seconds,
+    then multiplied by a random factor between ``1 - jitter`` and
+    ``1 + jitter``. A ``Retry-After`` header takes precedence, although a
+    response that asks for a longer wait than `max_backoff` is not retried.
+
+    Every such failure also counts toward the circuit breaker of the host.
+    After `failure_threshold` consecutive failures the circuit opens, and
+    calls to the host fail fast with :class:`SecretServerCircuitOpenError`
+    for `reset_timeout` seconds. After that, one trial call is let through;
+    the circuit closes when it succeeds and opens again when it fails.
+
+    A policy may be shared by several clients, so that they share the circuit
+    breaker of each host.
+
+    Example:
+
+        authorizer = PasswordGrantAuthorizer(
+            base_url, username, password, retry_policy=RetryPolicy()
+        )
+        secret_server = SecretServer(base_url, authorizer)
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    class _CircuitBreaker:
+        def __init__(self, failure_threshold, reset_timeout):
+            self.failure_threshold = failure_threshold
+            self.reset_timeout = reset_timeout
+            self.failures = 0
+            self.opened = None
+            self.trial = False
+            self.lock = threading.Lock()
+
+        def before(self, host):
+            with self.lock:
+                if self.opened is None:
+                    return
+                if self.trial or time.monotonic() - self.opened < self.reset_timeout:
+                    raise SecretServerCircuitOpenError(
+                        f"The circuit breaker for {host} is open"
+                    )
+                self.trial = True
+
+        def succeeded(self):
+            with self.lock:
+                self.failures = 0
+                self.opened = None
+                self.trial = False
+
+        def abandoned(self):
+            with self.lock:
+                self.trial = False
+
+        def failed(self):
+            with self.lock:
+                self.failures += 1
+                self.trial = False
+                if self.failures >= self.failure_threshold:
+                    self.opened = time.monotonic()
+
+    def __init__(
+        self,
+        max_attempts=3,
+        backoff=0.5,
+        max_backoff=30,
+        jitter=0.5,
+        retry_statuses=RETRY_STATUSES,
+        failure_threshold=5,
+        reset_timeout=30,
+    ):
+        """
+        :param max_attempts: the maximum number of attempts per call,
+                             including the first one
+        :type max_attempts: int
+        :param backoff: the delay, in seconds, before the first retry
+        :type backoff: float
+        :param max_backoff: the maximum delay, in seconds, before a retry
+        :type max_backoff: float
+        :param jitter: the fraction by which delays are randomly varied
+        :type jitter: float
+        :param retry_statuses: the HTTP status codes that are retried
+        :type retry_statuses: tuple
+        :param failure_threshold: the number of consecutive failures that
+                                  opens the circuit of a host
+        :type failure_threshold: int
+        :param reset_timeout: the number of seconds the circuit stays open
+        :type reset_timeout: float
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = self._CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+        return host, breaker
+
+    @staticmethod
+    def _retry_after(response):
+        """Returns the number of seconds the ``Retry-After`` header of
+        `response` asks for, or ``None``
+        """
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _delay(self, breaker, attempt, response=None, error=None):
+        """Records the outcome of an attempt with `breaker` and returns the
+        number of seconds to wait before retrying, or ``None`` to stop
+        """
+        if error is None and response.status_code not in self.retry_statuses:
+            breaker.succeeded()
+            return None
+        breaker.failed()
+        if attempt >= self.max_attempts:
+            return None
+        delay = self._retry_after(response)
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        elif delay > self.max_backoff:
+            return None
+        # Do not wait for a retry that the deadline of the call leaves no
+        # time for
+        budget = _deadline.get()
+        if budget is not None and delay >= budget.expires - time.monotonic():
+            return None
+        return delay
+
+    def call(self, url, send, errors=(requests.ConnectionError, requests.Timeout)):
+        """Calls `send` until it returns a response that is not to be retried,
+        or the attempts run out
+
+        :param url: the URL that `send` calls
+        :type url: str
+        :param send: a function, taking no arguments, that makes the call and
+                     returns the response
+        :type send: callable
+        :param errors: the exceptions raised by `send` that are retried
+        :type errors: tuple
+        :return: the last response
+        :raise: :class:`SecretServerCircuitOpenError` when the circuit for
+                the host of `url` is open
+        """
+        host, breaker = self._breaker(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before(host)
+            try:
+                response, error = send(), None
+            except errors as err:
+                response, error = None, err
+            except BaseException:
+                breaker.abandoned()
+                raise
+            delay = self._delay(breaker, attempt, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    async def call_async(self, url, send, errors):
+        """Awaits `send` until it returns a response that is not to be
+        retried, or the attempts run out, as :meth:`call` does
+        """
+        host, breaker = self._breaker(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before(host)
+            try:
+                response, error = await send(), None
+            except errors as err:
+                response, error = None, err
+            except BaseException:
+                breaker.abandoned()
+                raise
+            delay = self._delay(breaker, attempt, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+
+
+@dataclass(frozen=True)
+class RequestEvent:
+    """A REST API call, as passed to the hooks of :class:`RequestMetrics`"""
+
+    endpoint: str
+    url: str
+    elapsed: float
+    status: int = None
+    size: int = 0
+    retry: bool = False
+    error: Exception = None
+
+
+class RequestMetrics:
+    """Counts the REST API calls made by the SDK, per endpoint, with their
+    retries, errors, response sizes and latencies
+
+    Every call is recorded in :data:`metrics` under one of the endpoints
+    ``token``, ``health``, ``vaultbroker``, ``secrets``, ``fields``,
+    ``folders`` and ``lookup``. A call is an error when it raises or returns
+    a ``4xx`` or ``5xx`` status, and a retry when a :class:`RetryPolicy`
+    repeats it. Calls that are not made because their :func:`deadline` has
+    passed are not recorded. Recording a call takes a lock and a few
+    additions, so it can be left on in production; set :attr:`enabled` to
+    ``False`` to stop it.
+
+    Hooks are called with a :class:`RequestEvent` after each call is
+    recorded, in the thread or task that made the call. Exceptions they
+    raise are ignored.
+
+    Example:
+
+        metrics.add_hook(lambda event: log.debug("%s", event))
+        ...
+        print(metrics.stats()["secrets"])
+    """
+
+    # The upper bounds, in seconds, of the latency histogram buckets
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    class _Counters:
+        __slots__ = (
+            "requests",
+            "retries",
+            "errors",
+            "bytes",
+            "seconds",
+            "slowest",
+            "buckets",
+            "statuses",
+        )
+
+        def __init__(self, buckets):
+            self.requests = self.retries = self.errors = self.bytes = 0
+            self.seconds = self.slowest = 0.0
+            self.buckets = [0] * buckets
+            self.statuses = {}
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS):
+        """
+        :param latency_buckets: the upper bounds, in seconds, of the latency
+                                histogram buckets
+        :type latency_buckets: tuple
+        """
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self.enabled = True
+        self._hooks = ()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """Calls `hook` with a :class:`RequestEvent` after every call"""
+        with self._lock:
+            self._hooks += (hook,)
+
+    def remove_hook(self, hook):
+        """Stops calling `hook`
+
+        :raise: :class:`ValueError` when `hook` was not added
+        """
+        with self._lock:
+            hooks = list(self._hooks)
+            hooks.remove(hook)
+            self._hooks = tuple(hooks)
+
+    def record(
+        self, endpoint, url, elapsed, status=None, size=0, retry=False, error=None
+    ):
+        """Records a call to `endpoint` that took `elapsed` seconds and either
+        returned `size` bytes with `status` or raised `error`
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            counters = self._endpoints.get(endpoint)
+            if counters is None:
+                counters = self._endpoints[endpoint] = self._Counters(
+                    len(self.latency_buckets) + 1
+                )
+            counters.requests += 1
+            counters.retries += retry
+            counters.errors += error is not None or status >= 400
+            counters.bytes += size
+            counters.seconds += elapsed
+            if elapsed > counters.slowest:
+                counters.slowest = elapsed
+            counters.buckets[bisect_left(self.latency_buckets, elapsed)] += 1
+            if status is not None:
+                counters.statuses[status] = counters.statuses.get(status, 0) + 1
+        hooks = self._hooks
+        if hooks:
+            event = RequestEvent(endpoint, url, elapsed, status, size, retry, error)
+            for hook in hooks:
+                try:
+                    hook(event)
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _size(response, stream=False):
+        """Returns the size of the body of `response`, from its
+        ``Content-Length`` header when it is streamed
+        """
+        if not stream:
+            return len(response.content)
+        try:
+            return int(response.headers.get("Content-Length") or 0)
+        except ValueError:
+            return 0
+
+    def instrument(self, endpoint, url, send, stream=False):
+        """Returns a function that calls `send` and records the call; calls
+        after the first one count as retries
+
+        :param endpoint: the endpoint to record the call under
+        :type endpoint: str
+        :param url: the URL that `send` calls
+        :type url: str
+        :param send: a function, taking no arguments, that makes the call and
+                     returns the response
+        :type send: callable
+        :param stream: whether the response body is streamed, in which case
+                       the latency is measured until the headers arrive
+        :type stream: bool
+        """
+        if not self.enabled:
+            return send
+        calls = count()
+
+        def instrumented():
+            retry = next(calls) > 0
+            start = time.perf_counter()
+            try:
+                response = send()
+            except SecretServerTimeoutError:
+                # The deadline had passed, so no call was made
+                raise
+            except Exception as error:
+                self.record(
+                    endpoint, url, time.perf_counter() - start, retry=retry, error=error
+                )
+                raise
+            self.record(
+                endpoint,
+                url,
+                time.perf_counter() - start,
+                response.status_code,
+                self._size(response, stream),
+                retry,
+            )
+            return response
+
+        return instrumented
+
+    def instrument_async(self, endpoint, url, send, stream=False):
+        """Returns a coroutine function that awaits `send` and records the
+        call, as :meth:`instrument` does
+        """
+        if not self.enabled:
+            return send
+        calls = count()
+
+        async def instrumented():
+            retry = next(calls) > 0
+            start = time.perf_counter()
+            try:
+                response = await send()
+            except SecretServerTimeoutError:
+                raise
+            except Exception as error:
+                self.record(
+                    endpoint, url, time.perf_counter() - start, retry=retry, error=error
+                )
+                raise
+            self.record(
+                endpoint,
+                url,
+                time.perf_counter() - start,
+                response.status_code,
+                self._size(response, stream),
+                retry,
+            )
+            return response
+
+        return instrumented
+
+    def stats(self):
+        """Returns a snapshot of the counters of each endpoint
+
+        Each endpoint maps to a ``dict`` with the number of ``requests``,
+        ``retries``, ``errors`` and response ``bytes``, the number of
+        responses per HTTP status in ``statuses``, and a ``latency``
+        histogram: the ``sum`` and ``max`` in seconds, and ``buckets`` that
+        map each of :attr:`latency_buckets`, and ``inf``, to the number of
+        calls that took at most that many seconds.
+
+        :rtype: ``dict``
+        """
+        bounds = self.latency_buckets + (float("inf"),)
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": counters.requests,
+                    "retries": counters.retries,
+                    "errors": counters.errors,
+                    "bytes": counters.bytes,
+                    "statuses": dict(counters.statuses),
+                    "latency": {
+                        "sum": counters.seconds,
+                        "max": counters.slowest,
+                        "buckets": dict(zip(bounds, accumulate(counters.buckets))),
+                    },
+                }
+                for endpoint, counters in self._endpoints.items()
+            }
+
+    def reset(self):
+        """Sets every counter back to zero"""
+        with self._lock:
+            self._endpoints = {}
+
+
+# Records every REST API call made by the SDK; see RequestMetrics
+metrics = RequestMetrics()
+
+
+class _SingleFlight:
+    """Runs at most one call per key at a time; callers that arrive while a
+    call for the same key is in progress wait for it and share its outcome
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """Returns the result of `function`, or raises its exception, calling
+        it unless a call for `key` is already in progress
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            # A caller with a deadline waits for the call no longer than it
+            budget = _deadline.get()
+            if not call.done.wait(None if budget is None else budget.remaining()):
+                raise SecretServerTimeoutError("The deadline of the call has passed")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _ChunkWriter:
+    """Writes chunks of ``bytes`` to a file path, a binary file object or a
+    writable buffer
+
+    A file path is written through a temporary file in the same directory,
+    which replaces it once every chunk is written, or is removed on error.
+    """
+
+    def __init__(self, dest):
+        self.written = 0
+        self._file = None
+        if isinstance(dest, (str, os.PathLike)):
+            self._path = os.fspath(dest)
+            directory, name = os.path.split(os.path.abspath(self._path))
+            fd, self._temp_path = tempfile.mkstemp(
+                prefix=f".{name}.", suffix=".part", dir=directory
+            )
+            dest = self._file = os.fdopen(fd, "wb")
+        if hasattr(dest, "write"):
+            self._write = dest.write
+        else:
+            self._buffer = memoryview(dest).cast("B")
+            self._write = self._write_buffer
+
+    def _write_buffer(self, chunk):
+        end = self.written + len(chunk)
+        if end > len(self._buffer):
+            raise ValueError(f"the buffer of {len(self._buffer)} bytes is too small")
+        self._buffer[self.written : end] = chunk
+
+    def write(self, chunk):
+        self._write(chunk)
+        self.written += len(chunk)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._file is None:
+            return
+        self._file.close()
+        if exc_type is None:
+            os.replace(self._temp_path, self._path)
+        else:
+            os.remove(self._temp_path)
+
+
+class SecretCache:
+    """A thread-safe, in-memory cache of secrets with a time-to-live (TTL) and
+    least-recently-used (LRU) eviction
+
+    Entries younger than :attr:`ttl` seconds are served from memory. Entries
+    older than that but younger than :attr:`ttl` + :attr:`stale_ttl` are
+    still served, while one of up to :attr:`REVALIDATE_WORKERS` background
+    threads fetches a fresh copy (*stale-while-revalidate*). Older entries
+    are fetched again. Values fetched while the cache is invalidated are
+    returned but not cached.
+
+    Example:
+
+        secret_server = SecretServer(base_url, authorizer, cache=SecretCache())
+    """
+
+    DEFAULT_MAX_ENTRIES = 1024
+    DEFAULT_TTL = 300
+    REVALIDATE_WORKERS = 4
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, stale_ttl=0):
+        """
+        :param max_entries: the maximum number of entries to keep
+        :type max_entries: int
+        :param ttl: the number of seconds an entry is fresh for
+        :type ttl: float
+        :param stale_ttl: the number of seconds after `ttl` that an entry is
+                          served while it is revalidated in the background
+        :type stale_ttl: float
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._revalidating = set()
+        self._revalidator = None
+        # Incremented on every removal, so that values loaded before one are
+        # not cached after it
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_load(self, key, load):
+        """Returns the value cached under `key`, calling `load` to get it when
+        there is no usable entry
+
+        :param key: the cache key
+        :type key: tuple
+        :param load: a function, taking no arguments, that fetches the value
+        :type load: callable
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored = entry
+                age = time.monotonic() - stored
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._revalidating:
+                        self._revalidating.add(key)
+                        if self._revalidator is None:
+                            self._revalidator = ThreadPoolExecutor(
+                                max_workers=self.REVALIDATE_WORKERS,
+                                thread_name_prefix="SecretCache",
+                            )
+                        self._revalidator.submit(
+                            self._revalidate, key, load, self._generation
+                        )
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            generation = self._generation
+        value = load()
+        self._set(key, value, generation)
+        return value
+
+    def get(self, key):
+        """Returns the value cached under `key` while it is fresh, or ``None``
+
+        :param key: the cache key
+        :type key: tuple
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def discard(self, key):
+        """Removes the entry cached under `key`, if there is one
+
+        :param key: the cache key
+        :type key: tuple
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def _revalidate(self, key, load, generation):
+        try:
+            self._set(key, load(), generation)
+        except Exception:
+            pass  # the stale entry expires as usual
+        finally:
+            with self._lock:
+                self._revalidating.discard(key)
+
+    def set(self, key, value):
+        """Caches `value` under `key`, evicting the least recently used entries
+        beyond :attr:`max_entries`
+        """
+        self._set(key, value)
+
+    def _set(self, key, value, generation=None):
+        """Caches `value` under `key` unless an entry has been removed since
+        `generation`
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, id=None, path=None):
+        """Removes the entries of the secret with the given `id` and/or `path`
+
+        :param id: the id of the secret
+        :type id: int
+        :param path: full path of the secret
+        :type path: str
+        """
+        if path is not None:
+            path = SecretServer._normalize_path(path)
+        with self._lock:
+            self._generation += 1
+            for key, (value, _) in list(self._entries.items()):
+                if (id is not None and key[0] == "id" and str(key[1]) == str(id)) or (
+                    id is not None and key[0] == "path" and str(value["id"]) == str(id)
+                ):
+                    del self._entries[key]
+                elif path is not None and key[0] == "path" and key[1] == path:
+                    del self._entries[key]
+
+    def clear(self):
+        """Removes every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        """Returns the cache counters
+
+        :return: the ``hits``, ``stale_hits``, ``misses``, ``evictions`` and
+                 current ``size``
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+
+class FolderIndex:
+    """An in-memory index of the folder tree, so that folder paths resolve to
+    ids, and subtrees are listed, without a round trip to the server
+
+    The index is built from the folder search endpoint, by
+    :meth:`SecretServer.get_folder_index`, and rebuilt once it is older than
+    :attr:`ttl` seconds. Paths are matched case-insensitively, in the
+    normalized ``\\Folder\\Child`` form.
+
+    Example:
+
+        secret_server = SecretServer(base_url, authorizer, folder_index=FolderIndex())
+        folder = secret_server.get_folder_by_path(r"\\Folder\\Child")
+    """
+
+    DEFAULT_TTL = 300
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        """
+        :param ttl: the number of seconds before the index is rebuilt
+        :type ttl: float
+        """
+        self.ttl = ttl
+        self.built = None
+        self._paths = {}
+        self._folders = {}
+        self._children = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._folders)
+
+    @property
+    def expired(self):
+        return self.built is None or time.monotonic() - self.built >= self.ttl
 
-    def __init__(self, base_url, username, password, token_path_uri=None, domain=None):
-        self.base_url = base_url.rstrip("/")
-        self.username = username
-        self.password = password
-        self.domain = domain
-        self.token_path_uri = token_path_uri  # May be None, will decide in _refresh
-        self.token_url = None
-        self.grant_request = None
+    @staticmethod
+    def _key(path):
+        return SecretServer._normalize_path(path).casefold()
 
-    def get_access_token(self):
-        self._refresh()
-        return self.access_grant["access_token"]
+    def update(self, folders):
+        """Replaces the contents of the index
 
+        :param folders: ``dict`` representations of every folder, each with
+                        at least ``id``, ``folderPath`` and ``parentFolderId``
+        :type folders: iterable
+        """
+        paths, folders_by_id, children = {}, {}, {}
+        for folder in folders:
+            folders_by_id[folder["id"]] = folder
+            paths[self._key(folder["folderPath"])] = folder["id"]
+            children.setdefault(folder["parentFolderId"], []).append(folder["id"])
+        # Swap the new maps in at once, so readers never see a partial index
+        with self._lock:
+            self._paths, self._folders, self._children = paths, folders_by_id, children
+            self.built = time.monotonic()
+
+    def add(self, folder):
+        """Adds or replaces a folder
+
+        :param folder: a ``dict`` representation of the folder, with at least
+                       ``id``, ``folderPath`` and ``parentFolderId``
+        :type folder: dict
+        """
+        with self._lock:
+            self.remove(folder["id"])
+            self._folders[folder["id"]] = folder
+            self._paths[self._key(folder["folderPath"])] = folder["id"]
+            self._children.setdefault(folder["parentFolderId"], []).append(folder["id"])
 
-class DomainPasswordGrantAuthorizer(PasswordGrantAuthorizer):
-    """Allows domain access to be used to authorize REST API calls."""
+    def remove(self, id):
+        """Removes a folder, if it is indexed
 
-    def __init__(
-        self,
-        base_url,
-        username,
-        domain,
-        password,
-        token_path_uri=None,
-    ):
-        super().__init__(
-            base_url, username, password, token_path_uri=token_path_uri, domain=domain
-        )
+        :param id: the id of the folder
+        :type id: int
+        """
+        with self._lock:
+            folder = self._folders.pop(id, None)
+            if folder is None:
+                return
+            self._paths.pop(self._key(folder["folderPath"]), None)
+            siblings = self._children.get(folder["parentFolderId"], [])
+            if id in siblings:
+                siblings.remove(id)
+
+    def clear(self):
+        """Empties the index, so that it is rebuilt on next use"""
+        with self._lock:
+            self._paths, self._folders, self._children = {}, {}, {}
+            self.built = None
+
+    def folder_id(self, path):
+        """Returns the id of the folder at `path`, or ``None``"""
+        key = self._key(path)
+        with self._lock:
+            return self._paths.get(key)
+
+    def folder(self, id):
+        """Returns the ``dict`` representation of the folder, or ``None``"""
+        with self._lock:
+            return self._folders.get(id)
+
+    def child_ids(self, id):
+        """Returns the ids of the folders directly in the folder"""
+        with self._lock:
+            return list(self._children.get(id, ()))
+
+    def subtree_ids(self, id):
+        """Returns the ids of the folder and every folder under it, breadth
+        first
+        """
+        with self._lock:
+            ids = [id]
+            for id in ids:
+                ids.extend(self._children.get(id, ()))
+            return ids
 
 
 class SecretServer:
@@ -356,6 +2397,18 @@ class SecretServer:
     """
 
     API_PATH_URI = "/api/v1"
+    DEFAULT_MAX_WORKERS = DEFAULT_POOL_MAXSIZE
+    MAX_ATTACHMENT_WORKERS = 4
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    VAULT_URL_TTL = 3600
+    DEFAULT_PAGE_SIZE = 500
+    SECRET_ID_CACHE_SIZE = 4096
+    SECRET_ID_TTL = 3600
+
+    # The vault URL, and when it was resolved, for each Platform URL, shared
+    # process-wide
+    _vault_urls = {}
+    _vault_url_resolutions = _SingleFlight()
 
     @staticmethod
     def process(response):
@@ -373,13 +2426,13 @@ class SecretServer:
             return response
         if response.status_code >= 400 and response.status_code < 500:
             try:
-                content = json.loads(response.content)
+                content = _loads(response.content)
                 if "message" in content:
                     message = content["message"]
                 elif "error" in content and isinstance(content["error"], str):
                     message = content["error"]
-            except json.JSONDecodeError as err:
-                message = err.msg
+            except ValueError as err:
+                message = getattr(err, "msg", str(err))
             raise SecretServerClientError(message, response)
         else:
             raise SecretServerServiceError(response)
@@ -393,6 +2446,10 @@ class SecretServer:
         base_url,
         authorizer: Authorizer,
         api_path_uri=API_PATH_URI,
+        session=None,
+        cache=None,
+        folder_index=None,
+        retry_policy=None,
     ):
         """
         :param base_url: The base URL e.g. ``http://localhost/SecretServer``
@@ -401,55 +2458,222 @@ class SecretServer:
         :type authorizer: Authorizer
         :param api_path_uri: Defaults to ``/api/v1``
         :type api_path_uri: str
+        :param session: the connection-pooled session to use; defaults to the
+                        session of the `authorizer`, see :func:`create_session`
+        :type session: :class:`~requests.Session`
+        :param cache: caches the secrets returned by :meth:`get_secret`,
+                      :meth:`get_secrets` and :meth:`get_secret_by_path`;
+                      secrets are not cached by default
+        :type cache: :class:`SecretCache`
+        :param folder_index: resolves the paths passed to
+                             :meth:`get_folder_by_path` locally; paths are
+                             sent to the server by default
+        :type folder_index: :class:`FolderIndex`
+        :param retry_policy: retries calls that fail transiently; defaults to
+                             the retry policy of the `authorizer`, if any
+        :type retry_policy: :class:`RetryPolicy`
         """
         self.base_url = base_url.rstrip("/")
         self.platform_url = self.base_url
         self.authorizer = authorizer
         self._api_path_uri = api_path_uri
+        if session is None:
+            session = getattr(authorizer, "session", None) or create_session()
+        self.session = session
+        self.cache = cache
+        self.folder_index = folder_index
+        if retry_policy is None:
+            retry_policy = getattr(authorizer, "retry_policy", None)
+        self.retry_policy = retry_policy
+        # Coalesces concurrent reads of the same secret
+        self._reads = _SingleFlight()
+        # The id, folder id and name of the secret at each resolved path
+        self._secret_ids = SecretCache(self.SECRET_ID_CACHE_SIZE, self.SECRET_ID_TTL)
 
     @property
     def api_url(self):
         return f"{self.base_url}/{self._api_path_uri.strip('/')}"
 
+    def _cached(self, key, load):
+        """Returns a copy of the secret cached under `key`, loading it with
+        `load` if necessary, or of the result of `load` when there is no cache
+
+        Concurrent loads of the same `key` are coalesced into one, whose
+        result, or exception, every caller shares.
+        """
+
+        def coalesced():
+            return self._reads.do(key, load)
+
+        if self.cache is None:
+            secret = coalesced()
+        else:
+            secret = self.cache.get_or_load(key, coalesced)
+        return self._copy_secret(secret)
+
+    @staticmethod
+    def _copy_secret(secret):
+        # Copy the parts of the secret callers are likely to modify
+        return {**secret, "items": [dict(item) for item in secret["items"]]}
+
+    def invalidate_cache(self, id=None, path=None):
+        """Removes a secret from the cache so that it is fetched again, and
+        forgets the id that its `path` resolved to
+
+        :param id: the id of the secret
+        :type id: int
+        :param path: full path of the secret
+        :type path: str
+        """
+        if self.cache is not None:
+            self.cache.invalidate(id=id, path=path)
+        if path is not None:
+            self._secret_ids.discard(("path", self._normalize_path(path).casefold()))
+
+    def _is_platform(self):
+        return getattr(self.authorizer, "_server_type", None) == "platform"
+
     def ensure_vault_url(self):
-        """For platform, fetch and set the vault URL before making API calls."""
+        """For platform, fetch and set the vault URL before making API calls.
+
+        Vault URLs are shared by every :class:`SecretServer` in the process
+        for :attr:`VAULT_URL_TTL` seconds, and only one of them resolves the
+        vault URL of a given Platform at a time.
+        """
         # Only needed for platform scenario
-        if (
-            hasattr(self.authorizer, "_server_type")
-            and self.authorizer._server_type == "platform"
-        ):
-            if not hasattr(self, "_vault_url_fetched") or not self._vault_url_fetched:
-                access_token = self.authorizer.get_access_token()
-                vaults_endpoint = self.platform_url + "/vaultbroker/api/vaults"
-                headers = {"Authorization": f"Bearer {access_token}"}
-                resp = requests.get(vaults_endpoint, headers=headers, timeout=60)
-                if resp.status_code != 200:
-                    raise SecretServerError(
-                        f"Failed to fetch vault details: HTTP {resp.status_code} - {resp.text}"
-                    )
-                try:
-                    data = resp.json()
-                except Exception as ex:
-                    raise SecretServerError(f"Failed to parse vault details: {ex}")
-                for vault in data.get("vaults", []):
-                    if vault.get("isDefault") and vault.get("isActive"):
-                        conn = vault.get("connection", {})
-                        url = conn.get("url")
-                        if url:
-                            self.base_url = url.rstrip("/")
-                            self._vault_url_fetched = True
-                            return
-                raise SecretServerError(
-                    "No configured default and active vault found in vault details."
-                )
+        if not self._is_platform():
+            return
+        entry = SecretServer._vault_urls.get(self.platform_url)
+        if entry is None or time.monotonic() - entry[1] >= self.VAULT_URL_TTL:
+            entry = SecretServer._vault_url_resolutions.do(
+                self.platform_url, self._resolve_vault_url
+            )
+        self.base_url = entry[0]
+
+    def _resolve_vault_url(self):
+        access_token = self.authorizer.get_access_token()
+        vaults_endpoint = self.platform_url + "/vaultbroker/api/vaults"
+        headers = {"Authorization": f"Bearer {access_token}"}
+        resp = metrics.instrument(
+            "vaultbroker",
+            vaults_endpoint,
+            lambda: self.session.get(
+                vaults_endpoint, headers=headers, timeout=_timeouts()
+            ),
+        )()
+        if resp.status_code != 200:
+            raise SecretServerError(
+                f"Failed to fetch vault details: HTTP {resp.status_code} - {resp.text}"
+            )
+        try:
+            data = _loads(resp.content)
+        except Exception as ex:
+            raise SecretServerError(f"Failed to parse vault details: {ex}")
+        entry = (self._default_vault_url(data), time.monotonic())
+        SecretServer._vault_urls[self.platform_url] = entry
+        return entry
+
+    def _forget_vault_url(self):
+        """Forgets the vault URL in use so that it is resolved again
+
+        :return: whether there was a vault URL to forget
+        :rtype: bool
+        """
+        if not self._is_platform():
+            return False
+        entry = SecretServer._vault_urls.get(self.platform_url)
+        if entry is not None and entry[0] == self.base_url:
+            SecretServer._vault_urls.pop(self.platform_url, None)
+        return True
+
+    def _api_get(
+        self,
+        path,
+        headers,
+        query_params=None,
+        timeout=DEFAULT_READ_TIMEOUT,
+        stream=False,
+    ):
+        """Calls the REST API at `path`, relative to :attr:`api_url`
+
+        When a Platform vault cannot be reached, or fails with a service
+        error, its URL is resolved again and the call is retried once, unless
+        the circuit breaker rejected the call.
+
+        :return: the response if the call was successful
+        :rtype: :class:`~requests.Response`
+        """
+        try:
+            return self.process(
+                self._send_get(path, headers, query_params, timeout, stream)
+            )
+        except SecretServerCircuitOpenError:
+            raise
+        except (requests.ConnectionError, SecretServerServiceError):
+            if not self._forget_vault_url():
+                raise
+        self.ensure_vault_url()
+        return self.process(
+            self._send_get(path, headers, query_params, timeout, stream)
+        )
+
+    def _send_get(self, path, headers, query_params, timeout, stream):
+        url = f"{self.api_url}/{path}"
+
+        def send():
+            return self.session.get(
+                url,
+                params=query_params,
+                headers=headers,
+                timeout=_timeouts(timeout),
+                stream=stream,
+            )
+
+        send = metrics.instrument(self._endpoint(path), url, send, stream)
+        if self.retry_policy is None:
+            return send()
+        return self.retry_policy.call(url, send)
+
+    @staticmethod
+    def _endpoint(path):
+        """Returns the endpoint that `path` is recorded under in :data:`metrics`"""
+        if "/fields/" in path:
+            return "fields"
+        if path.startswith("folders/lookup"):
+            return "lookup"
+        return path.split("/", 1)[0]
+
+    @staticmethod
+    def _default_vault_url(vault_details):
+        """Returns the URL of the default, active vault in the vault details
+
+        :raise: :class:`SecretServerError` when there is no such vault
+        """
+        for vault in vault_details.get("vaults", []):
+            if vault.get("isDefault") and vault.get("isActive"):
+                conn = vault.get("connection", {})
+                url = conn.get("url")
+                if url:
+                    return url.rstrip("/")
+        raise SecretServerError(
+            "No configured default and active vault found in vault details."
+        )
+
+    @staticmethod
+    def _normalize_path(path):
+        """Normalizes a secret or folder path to the ``\\Folder\\Name`` form"""
+        return "\\" + re.sub(r"[\\/]+", r"\\", path).lstrip("\\").rstrip("\\")
 
-    def get_secret_json(self, id, query_params=None):
+    def get_secret_json(self, id, query_params=None, timeout=None):
         """Gets a Secret from Secret Server
 
         :param id: the id of the secret
         :type id: int
         :param query_params: query parameters to pass to the endpoint
         :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a JSON formatted string representation of the secret
         :rtype: ``str``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -457,31 +2681,34 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
-        headers = self.headers()
-        self.ensure_vault_url()
-        endpoint_url = f"{self.api_url}/secrets/{id}"
+        with deadline(timeout):
+            headers = self.headers()
+            self.ensure_vault_url()
+            return self._get_secret_json(id, headers, query_params)
 
-        if query_params is None:
-            return self.process(
-                requests.get(endpoint_url, headers=headers, timeout=60)
-            ).text
-        else:
-            return self.process(
-                requests.get(
-                    endpoint_url,
-                    params=query_params,
-                    headers=headers,
-                    timeout=60,
-                )
-            ).text
+    def _get_secret_json(self, id, headers, query_params=None):
+        return self._api_get(f"secrets/{id}", headers, query_params).text
 
-    def get_folder_json(self, id, query_params=None, get_all_children=True):
+    @staticmethod
+    def _parse(response):
+        """Parses a response, in one pass over its bytes"""
+        try:
+            return _loads(response.content)
+        except ValueError:
+            raise SecretServerError(response.text)
+
+    def get_folder_json(
+        self, id, query_params=None, get_all_children=True, timeout=None
+    ):
         """Gets a Folder from Secret Server
 
         :param id: the id of the folder
         :type id: int
         :param query_params: query parameters to pass to the endpoint
         :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a JSON formatted string representation of the folder
         :rtype: ``str``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -489,35 +2716,40 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
+        with deadline(timeout):
+            return self._get_folder_response(id, query_params, get_all_children).text
+
+    def _get_folder_response(self, id, query_params=None, get_all_children=True):
         headers = self.headers()
         self.ensure_vault_url()
-        endpoint_url = f"{self.api_url}/folders/{id}"
 
         if get_all_children:
-            query_params["getAllChildren"] = "true"
+            query_params = {**(query_params or {}), "getAllChildren": "true"}
 
-        if query_params is None:
-            return self.process(requests.get(endpoint_url, headers=headers)).text
-        else:
-            return self.process(
-                requests.get(
-                    endpoint_url,
-                    params=query_params,
-                    headers=headers,
-                )
-            ).text
+        return self._api_get(
+            f"folders/{id}", headers, query_params, timeout=_folder_read_timeout()
+        )
 
-    def get_secret(self, id, fetch_file_attachments=True, query_params=None):
+    def get_secret(
+        self, id, fetch_file_attachments=True, query_params=None, timeout=None
+    ):
         """Gets a secret
 
         :param id: the id of the secret
         :type id: int
         :param fetch_file_attachments: whether or not to fetch file attachments
                                        and replace itemValue with the contents
-                                       for each item (field), automatically
+                                       for each item (field), automatically;
+                                       up to :attr:`MAX_ATTACHMENT_WORKERS`
+                                       are fetched at once. The contents are
+                                       ``str`` for textual content types and
+                                       ``bytes`` otherwise.
         :type fetch_file_attachments: bool
         :param query_params: query parameters to pass to the endpoint
         :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a ``dict`` representation of the secret
         :rtype: ``dict``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -525,36 +2757,208 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
+        with deadline(timeout):
+            if query_params is not None:
+                return self._fetch_secret(id, fetch_file_attachments, query_params)
+            return self._cached(
+                ("id", id, fetch_file_attachments),
+                lambda: self._fetch_secret(id, fetch_file_attachments),
+            )
 
-        response = self.get_secret_json(id, query_params=query_params)
+    def _fetch_secret(self, id, fetch_file_attachments=True, query_params=None):
+        headers = self.headers()
+        self.ensure_vault_url()
+        return self._get_secret(id, headers, fetch_file_attachments, query_params)
 
-        try:
-            secret = json.loads(response)
-        except json.JSONDecodeError:
-            raise SecretServerError(response)
+    def _get_secret(
+        self,
+        id,
+        headers,
+        fetch_file_attachments=True,
+        query_params=None,
+        attachment_workers=None,
+    ):
+        """Gets a secret, fetching up to `attachment_workers`, by default
+        :attr:`MAX_ATTACHMENT_WORKERS`, of its file attachments at once
+        """
+        secret = self._parse(self._api_get(f"secrets/{id}", headers, query_params))
+        if attachment_workers is None:
+            attachment_workers = self.MAX_ATTACHMENT_WORKERS
 
         if fetch_file_attachments:
-            for item in secret["items"]:
-                if item["fileAttachmentId"]:
-                    endpoint_url = f"{self.api_url}/secrets/{id}/fields/{item['slug']}"
-                    if query_params is None:
-                        item["itemValue"] = self.process(
-                            requests.get(
-                                endpoint_url, headers=self.headers(), timeout=60
-                            )
-                        )
-                    else:
-                        item["itemValue"] = self.process(
-                            requests.get(
-                                endpoint_url,
-                                params=query_params,
-                                headers=self.headers(),
-                                timeout=60,
-                            )
+            attachments = [item for item in secret["items"] if item["fileAttachmentId"]]
+
+            def fetch(item):
+                item["itemValue"] = self._attachment_value(
+                    self._api_get(
+                        f"secrets/{id}/fields/{item['slug']}", headers, query_params
+                    )
+                )
+
+            if len(attachments) > 1 and attachment_workers > 1:
+                with ThreadPoolExecutor(
+                    max_workers=min(len(attachments), attachment_workers)
+                ) as executor:
+                    # list() re-raises the first failure, if any
+                    list(
+                        executor.map(
+                            _with_deadline(fetch, _deadline.get()), attachments
                         )
+                    )
+            else:
+                for item in attachments:
+                    fetch(item)
         return secret
 
-    def get_folder(self, id, query_params=None, get_all_children=False):
+    def get_secret_field(self, id, slug, query_params=None, timeout=None):
+        """Gets the contents of a secret field, typically a file attachment
+
+        :param id: the id of the secret
+        :type id: int
+        :param slug: the slug of the field
+        :type slug: str
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: the contents, as ``str`` when the server declares a textual
+                 content type and as ``bytes`` otherwise
+        :rtype: ``str`` or ``bytes``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        with deadline(timeout):
+            headers = self.headers()
+            self.ensure_vault_url()
+            return self._attachment_value(
+                self._api_get(f"secrets/{id}/fields/{slug}", headers, query_params)
+            )
+
+    @staticmethod
+    def _attachment_value(response):
+        """Returns the content of a file attachment response: ``str`` when the
+        server declares a textual content type and ``bytes`` otherwise
+        """
+        content_type = response.headers.get("Content-Type", "").lower()
+        if content_type.startswith("text/") or any(
+            subtype in content_type for subtype in ("json", "xml")
+        ):
+            return response.text
+        return response.content
+
+    def download_secret_field(
+        self,
+        id,
+        slug,
+        dest,
+        chunk_size=DOWNLOAD_CHUNK_SIZE,
+        query_params=None,
+        timeout=None,
+    ):
+        """Streams the contents of a secret field, typically a file attachment,
+        to `dest` without holding more than `chunk_size` bytes in memory
+
+        :param id: the id of the secret
+        :type id: int
+        :param slug: the slug of the field
+        :type slug: str
+        :param dest: a file path, a binary file object or a writable buffer
+                     such as a ``bytearray``, large enough for the contents;
+                     a file path is only replaced once the download is
+                     complete
+        :type dest: str, :class:`os.PathLike`, file object or buffer
+        :param chunk_size: the number of bytes to read at a time
+        :type chunk_size: int
+        :param query_params: query parameters to pass to the endpoint
+        :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: the number of bytes written
+        :rtype: ``int``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        :raise: :class:`ValueError` when `dest` is a buffer that is too small
+        """
+        with deadline(timeout):
+            headers = self.headers()
+            self.ensure_vault_url()
+            response = self._api_get(
+                f"secrets/{id}/fields/{slug}", headers, query_params, stream=True
+            )
+            budget = _deadline.get()
+            try:
+                with _ChunkWriter(dest) as writer:
+                    for chunk in response.iter_content(chunk_size):
+                        if budget is not None:
+                            budget.remaining()
+                        writer.write(chunk)
+                return writer.written
+            finally:
+                response.close()
+
+    def get_secrets(
+        self, ids, fetch_file_attachments=True, max_workers=None, timeout=None
+    ):
+        """Gets several secrets concurrently
+
+        The access token and, for Platform, the vault URL are resolved once
+        for the whole batch. A failure to fetch one secret does not affect
+        the others; the error raised is returned in place of that secret.
+        The file attachments of each secret are fetched one after the other
+        by the thread that fetched the secret, so that no more than
+        `max_workers` requests are made at once.
+
+        :param ids: the ids of the secrets
+        :type ids: iterable
+        :param fetch_file_attachments: whether or not to fetch file attachments
+                                       and replace itemValue with the contents
+                                       for each item (field), automatically
+        :type fetch_file_attachments: bool
+        :param max_workers: the maximum number of requests made at once;
+                            defaults to :attr:`DEFAULT_MAX_WORKERS`. It should
+                            not exceed the connection pool size of the session.
+        :type max_workers: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: a ``list`` containing, in the order of `ids`, either the
+                 ``dict`` representation of each secret or the
+                 :class:`SecretServerError` raised when fetching it
+        :rtype: ``list``
+        :raise: :class:`SecretServerError` when the access token or the vault
+                URL cannot be obtained
+        """
+        with deadline(timeout):
+            headers = self.headers()
+            self.ensure_vault_url()
+
+            def get_secret(id):
+                try:
+                    return self._cached(
+                        ("id", id, fetch_file_attachments),
+                        lambda: self._get_secret(
+                            id, headers, fetch_file_attachments, attachment_workers=1
+                        ),
+                    )
+                except SecretServerError as err:
+                    return err
+                except requests.RequestException as err:
+                    return SecretServerError(str(err), getattr(err, "response", None))
+
+            with ThreadPoolExecutor(
+                max_workers=max_workers or self.DEFAULT_MAX_WORKERS
+            ) as executor:
+                return list(
+                    executor.map(_with_deadline(get_secret, _deadline.get()), ids)
+                )
+
+    def get_folder(self, id, query_params=None, get_all_children=False, timeout=None):
         """Gets a folder
 
         :param id: the id of the folder
@@ -563,6 +2967,9 @@ class SecretServer:
         :type fetch_file_attachments: bool
         :param query_params: query parameters to pass to the endpoint
         :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a ``dict`` representation of the folder
         :rtype: ``dict``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -570,19 +2977,14 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
+        with deadline(timeout):
+            return self._parse(
+                self._get_folder_response(id, query_params, get_all_children)
+            )
 
-        response = self.get_folder_json(
-            id, query_params=query_params, get_all_children=get_all_children
-        )
-
-        try:
-            folder = json.loads(response)
-        except json.JSONDecodeError:
-            raise SecretServerError(response)
-
-        return folder
-
-    def get_secret_by_path(self, secret_path, fetch_file_attachments=True):
+    def get_secret_by_path(
+        self, secret_path, fetch_file_attachments=True, timeout=None
+    ):
         """Gets a secret by path
 
         :param secret_path: full path of the secret
@@ -591,40 +2993,135 @@ class SecretServer:
                                        and replace itemValue with the contents
                                        for each item (field), automatically
         :type fetch_file_attachments: bool
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a ``dict`` representation of the secret
         :rtype: ``dict``
         """
-        path = "\\" + re.sub(r"[\\/]+", r"\\", secret_path).lstrip("\\").rstrip("\\")
+        path = self._normalize_path(secret_path)
+        with deadline(timeout):
+            return self._cached(
+                ("path", path, fetch_file_attachments),
+                lambda: self._fetch_secret_by_path(path, fetch_file_attachments),
+            )
 
-        params = {"secretPath": path}
-        return self.get_secret(
-            id=0,
-            fetch_file_attachments=fetch_file_attachments,
-            query_params=params,
+    def _fetch_secret_by_path(self, path, fetch_file_attachments=True):
+        # Paths the server has already resolved are fetched by id, as long as
+        # the secret is still where the path says it is
+        key = ("path", path.casefold())
+        resolved = self._secret_ids.get(key)
+        if resolved is not None:
+            id, folder_id, name = resolved
+            try:
+                secret = self._fetch_secret(id, fetch_file_attachments)
+            except SecretServerClientError:
+                secret = None
+            if secret is not None and self._resolves_to(path, secret, folder_id):
+                return secret
+            self._secret_ids.discard(key)
+
+        secret = self._fetch_secret(
+            0, fetch_file_attachments, query_params={"secretPath": path}
+        )
+        self._secret_ids.set(key, (secret["id"], secret["folderId"], secret["name"]))
+        return secret
+
+    @staticmethod
+    def _resolves_to(path, secret, folder_id):
+        """Returns whether `secret` still has the name at the end of `path`,
+        in the folder it was in when `path` was resolved
+        """
+        name = path.rsplit("\\", 1)[-1]
+        return (
+            secret["name"].casefold() == name.casefold()
+            and secret["folderId"] == folder_id
         )
 
-    def get_folder_by_path(self, folder_path, get_all_children=True):
+    def get_folder_by_path(self, folder_path, get_all_children=True, timeout=None):
         """Gets a folder by path
 
+        With a :attr:`folder_index`, the path is resolved to an id locally.
+        Unless `get_all_children` is true, the indexed folder is then
+        returned without calling the server, so it can be up to
+        :attr:`FolderIndex.ttl` seconds old.
+
         :param folder_path: full path of the folder
         :type folder_path: str
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a ``dict`` representation of the folder
         :rtype: ``dict``
         """
-        path = "\\" + re.sub(r"[\\/]+", r"\\", folder_path).lstrip("\\").rstrip("\\")
-
-        params = {"folderPath": path}
-        return self.get_folder(
-            id=0,
-            get_all_children=get_all_children,
-            query_params=params,
-        )
+        path = self._normalize_path(folder_path)
+        with deadline(timeout):
+            if self.folder_index is not None:
+                index = self.get_folder_index()
+                id = index.folder_id(path)
+                folder = None if id is None else index.folder(id)
+                if folder is not None and not get_all_children:
+                    return dict(folder)
+                if id is not None:
+                    try:
+                        folder = self.get_folder(id, get_all_children=get_all_children)
+                    except SecretServerClientError:
+                        # The folder was deleted since the index was built
+                        index.remove(id)
+                    else:
+                        if index._key(folder["folderPath"]) == index._key(path):
+                            return folder
+                        # The folder was moved or renamed since the index was
+                        # built, so another one may be at path now
+                        index.add(folder)
+
+            params = {"folderPath": path}
+            folder = self.get_folder(
+                id=0,
+                get_all_children=get_all_children,
+                query_params=params,
+            )
+            if self.folder_index is not None:
+                self.folder_index.add(folder)
+            return folder
+
+    def get_folder_index(self, timeout=None):
+        """Returns the :attr:`folder_index`, after building it if it is empty
+        or older than its ``ttl``
+
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: the folder index
+        :rtype: :class:`FolderIndex`
+        :raise: :class:`ValueError` when the server has no folder index
+        :raise: :class:`SecretServerError` when the REST API call fails
+        """
+        with deadline(timeout):
+            index = self.folder_index
+            if index is None:
+                raise ValueError("folder_index is not set")
+            if index.expired:
+                with index._lock:
+                    if index.expired:
+                        index.update(
+                            self._iter_pages(
+                                "folders",
+                                None,
+                                self.DEFAULT_PAGE_SIZE,
+                                _deadline.get(),
+                            )
+                        )
+            return index
 
-    def search_secrets(self, query_params=None):
+    def search_secrets(self, query_params=None, timeout=None):
         """Get Secrets from Secret Server
 
         :param query_params: query parameters to pass to the endpoint
         :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a JSON formatted string representation of the secrets
         :rtype: ``str``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -632,29 +3129,19 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
-        headers = self.headers()
-        self.ensure_vault_url()
-        endpoint_url = f"{self.api_url}/secrets"
+        with deadline(timeout):
+            headers = self.headers()
+            self.ensure_vault_url()
+            return self._api_get("secrets", headers, query_params).text
 
-        if query_params is None:
-            return self.process(
-                requests.get(endpoint_url, headers=headers, timeout=60)
-            ).text
-        else:
-            return self.process(
-                requests.get(
-                    endpoint_url,
-                    params=query_params,
-                    headers=headers,
-                    timeout=60,
-                )
-            ).text
-
-    def lookup_folders(self, query_params=None):
+    def lookup_folders(self, query_params=None, timeout=None):
         """Lookup Folders from Secret Server
 
         :param query_params: query parameters to pass to the endpoint
         :type query_params: dict
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a JSON formatted string representation of the folders, containing only id and name
         :rtype: ``str``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -662,26 +3149,123 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
+        with deadline(timeout):
+            headers = self.headers()
+            self.ensure_vault_url()
+            return self._api_get(
+                "folders/lookup",
+                headers,
+                query_params,
+                timeout=_folder_read_timeout(),
+            ).text
+
+    def iter_secrets(
+        self, query_params=None, page_size=DEFAULT_PAGE_SIZE, timeout=None
+    ):
+        """Iterates over the Secrets that match `query_params`, one page of
+        `page_size` records at a time, fetching the next page in the background
+        while the current one is consumed
+
+        :param query_params: query parameters to pass to the endpoint, other
+                             than ``take``
+        :type query_params: dict
+        :param page_size: the number of records to get per request
+        :type page_size: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: an iterator over the records, each a ``dict``
+        :rtype: ``Iterator[dict]``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        return self._iter_pages(
+            "secrets", query_params, page_size, _current_deadline(timeout)
+        )
+
+    def iter_folders(
+        self, query_params=None, page_size=DEFAULT_PAGE_SIZE, timeout=None
+    ):
+        """Iterates over the Folders that match `query_params` using the lookup
+        endpoint, one page of `page_size` records at a time, fetching the next
+        page in the background while the current one is consumed
+
+        :param query_params: query parameters to pass to the endpoint, other
+                             than ``take``
+        :type query_params: dict
+        :param page_size: the number of records to get per request
+        :type page_size: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: an iterator over the records, each a ``dict`` containing only
+                 id and value (the name)
+        :rtype: ``Iterator[dict]``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access the secret
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        return self._iter_pages(
+            "folders/lookup", query_params, page_size, _current_deadline(timeout)
+        )
+
+    def _get_page(self, path, query_params):
         headers = self.headers()
         self.ensure_vault_url()
-        endpoint_url = f"{self.api_url}/folders/lookup"
-
-        if query_params is None:
-            return self.process(requests.get(endpoint_url, headers=headers)).text
+        if path.startswith("folders"):
+            timeout = _folder_read_timeout()
         else:
-            return self.process(
-                requests.get(
-                    endpoint_url,
-                    params=query_params,
-                    headers=headers,
-                )
-            ).text
+            timeout = DEFAULT_READ_TIMEOUT
+        return self._parse(self._api_get(path, headers, query_params, timeout))
 
-    def get_secret_ids_by_folderid(self, folder_id):
+    def _iter_pages(self, path, query_params, page_size, budget=None):
+        """Iterates over the records of every page, each fetched under the
+        `budget` deadline
+        """
+        params = dict(query_params or {}, take=page_size)
+        skip = int(params.pop("skip", 0))
+        get_page = _with_deadline(self._get_page, budget)
+        executor = ThreadPoolExecutor(max_workers=1)
+        page = executor.submit(get_page, path, dict(params, skip=skip))
+        try:
+            while page is not None:
+                result = page.result()
+                records = result.get("records") or []
+                skip += len(records)
+                page = None
+                if records and result.get("hasNext", len(records) == page_size):
+                    page = executor.submit(get_page, path, dict(params, skip=skip))
+                yield from records
+        finally:
+            # When the caller stops early, the prefetched page is discarded
+            if page is not None:
+                page.cancel()
+            executor.shutdown(wait=False)
+
+    def _list_pages(self, path, query_params, page_size=DEFAULT_PAGE_SIZE):
+        """Returns the records of every page, fetched one after the other in
+        the calling thread, for callers that already run concurrently
+        """
+        params = dict(query_params, take=page_size)
+        records = []
+        while True:
+            result = self._get_page(path, dict(params, skip=len(records)))
+            page = result.get("records") or []
+            records += page
+            if not page or not result.get("hasNext", len(page) == page_size):
+                return records
+
+    def get_secret_ids_by_folderid(self, folder_id, timeout=None):
         """Gets a list of secrets ids by folder_id
 
         :param folder_id: the id of the folder
         :type id: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a ``list`` of the secret id's
         :rtype: ``list``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -689,30 +3273,19 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
-        headers = self.headers()
-        self.ensure_vault_url()
-        params = {"filter.folderId": folder_id}
-        endpoint_url = f"{self.api_url}/secrets/search-total"
-        params["take"] = self.process(
-            requests.get(endpoint_url, params=params, headers=headers, timeout=60)
-        ).text
-        response = self.search_secrets(query_params=params)
+        with deadline(timeout):
+            return [
+                secret["id"]
+                for secret in self.iter_secrets({"filter.folderId": folder_id})
+            ]
 
-        try:
-            secrets = json.loads(response)
-        except json.JSONDecodeError:
-            raise SecretServerError(response)
-
-        secret_ids = []
-        for secret in secrets["records"]:
-            secret_ids.append(secret["id"])
-
-        return secret_ids
-
-    def get_child_folder_ids_by_folderid(self, folder_id):
+    def get_child_folder_ids_by_folderid(self, folder_id, timeout=None):
         """Gets a list of child folder ids by folder_id
         :param folder_id: the id of the folder
         :type id: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
         :return: a ``list`` of the child folder id's
         :rtype: ``list``
         :raise: :class:`SecretServerAccessError` when the caller does not have
@@ -720,34 +3293,82 @@ class SecretServer:
         :raise: :class:`SecretServerError` when the REST API call fails for
                 any other reason
         """
-        headers = self.headers()
-        self.ensure_vault_url()
-        params = {
-            "filter.parentFolderId": folder_id,
-            "filter.limitToDirectDescendents": True,
-        }
-        params["take"] = 1
-        endpoint_url = f"{self.api_url}/folders/lookup"
-
-        params["take"] = self.process(
-            requests.get(endpoint_url, params=params, headers=headers)
-        ).json()["total"]
-        # Handle result of zero child folders
-        if params["take"] != 0:
-            response = self.lookup_folders(query_params=params)
-
-            try:
-                response = json.loads(response)
-            except json.JSONDecodeError:
-                raise SecretServerError(response)
+        with deadline(timeout):
+            params = {
+                "filter.parentFolderId": folder_id,
+                "filter.limitToDirectDescendents": True,
+            }
+            return [folder["id"] for folder in self.iter_folders(params)]
+
+    def walk_folder(self, folder, max_workers=None, timeout=None):
+        """Walks the folder tree under `folder`, breadth first, listing up to
+        `max_workers` folders at a time, and yields each folder's id along with
+        the ids of the secrets directly in it, as soon as they are known
+
+        The order of the results is not defined.
+
+        :param folder: the id or the full path of the folder to walk
+        :type folder: int or str
+        :param max_workers: the maximum number of folders to list concurrently,
+                            :attr:`DEFAULT_MAX_WORKERS` by default
+        :type max_workers: int
+        :param timeout: the number of seconds that the REST API calls this
+                        makes may take in total; see :func:`deadline`
+        :type timeout: float
+        :return: an iterator of ``(folder_id, secret_ids)`` tuples
+        :rtype: ``Iterator[tuple[int, list]]``
+        :raise: :class:`SecretServerAccessError` when the caller does not have
+                permission to access a folder
+        :raise: :class:`SecretServerError` when the REST API call fails for
+                any other reason
+        """
+        # Like iter_secrets, the deadline starts now, not on the first
+        # iteration
+        return self._walk_folder(folder, max_workers, _current_deadline(timeout))
+
+    def _walk_folder(self, folder, max_workers, budget):
+        if isinstance(folder, str):
+            folder = _with_deadline(self.get_folder_by_path, budget)(
+                folder, get_all_children=False
+            )["id"]
+
+        def list_folder(folder_id):
+            # The pages of each folder are fetched in this worker, rather
+            # than prefetched by an executor of their own
+            child_folders = self._list_pages(
+                "folders/lookup",
+                {
+                    "filter.parentFolderId": folder_id,
+                    "filter.limitToDirectDescendents": True,
+                },
+            )
+            secrets = self._list_pages("secrets", {"filter.folderId": folder_id})
+            return (
+                folder_id,
+                [child_folder["id"] for child_folder in child_folders],
+                [secret["id"] for secret in secrets],
+            )
 
-            child_folder_ids = []
-            for childFolder in response["records"]:
-                child_folder_ids.append(childFolder["id"])
+        list_folder = _with_deadline(list_folder, budget)
 
-            return child_folder_ids
-        else:
-            return []
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.DEFAULT_MAX_WORKERS
+        )
+        pending = {executor.submit(list_folder, folder)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder_id, child_folder_ids, secret_ids = future.result()
+                    pending.update(
+                        executor.submit(list_folder, child_folder_id)
+                        for child_folder_id in child_folder_ids
+                    )
+                    yield folder_id, secret_ids
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
 
 class SecretServerV0(SecretServer):
@@ -768,11 +3389,15 @@ class SecretServerV0(SecretServer):
         password,
         api_path_uri=SecretServer.API_PATH_URI,
         token_path_uri=None,
+        session=None,
     ):
         super().__init__(
             base_url,
-            PasswordGrantAuthorizer(f"{base_url}", username, password, token_path_uri),
+            PasswordGrantAuthorizer(
+                f"{base_url}", username, password, token_path_uri, session=session
+            ),
             api_path_uri,
+            session=session,
         )
 
 
@@ -790,7 +3415,14 @@ class SecretServerCloud(SecretServer):
     DEFAULT_TLD = "com"
     URL_TEMPLATE = "https://{}.secretservercloud.{}"
 
-    def __init__(self, tenant=None, authorizer=None, tld=DEFAULT_TLD, base_url=None):
+    def __init__(
+        self,
+        tenant=None,
+        authorizer=None,
+        tld=DEFAULT_TLD,
+        base_url=None,
+        session=None,
+    ):
         if authorizer is None or not isinstance(authorizer, Authorizer):
             raise ValueError(
                 "authorizer must be provided and must be of type Authorizer"
@@ -801,4 +3433,4 @@ class SecretServerCloud(SecretServer):
             url = base_url.rstrip("/")
         else:
             raise ValueError("Must provide either tenant or base_url")
-        super().__init__(url, authorizer)
+        super().__init__(url, authorizer, session=session)
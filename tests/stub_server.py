@@ -0,0 +1,460 @@
+"""A local stand-in for the Secret Server REST API
+
+It serves just enough of the API for the SDK to be exercised offline, from a
+background thread, over HTTP/1.1 with keep-alive.
+
+Example:
+
+    with StubSecretServer() as stub:
+        authorizer = PasswordGrantAuthorizer(stub.base_url, "user", "pass")
+        secret = SecretServer(stub.base_url, authorizer).get_secret(1)
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+IN_PROCESS_URL = "http://stub.invalid"
+
+
+def make_folder(id, parent_folder_id=-1, name=None):
+    """Returns a ``dict`` shaped like a Secret Server ``FolderModel``"""
+    name = name or f"Folder {id}"
+    return {
+        "id": id,
+        "folderName": name,
+        "folderPath": f"\\{name}",
+        "parentFolderId": parent_folder_id,
+        "folderTypeId": 1,
+        "secretPolicyId": -1,
+        "inheritSecretPolicy": True,
+        "inheritPermissions": True,
+    }
+
+
+def make_folder_tree(breadth, depth):
+    """Returns the folders of a tree under a root folder with id ``1``, in
+    which each folder down to `depth` levels below the root has `breadth`
+    children
+    """
+    folders = [make_folder(1, name="Root")]
+    parents = folders
+    for _ in range(depth):
+        children = []
+        for parent in parents:
+            for n in range(1, breadth + 1):
+                folder = make_folder(
+                    len(folders) + len(children) + 1,
+                    parent_folder_id=parent["id"],
+                    name=f"{parent['folderName']}.{n}",
+                )
+                folder["folderPath"] = f"{parent['folderPath']}\\{folder['folderName']}"
+                children.append(folder)
+        folders += children
+        parents = children
+    return folders
+
+
+def make_secret(id, folder_id=1, name=None, attachments=0, notes_size=0):
+    """Returns a ``dict`` shaped like a Secret Server ``SecretModel``, with
+    `attachments` file attachment fields named ``attachment-1`` and so on, and
+    a ``notes`` field of `notes_size` characters if it is not ``0``
+    """
+    secret = {
+        "id": id,
+        "name": name or f"Secret {id}",
+        "secretTemplateId": 6003,
+        "secretTemplateName": "Password",
+        "folderId": folder_id,
+        "siteId": 1,
+        "active": True,
+        "checkedOut": False,
+        "checkOutEnabled": False,
+        "lastHeartBeatStatus": "Success",
+        "lastHeartBeatCheck": "2024-01-01T00:00:00.123",
+        "lastPasswordChangeAttempt": "0001-01-01T00:00:00",
+        "launcherConnectAsSecretId": -1,
+        "checkOutMinutesRemaining": 0,
+        "checkOutUserDisplayName": "",
+        "checkOutUserId": -1,
+        "isRestricted": False,
+        "isOutOfSync": False,
+        "outOfSyncReason": "",
+        "autoChangeEnabled": False,
+        "autoChangeNextPassword": None,
+        "requiresApprovalForAccess": False,
+        "requiresComment": False,
+        "checkOutIntervalMinutes": -1,
+        "checkOutChangePasswordEnabled": False,
+        "accessRequestWorkflowMapId": -1,
+        "proxyEnabled": False,
+        "sessionRecordingEnabled": False,
+        "restrictSshCommands": False,
+        "jumpboxRouteId": None,
+        "allowOwnersUnrestrictedSshCommands": False,
+        "isDoubleLock": False,
+        "doubleLockId": -1,
+        "enableInheritPermissions": True,
+        "passwordTypeWebScriptId": -1,
+        "enableInheritSecretPolicy": True,
+        "secretPolicyId": -1,
+        "failedPasswordChangeAttempts": 0,
+        "responseCodes": [],
+        "webLauncherRequiresIncognitoMode": False,
+        "items": [
+            {
+                "itemId": id * 10 + 1,
+                "fieldId": 108,
+                "fileAttachmentId": None,
+                "fieldDescription": "The username",
+                "fieldName": "Username",
+                "filename": None,
+                "itemValue": f"user{id}",
+                "slug": "username",
+                "isFile": False,
+                "isNotes": False,
+                "isPassword": False,
+                "isList": False,
+                "listType": "None",
+            },
+            {
+                "itemId": id * 10 + 2,
+                "fieldId": 109,
+                "fileAttachmentId": None,
+                "fieldDescription": "The password",
+                "fieldName": "Password",
+                "filename": None,
+                "itemValue": f"password{id}",
+                "slug": "password",
+                "isFile": False,
+                "isNotes": False,
+                "isPassword": True,
+                "isList": False,
+                "listType": "None",
+            },
+        ],
+    }
+    if notes_size:
+        secret["items"].append(
+            {
+                "itemId": id * 10 + 9,
+                "fieldId": 110,
+                "fileAttachmentId": None,
+                "fieldDescription": "Any notes",
+                "fieldName": "Notes",
+                "filename": None,
+                "itemValue": ("notes %d " % id * notes_size)[:notes_size],
+                "slug": "notes",
+                "isFile": False,
+                "isNotes": True,
+                "isPassword": False,
+                "isList": False,
+                "listType": "None",
+            }
+        )
+    for n in range(1, attachments + 1):
+        secret["items"].append(
+            {
+                "itemId": id * 10 + 2 + n,
+                "fieldId": 200 + n,
+                "fileAttachmentId": id * 100 + n,
+                "fieldDescription": "A file attachment",
+                "fieldName": f"Attachment {n}",
+                "filename": f"attachment-{n}.bin",
+                "itemValue": "*** Not Valid For Display ***",
+                "slug": f"attachment-{n}",
+                "isFile": True,
+                "isNotes": False,
+                "isPassword": False,
+                "isList": False,
+                "listType": "None",
+            }
+        )
+    return secret
+
+
+def summarize_secret(secret):
+    """Returns a ``dict`` shaped like a Secret Server ``SecretSummary``, the
+    record returned by secret search, for `secret`
+    """
+    return {
+        "id": secret["id"],
+        "name": secret["name"],
+        "secretTemplateId": secret["secretTemplateId"],
+        "secretTemplateName": secret["secretTemplateName"],
+        "folderId": secret["folderId"],
+        "folderPath": f"\\Folder {secret['folderId']}",
+        "siteId": secret["siteId"],
+        "active": secret["active"],
+        "checkedOut": secret["checkedOut"],
+        "isRestricted": False,
+        "isOutOfSync": False,
+        "outOfSyncReason": "",
+        "lastHeartBeatStatus": secret["lastHeartBeatStatus"],
+        "lastPasswordChangeAttempt": secret["lastPasswordChangeAttempt"],
+        "responseCodes": [],
+        "lastAccessed": None,
+        "extendedFields": None,
+        "checkOutEnabled": secret["checkOutEnabled"],
+        "autoChangeEnabled": False,
+        "doubleLockEnabled": False,
+        "requiresApproval": False,
+        "requiresComment": False,
+        "inheritsPermissions": True,
+        "hidePassword": False,
+        "createDate": "2024-01-01T00:00:00",
+        "daysUntilExpiration": None,
+        "hasLauncher": False,
+        "checkOutUserId": -1,
+        "checkOutUserName": "",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.stub.lock:
+            self.server.stub.connections += 1
+
+    def _dispatch(self, method):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        status, headers, body = self.server.stub.handle(
+            method, self.path, self.headers, body
+        )
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+def _response(status, body, content_type="application/json", headers=None):
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    return status, {"Content-Type": content_type, **(headers or {})}, body
+
+
+def _page(records, query):
+    skip, take = int(query.get("skip", 0)), int(query.get("take", 10))
+    return {
+        "records": records[skip : skip + take],
+        "skip": skip,
+        "take": take,
+        "total": len(records),
+        "hasNext": skip + take < len(records),
+    }
+
+
+class StubSecretServer:
+    """Serves a configurable set of secrets on a local ephemeral port, once
+    started, or in-process through :meth:`handle` at :data:`IN_PROCESS_URL`
+
+        With a `server_type` of ``"platform"`` it stands in for Platform, and is
+        its own vault unless :attr:`vault_url` is set.
+
+        Every response is delayed by :attr:`latency` seconds, which may also be a
+        function of the method and path of the request, and :meth:`fail` injects
+        failures.
+        :attr:`connections` counts the TCP connections accepted and
+        :attr:`requests` counts the requests received by ``(method, path)``.
+        Each secret can also be fetched by the path ``\\Stub\\<name>``. Secret
+        search and folder lookup are paged with ``skip`` and ``take``.
+    """
+
+    def __init__(
+        self,
+        secrets=None,
+        access_token="stub-access-token",
+        latency=0.0,
+        server_type="secret_server",
+        attachment_size=1024,
+        folders=None,
+    ):
+        if secrets is None:
+            secrets = [make_secret(id) for id in range(1, 11)]
+        self.secrets = {secret["id"]: secret for secret in secrets}
+        self.folders = {folder["id"]: folder for folder in folders or []}
+        self.secret_paths = {
+            f"\\Stub\\{secret['name']}": secret["id"] for secret in secrets
+        }
+        self.access_token = access_token
+        self.latency = latency
+        self.attachment_size = attachment_size
+        self.server_type = server_type
+        self.vault_url = None
+        self.token_path = {
+            "secret_server": "/oauth2/token",
+            "platform": "/identity/api/oauth2/token/xpmplatform",
+        }[server_type]
+        self.access_grant = {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": 1199,
+        }
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = Counter()
+        self.failures = deque()
+        self._httpd = None
+        self._thread = None
+
+    def fail(self, status, times=1, retry_after=None):
+        """Responds to the next `times` requests, whatever they are, with
+        `status` and an optional ``Retry-After`` header
+        """
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        with self.lock:
+            self.failures.extend([(status, headers)] * times)
+
+    def handle(self, method, url, headers, body):
+        """Responds to a request as the server would, so that it can also be
+        served in-process
+
+        :param url: the URL, or just the path and query, of the request
+        :param headers: the request headers, looked up case-insensitively
+        :return: the status, headers and body of the response
+        :rtype: ``tuple``
+        """
+        url = urlsplit(url)
+        path = url.path
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.lock:
+            self.requests[(method, path)] += 1
+        latency = self.latency(method, path) if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+        with self.lock:
+            failure = self.failures.popleft() if self.failures else None
+        if failure is not None:
+            status, failure_headers = failure
+            return _response(
+                status, {"message": "Injected failure."}, headers=failure_headers
+            )
+        platform = self.server_type == "platform"
+        if method == "POST" and path == self.token_path:
+            return _response(200, self.access_grant)
+        if method == "GET" and path == "/api/v1/healthcheck" and not platform:
+            return _response(200, {"Healthy": True})
+        if method == "GET" and path == "/health" and platform:
+            return _response(200, {"Healthy": True})
+        if headers.get("Authorization") != "Bearer " + self.access_token:
+            return _response(401, {"message": "Authentication failed."})
+        if method == "GET" and path == "/vaultbroker/api/vaults" and platform:
+            return _response(
+                200,
+                {
+                    "vaults": [
+                        {
+                            "isDefault": True,
+                            "isActive": True,
+                            "connection": {"url": self.vault_url or self.base_url},
+                        }
+                    ]
+                },
+            )
+        if method == "GET" and path == "/api/v1/secrets":
+            records = [
+                summarize_secret(secret)
+                for secret in self.secrets.values()
+                if str(secret["folderId"]) == query.get("filter.folderId", "")
+                or "filter.folderId" not in query
+            ]
+            return _response(200, _page(records, query))
+        if method == "GET" and path == "/api/v1/folders":
+            return _response(200, _page(list(self.folders.values()), query))
+        if method == "GET" and path == "/api/v1/folders/lookup":
+            records = [
+                {"id": folder["id"], "value": folder["folderName"]}
+                for folder in self.folders.values()
+                if str(folder["parentFolderId"])
+                == query.get("filter.parentFolderId", "")
+                or "filter.parentFolderId" not in query
+            ]
+            return _response(200, _page(records, query))
+        match = re.fullmatch(r"/api/v1/folders/(\d+)", path)
+        if method == "GET" and match:
+            id = int(match.group(1))
+            if id == 0 and "folderPath" in query:
+                id = next(
+                    (
+                        folder["id"]
+                        for folder in self.folders.values()
+                        if folder["folderPath"] == query["folderPath"]
+                    ),
+                    None,
+                )
+            folder = self.folders.get(id)
+            if folder is None:
+                return _response(404, {"message": "Folder not found."})
+            return _response(200, folder)
+        match = re.fullmatch(r"/api/v1/secrets/(\d+)/fields/([\w-]+)", path)
+        if method == "GET" and match:
+            id, slug = int(match.group(1)), match.group(2)
+            return _response(200, self.attachment(id, slug), "application/octet-stream")
+        match = re.fullmatch(r"/api/v1/secrets/(\d+)", path)
+        if method == "GET" and match:
+            id = int(match.group(1))
+            if id == 0 and "secretPath" in query:
+                id = self.secret_paths.get(query["secretPath"])
+            secret = self.secrets.get(id)
+            if secret is None:
+                return _response(404, {"message": "Secret not found."})
+            return _response(200, secret)
+        return _response(404, {"message": "No such endpoint."})
+
+    def attachment(self, id, slug):
+        """Returns the :attr:`attachment_size` byte content of a file
+        attachment
+        """
+        pattern = f"{id}:{slug}\n".encode()
+        return (pattern * (self.attachment_size // len(pattern) + 1))[
+            : self.attachment_size
+        ]
+
+    @property
+    def base_url(self):
+        if self._httpd is None:  # Only served in-process
+            return IN_PROCESS_URL
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
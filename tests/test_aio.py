@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from delinea.secrets.aio import (
+    AsyncAccessTokenAuthorizer,
+    AsyncPasswordGrantAuthorizer,
+    AsyncSecretServer,
+)
+from delinea.secrets.server import SecretServerClientError
+from tests.stub_server import make_folder
+
+pytest.importorskip("httpx")
+
+
+def test_async_get_secret(stub_server):
+    async def main():
+        authorizer = AsyncPasswordGrantAuthorizer(
+            stub_server.base_url, "user", "password"
+        )
+        async with AsyncSecretServer(stub_server.base_url, authorizer) as server:
+            return await asyncio.gather(*(server.get_secret(id) for id in range(1, 11)))
+
+    secrets = asyncio.run(main())
+    assert [secret["id"] for secret in secrets] == list(range(1, 11))
+    assert stub_server.requests[("POST", "/oauth2/token")] == 1
+
+
+def test_async_nonexistent_secret(stub_server):
+    async def main():
+        authorizer = AsyncAccessTokenAuthorizer(
+            stub_server.access_token, stub_server.base_url
+        )
+        async with AsyncSecretServer(stub_server.base_url, authorizer) as server:
+            await server.get_secret(1000)
+
+    with pytest.raises(SecretServerClientError):
+        asyncio.run(main())
+
+
+def test_async_server_detection(stub_server):
+    async def main():
+        authorizer = AsyncAccessTokenAuthorizer(
+            stub_server.access_token, stub_server.base_url, detection_timeout=5
+        )
+        return await authorizer.server_type()
+
+    assert asyncio.run(main()) == "secret_server"
+    assert asyncio.run(main()) == "secret_server"
+    assert stub_server.requests[("GET", "/api/v1/healthcheck")] == 1
+
+
+def test_async_server_detection_is_serialized(stub_server):
+    async def main():
+        authorizers = [
+            AsyncAccessTokenAuthorizer(stub_server.access_token, stub_server.base_url)
+            for _ in range(5)
+        ]
+        return await asyncio.gather(
+            *(authorizer.server_type() for authorizer in authorizers)
+        )
+
+    assert asyncio.run(main()) == ["secret_server"] * 5
+    assert stub_server.requests[("GET", "/api/v1/healthcheck")] == 1
+
+
+def test_async_read_timeouts(stub_server):
+    stub_server.folders[1] = make_folder(1)
+    read_timeouts = {}
+
+    async def main():
+        authorizer = AsyncAccessTokenAuthorizer(
+            stub_server.access_token, stub_server.base_url
+        )
+        async with AsyncSecretServer(stub_server.base_url, authorizer) as server:
+            await authorizer.server_type()
+            build_request = server.client.build_request
+
+            def record(method, url, **kwargs):
+                read_timeouts[url.split("/api/v1/")[-1]] = kwargs["timeout"].read
+                return build_request(method, url, **kwargs)
+
+            server.client.build_request = record
+            await server.get_secret_json(1)
+            await server.lookup_folders()
+            [folder async for folder in server.iter_folders()]
+            await server.get_folder(1)
+            assert read_timeouts == {
+                "secrets/1": 60,
+                "folders/lookup": 60,
+                "folders/1": 60,
+            }
+            # Under a deadline, folder calls may read for as long as it allows
+            await server.get_secret_json(1, timeout=300)
+            await server.lookup_folders(timeout=300)
+            await server.get_folder(1, timeout=300)
+
+    asyncio.run(main())
+    assert read_timeouts["secrets/1"] == 60
+    assert 60 < read_timeouts["folders/lookup"] <= 300
+    assert 60 < read_timeouts["folders/1"] <= 300
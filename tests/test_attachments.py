@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from delinea.secrets.server import ServerSecret, _ChunkWriter
+from tests.stub_server import StubSecretServer, make_secret
+
+
+def test_attachments_are_fetched_concurrently(make_secret_server):
+    with StubSecretServer(
+        [make_secret(1, attachments=4)], latency=0.1, attachment_size=100
+    ) as stub:
+        secret_server = make_secret_server(stub)
+        start = time.perf_counter()
+        secret = secret_server.get_secret(1)
+        elapsed = time.perf_counter() - start
+        values = {item["slug"]: item["itemValue"] for item in secret["items"]}
+        assert values["username"] == "user1"
+        for n in range(1, 5):
+            assert values[f"attachment-{n}"] == stub.attachment(1, f"attachment-{n}")
+        # The secret and its 4 attachments take 2 round trips rather than 5
+        assert elapsed < 0.4
+
+
+def test_attachments_are_bytes(stub_server, make_secret_server):
+    stub_server.secrets[1] = make_secret(1, attachments=1)
+    secret_server = make_secret_server(stub_server)
+    item = secret_server.get_secret(1)["items"][-1]
+    assert item["itemValue"] == stub_server.attachment(1, "attachment-1")
+    assert type(item["itemValue"]) is bytes
+    item = secret_server.get_secret(1, fetch_file_attachments=False)["items"][-1]
+    assert item["itemValue"] == "*** Not Valid For Display ***"
+
+
+def test_async_attachments(stub_server):
+    pytest.importorskip("httpx")
+    stub_server.secrets[1] = make_secret(1, attachments=3)
+
+    async def main():
+        authorizer = AsyncAccessTokenAuthorizer(
+            stub_server.access_token, stub_server.base_url
+        )
+        async with AsyncSecretServer(stub_server.base_url, authorizer) as server:
+            return await server.get_secret(1)
+
+    items = asyncio.run(main())["items"]
+    assert [item["itemValue"] for item in items[2:]] == [
+        stub_server.attachment(1, f"attachment-{n}") for n in range(1, 4)
+    ]
+
+
+def test_download_secret_field(stub_server, tmp_path, make_secret_server):
+    stub_server.attachment_size = 100_000
+    secret_server = make_secret_server(stub_server)
+    expected = stub_server.attachment(1, "attachment-1")
+    path = tmp_path / "attachment.bin"
+    assert secret_server.download_secret_field(1, "attachment-1", path, 4096) == len(
+        expected
+    )
+    assert path.read_bytes() == expected
+    with open(path, "wb") as file:
+        secret_server.download_secret_field(1, "attachment-1", file)
+    assert path.read_bytes() == expected
+    buffer = bytearray(len(expected) + 10)
+    assert secret_server.download_secret_field(1, "attachment-1", buffer) == len(
+        expected
+    )
+    assert buffer[: len(expected)] == expected
+    with pytest.raises(ValueError):
+        secret_server.download_secret_field(1, "attachment-1", bytearray(10))
+
+
+def test_failed_download_leaves_no_partial_file(
+    stub_server, tmp_path, monkeypatch, make_secret_server
+):
+    stub_server.attachment_size = 100_000
+    secret_server = make_secret_server(stub_server)
+    write = _ChunkWriter.write
+
+    def write_until_full(writer, chunk):
+        if writer.written >= 8192:
+            raise OSError("No space left on device")
+        write(writer, chunk)
+
+    monkeypatch.setattr(_ChunkWriter, "write", write_until_full)
+    path = tmp_path / "attachment.bin"
+    path.write_bytes(b"previous")
+    with pytest.raises(OSError):
+        secret_server.download_secret_field(1, "attachment-1", path, 4096)
+    assert path.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_async_download_secret_field(stub_server):
+    pytest.importorskip("httpx")
+
+    async def main():
+        async with AsyncSecretServer(
+            stub_server.base_url,
+            AsyncAccessTokenAuthorizer(stub_server.access_token, stub_server.base_url),
+        ) as secret_server:
+            buffer = bytearray(stub_server.attachment_size)
+            written = await secret_server.download_secret_field(
+                1, "attachment-1", buffer
+            )
+            return written, bytes(buffer)
+
+    written, content = asyncio.run(main())
+    assert written == stub_server.attachment_size
+    assert content == stub_server.attachment(1, "attachment-1")
+
+
+def test_attachments_are_loaded_lazily(stub_server, make_secret_server):
+    stub_server.secrets[1] = make_secret(1, attachments=5)
+    secret_server = make_secret_server(stub_server)
+
+    def secret_requests():
+        return sum(
+            count
+            for (method, path), count in stub_server.requests.items()
+            if path.startswith("/api/v1/secrets/")
+        )
+
+    secret = ServerSecret(
+        **secret_server.get_secret(1, fetch_file_attachments=False),
+        secret_server=secret_server,
+    )
+    assert secret.fields["password"].value == "password1"
+    # Neither repr nor == loads attachments
+    assert "attachment-1" in repr(secret)
+    assert secret == ServerSecret(
+        **secret_server.get_secret(1, fetch_file_attachments=False),
+        secret_server=secret_server,
+    )
+    assert secret_requests() == 2
+    attachment = secret.fields["attachment-2"]
+    assert attachment.value == stub_server.attachment(1, "attachment-2")
+    assert attachment.value == stub_server.attachment(1, "attachment-2")
+    assert stub_server.requests[("GET", "/api/v1/secrets/1/fields/attachment-2")] == 1
+    assert secret_requests() == 3
+    assert repr(stub_server.attachment(1, "attachment-2")) in repr(attachment)
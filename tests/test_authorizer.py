@@ -0,0 +1,150 @@
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from delinea.secrets.server import (
+    AccessTokenAuthorizer,
+    FileTokenCache,
+    InProcessTransport,
+    PasswordGrantAuthorizer,
+    SecretServerError,
+    create_session,
+)
+
+
+def test_concurrent_refresh_requests_one_grant(stub_server):
+    stub_server.latency = 0.05
+    authorizer = PasswordGrantAuthorizer(stub_server.base_url, "user", "password")
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        tokens = list(executor.map(lambda _: authorizer.get_access_token(), range(32)))
+    assert set(tokens) == {stub_server.access_token}
+    assert stub_server.requests[("POST", "/oauth2/token")] == 1
+
+
+def test_refresh_ahead_of_expiry(stub_server):
+    authorizer = PasswordGrantAuthorizer(stub_server.base_url, "user", "password")
+    authorizer.get_access_token()
+    authorizer.access_grant_refreshed = datetime.now() - timedelta(seconds=1000)
+    authorizer.get_access_token()
+    assert stub_server.requests[("POST", "/oauth2/token")] == 2
+
+
+def test_headers_are_cached(stub_server):
+    authorizer = PasswordGrantAuthorizer(stub_server.base_url, "user", "password")
+    headers = authorizer.headers()
+    assert headers == {"Authorization": f"Bearer {stub_server.access_token}"}
+    headers["X-Modified"] = "yes"
+    assert authorizer.headers() == {
+        "Authorization": f"Bearer {stub_server.access_token}"
+    }
+    assert authorizer._headers[1] is not headers
+    assert authorizer.headers({"Accept": "application/json"}) == {
+        "Authorization": f"Bearer {stub_server.access_token}",
+        "Accept": "application/json",
+    }
+
+
+def test_background_refresh(stub_server):
+    stub_server.access_grant["expires_in"] = 0.2
+    authorizer = PasswordGrantAuthorizer(stub_server.base_url, "user", "password")
+    authorizer.start_background_refresh(refresh_ratio=0.5, jitter=0.1)
+    try:
+        time.sleep(0.5)
+        assert authorizer.get_access_token() == stub_server.access_token
+    finally:
+        authorizer.stop_background_refresh()
+    assert stub_server.requests[("POST", "/oauth2/token")] >= 3
+
+
+def test_background_refresh_precedes_api_calls(stub_server):
+    # REST API calls refresh this grant after 0.5 seconds, halfway through
+    stub_server.access_grant["expires_in"] = 1
+    authorizer = PasswordGrantAuthorizer(stub_server.base_url, "user", "password")
+    authorizer.start_background_refresh(refresh_ratio=0.9, jitter=0)
+    try:
+        time.sleep(0.6)
+        # renewed in the background after 0.45 seconds
+        assert not authorizer._expired(300)
+        assert stub_server.requests[("POST", "/oauth2/token")] == 2
+        # A grant renewed by another thread is not renewed again at 0.9
+        # seconds, but 0.45 seconds later
+        authorizer._refresh(force=True)
+        time.sleep(0.4)
+        assert stub_server.requests[("POST", "/oauth2/token")] == 3
+    finally:
+        authorizer.stop_background_refresh()
+
+
+def test_file_token_cache(stub_server, tmp_path):
+    token_cache = FileTokenCache(str(tmp_path))
+    for _ in range(3):
+        authorizer = PasswordGrantAuthorizer(
+            stub_server.base_url, "user", "password", token_cache=token_cache
+        )
+        assert authorizer.get_access_token() == stub_server.access_token
+    assert stub_server.requests[("POST", "/oauth2/token")] == 1
+    assert stub_server.requests[("GET", "/api/v1/healthcheck")] == 1
+    (path,) = tmp_path.glob("*.json")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_file_token_cache_expired_grant(stub_server, tmp_path):
+    token_cache = FileTokenCache(str(tmp_path))
+    key = token_cache.key(stub_server.base_url, "user")
+    token_cache.save(
+        key,
+        {
+            "access_grant": {"access_token": "expired", "expires_in": 1199},
+            "refreshed": time.time() - 1199,
+            "server_type": "secret_server",
+            "token_url": stub_server.base_url + "/oauth2/token",
+        },
+    )
+    authorizer = PasswordGrantAuthorizer(
+        stub_server.base_url, "user", "password", token_cache=token_cache
+    )
+    assert authorizer.get_access_token() == stub_server.access_token
+    assert token_cache.load(key)["access_grant"] == stub_server.access_grant
+
+
+def test_server_detection_is_shared(stub_server):
+    for _ in range(3):
+        AccessTokenAuthorizer(stub_server.access_token, stub_server.base_url)
+    PasswordGrantAuthorizer(stub_server.base_url, "user", "password").get_access_token()
+    assert stub_server.requests[("GET", "/api/v1/healthcheck")] == 1
+
+
+def test_server_type_override(stub_server):
+    authorizer = PasswordGrantAuthorizer(
+        stub_server.base_url, "user", "password", server_type="secret_server"
+    )
+    assert authorizer.get_access_token() == stub_server.access_token
+    assert stub_server.requests[("GET", "/api/v1/healthcheck")] == 0
+    with pytest.raises(ValueError):
+        AccessTokenAuthorizer("token", stub_server.base_url, server_type="cloud")
+
+
+def test_server_detection_failure():
+    with pytest.raises(SecretServerError):
+        AccessTokenAuthorizer("token", "http://127.0.0.1:9", detection_timeout=1)
+
+
+def test_server_detection_prefers_secret_server():
+    answered = []
+
+    def handler(method, url, headers, body):
+        # Both endpoints respond as healthy, Platform's sooner
+        if url.endswith("/api/v1/healthcheck"):
+            time.sleep(0.2)
+        answered.append(url)
+        return 200, {}, b"healthy"
+
+    session = create_session(transport=InProcessTransport(handler))
+    authorizer = AccessTokenAuthorizer("token", "http://both.invalid", session)
+    assert authorizer._server_type == "secret_server"
+    # and no probe is still running
+    assert len(answered) == 2
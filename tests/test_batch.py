@@ -0,0 +1,45 @@
+import pytest
+
+from delinea.secrets.server import SecretBatch, SecretServerClientError
+from tests.stub_server import make_secret
+
+
+def test_secret_batch_from_secrets():
+    secrets = [make_secret(id, folder_id=id % 3) for id in range(1, 31)]
+    secrets[4]["active"] = False
+    del secrets[0]["siteId"]
+    secrets.append(SecretServerClientError("Secret not found."))
+    batch = SecretBatch(secrets)
+    assert len(batch) == 30
+    assert len(batch.errors) == 1
+    assert list(batch.column("id")) == list(range(1, 31))
+    assert list(batch.column("site_id")[:2]) == [-1, 1]
+
+    active = batch.filter(folder_id=2, active=True)
+    assert active.select("id", "name") == [
+        (id, f"Secret {id}") for id in range(2, 31, 3) if id != 5
+    ]
+    assert len(batch.filter(lambda id, **_: id > 25)) == 5
+    assert batch.select("active")[3:5] == [(True,), (False,)]
+    assert all(
+        type(value) is bool
+        for values in batch.select("active", "checked_out")
+        for value in values
+    )
+    assert len(batch.filter(lambda active, **_: active is False)) == 1
+
+    secret = active.secret(0)
+    assert secret.id == 2
+    assert secret.active is True
+    assert secret.fields["password"].value == "password2"
+    assert [secret.id for secret in batch.take([3, 1]).secrets()] == [4, 2]
+
+
+def test_secret_batch_from_search_records(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    batch = SecretBatch(secret_server.iter_secrets(page_size=4))
+    assert list(batch.column("id")) == list(range(1, 11))
+    assert batch.column("secret_template_name")[0] == "Password"
+    with pytest.raises(ValueError):
+        batch.secret(0)
+    assert batch.secret(0, secret_server).fields["username"].value == "user1"
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from delinea.secrets.aio import (
+    AsyncAccessTokenAuthorizer,
+    AsyncSecretServer,
+    create_async_client,
+    in_process_transport,
+)
+from delinea.secrets.server import (
+    InProcessTransport,
+    PasswordGrantAuthorizer,
+    SecretServer,
+    SecretServerClientError,
+    create_session,
+)
+from tests.stub_server import make_secret
+
+
+def test_get_secrets(stub_server):
+    secret_server = SecretServer(
+        stub_server.base_url,
+        PasswordGrantAuthorizer(stub_server.base_url, "user", "password"),
+    )
+    ids = [3, 1, 1000, 2]
+    secrets = secret_server.get_secrets(ids, max_workers=4)
+    assert [secret["id"] for secret in secrets if isinstance(secret, dict)] == [
+        3,
+        1,
+        2,
+    ]
+    assert isinstance(secrets[2], SecretServerClientError)
+    assert stub_server.requests[("POST", "/oauth2/token")] == 1
+
+
+def test_get_secrets_stays_within_max_workers(stub_server, make_secret_server):
+    lock = threading.Lock()
+    in_flight = []
+    most_in_flight = 0
+
+    def handler(*request):
+        nonlocal most_in_flight
+        with lock:
+            in_flight.append(request)
+            most_in_flight = max(most_in_flight, len(in_flight))
+        time.sleep(0.01)
+        try:
+            return stub_server.handle(*request)
+        finally:
+            with lock:
+                in_flight.remove(request)
+
+    for id in range(1, 9):
+        stub_server.secrets[id] = make_secret(id, attachments=4)
+    session = create_session(transport=InProcessTransport(handler))
+    secret_server = make_secret_server(stub_server, session)
+    secrets = secret_server.get_secrets(range(1, 9), max_workers=4)
+    for secret in secrets:
+        assert secret["items"][-1]["itemValue"] == stub_server.attachment(
+            secret["id"], "attachment-4"
+        )
+    assert most_in_flight <= 4
+
+
+def test_async_get_secrets_stays_within_max_workers(stub_server):
+    pytest.importorskip("httpx")
+
+    in_flight = 0
+    most_in_flight = 0
+
+    async def handler(*request):
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        try:
+            return stub_server.handle(*request)
+        finally:
+            in_flight -= 1
+
+    for id in range(1, 9):
+        stub_server.secrets[id] = make_secret(id, attachments=4)
+
+    async def main():
+        client = create_async_client(transport=in_process_transport(handler))
+        authorizer = AsyncAccessTokenAuthorizer(
+            stub_server.access_token,
+            stub_server.base_url,
+            client,
+            server_type="secret_server",
+        )
+        async with AsyncSecretServer(stub_server.base_url, authorizer) as server:
+            return await server.get_secrets(range(1, 9), max_workers=4)
+
+    for secret in asyncio.run(main()):
+        assert secret["items"][-1]["itemValue"] == stub_server.attachment(
+            secret["id"], "attachment-4"
+        )
+    assert most_in_flight <= 4
+
+
+def test_async_get_secrets(stub_server):
+    pytest.importorskip("httpx")
+
+    async def main():
+        authorizer = AsyncAccessTokenAuthorizer(
+            stub_server.access_token, stub_server.base_url
+        )
+        async with AsyncSecretServer(stub_server.base_url, authorizer) as server:
+            return await server.get_secrets([2, 1000, 1], max_workers=2)
+
+    secrets = asyncio.run(main())
+    assert secrets[0]["id"] == 2
+    assert isinstance(secrets[1], SecretServerClientError)
+    assert secrets[2]["id"] == 1
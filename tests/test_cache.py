@@ -0,0 +1,138 @@
+import threading
+import time
+
+from delinea.secrets.server import SecretCache
+
+
+def test_cache_hits_and_misses(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server, cache=SecretCache())
+    for _ in range(3):
+        assert secret_server.get_secret(1)["id"] == 1
+    assert secret_server.get_secret_by_path(r"\Stub\Secret 2")["id"] == 2
+    assert secret_server.get_secret_by_path("Stub/Secret 2")["id"] == 2
+    assert secret_server.cache.stats() == {
+        "hits": 3,
+        "stale_hits": 0,
+        "misses": 2,
+        "evictions": 0,
+        "size": 2,
+    }
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 1
+
+
+def test_cache_returns_copies(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server, cache=SecretCache())
+    secret_server.get_secret(1)["items"][0]["itemValue"] = "changed"
+    assert secret_server.get_secret(1)["items"][0]["itemValue"] == "user1"
+
+
+def test_cache_lru_eviction():
+    cache = SecretCache(max_entries=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_load(key, lambda: {"id": 1})
+    assert cache.evictions == 1
+    assert cache.get_or_load("a", lambda: None) == {"id": 1}
+    assert cache.get_or_load("b", lambda: None) is None
+
+
+def test_cache_ttl_and_stale_while_revalidate():
+    cache = SecretCache(ttl=0.05, stale_ttl=60)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get_or_load("a", lambda: 2) == 1
+    assert cache.stale_hits == 1
+    for _ in range(100):
+        if cache.get_or_load("a", lambda: 3) == 2:
+            break
+        time.sleep(0.01)
+    assert cache.get_or_load("a", lambda: 3) == 2
+
+
+def test_cache_revalidation_is_bounded():
+    cache = SecretCache(ttl=0.01, stale_ttl=60)
+    release = threading.Event()
+    running = []
+
+    def load():
+        running.append(threading.current_thread())
+        release.wait()
+        return 2
+
+    for key in range(10):
+        cache.set(key, 1)
+    time.sleep(0.02)
+    for key in range(10):
+        assert cache.get_or_load(key, load) == 1
+    time.sleep(0.05)
+    assert len(running) == SecretCache.REVALIDATE_WORKERS
+    release.set()
+    for _ in range(100):
+        if all(cache.get(key) == 2 for key in range(10)):
+            break
+        time.sleep(0.01)
+    assert len(running) == 10
+    assert len(set(running)) <= SecretCache.REVALIDATE_WORKERS
+
+
+def test_cache_drops_values_loaded_across_invalidation():
+    cache = SecretCache(ttl=0.01, stale_ttl=60)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load():
+        loading.set()
+        release.wait()
+        return {"id": 1, "version": 2}
+
+    cache.set(("id", 1), {"id": 1, "version": 1})
+    time.sleep(0.02)
+    assert cache.get_or_load(("id", 1), load)["version"] == 1
+    assert loading.wait(1)
+    cache.invalidate(id=1)
+    release.set()
+    for _ in range(100):
+        if not cache._revalidating:
+            break
+        time.sleep(0.01)
+    assert len(cache) == 0
+
+
+def test_cache_invalidation(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server, cache=SecretCache())
+    secret_server.get_secret(1)
+    secret_server.get_secret_by_path(r"\Stub\Secret 1")
+    secret_server.get_secret_by_path(r"\Stub\Secret 2")
+    secret_server.invalidate_cache(id=1)
+    assert len(secret_server.cache) == 1
+    secret_server.invalidate_cache(path="/Stub/Secret 2")
+    assert len(secret_server.cache) == 0
+    secret_server.get_secret_by_path(r"\Stub\Secret 2")
+    secret_server.invalidate_cache(id="not-an-id")
+    assert len(secret_server.cache) == 1
+    secret_server.invalidate_cache(id="2")
+    assert len(secret_server.cache) == 0
+
+
+def test_secret_path_resolution_is_remembered(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    for _ in range(3):
+        assert secret_server.get_secret_by_path(r"\Stub\Secret 2")["id"] == 2
+    # The path is resolved once, then the secret is fetched by id
+    assert stub_server.requests[("GET", "/api/v1/secrets/0")] == 1
+    assert stub_server.requests[("GET", "/api/v1/secrets/2")] == 2
+
+    # A renamed secret is no longer at the path
+    stub_server.secrets[2]["name"] = "Renamed"
+    stub_server.secrets[3]["name"] = "Secret 2"
+    stub_server.secret_paths[r"\Stub\Secret 2"] = 3
+    assert secret_server.get_secret_by_path(r"\Stub\Secret 2")["id"] == 3
+    assert secret_server.get_secret_by_path(r"\Stub\Secret 2")["id"] == 3
+    assert stub_server.requests[("GET", "/api/v1/secrets/0")] == 2
+
+    # A deleted secret
+    del stub_server.secrets[3]
+    stub_server.secrets[4]["name"] = "Secret 2"
+    stub_server.secret_paths[r"\Stub\Secret 2"] = 4
+    assert secret_server.get_secret_by_path(r"\Stub\Secret 2")["id"] == 4
+    assert stub_server.requests[("GET", "/api/v1/secrets/3")] == 2
+    assert stub_server.requests[("GET", "/api/v1/secrets/0")] == 3
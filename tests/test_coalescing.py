@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from delinea.secrets.server import SecretServerClientError
+from tests.stub_server import StubSecretServer
+
+
+def test_concurrent_reads_are_coalesced(make_secret_server):
+    with StubSecretServer(latency=0.1) as stub:
+        secret_server = make_secret_server(stub)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            secrets = list(executor.map(secret_server.get_secret, [1] * 10))
+            paths = list(
+                executor.map(secret_server.get_secret_by_path, [r"\Stub\Secret 2"] * 10)
+            )
+            errors = [
+                executor.submit(secret_server.get_secret, 1000) for _ in range(10)
+            ]
+        assert stub.requests[("GET", "/api/v1/secrets/1")] == 1
+        assert stub.requests[("GET", "/api/v1/secrets/0")] == 1
+        assert stub.requests[("GET", "/api/v1/secrets/1000")] == 1
+        assert all(secret["id"] == 1 for secret in secrets)
+        assert all(secret["id"] == 2 for secret in paths)
+        for future in errors:
+            with pytest.raises(SecretServerClientError):
+                future.result()
+        # Each caller gets a copy of its own
+        secrets[0]["items"][0]["itemValue"] = "changed"
+        assert secrets[1]["items"][0]["itemValue"] == "user1"
+
+
+def test_async_concurrent_reads_are_coalesced():
+    pytest.importorskip("httpx")
+    with StubSecretServer(latency=0.1) as stub:
+
+        async def main():
+            async with AsyncSecretServer(
+                stub.base_url,
+                AsyncAccessTokenAuthorizer(
+                    stub.access_token, stub.base_url, server_type="secret_server"
+                ),
+            ) as secret_server:
+                secrets = await asyncio.gather(
+                    *(secret_server.get_secret(1) for _ in range(10)),
+                    secret_server.get_secrets([1, 1, 2]),
+                )
+                return secrets[:10], secrets[10]
+
+        secrets, batch = asyncio.run(main())
+        assert [secret["id"] for secret in secrets] == [1] * 10
+        assert [secret["id"] for secret in batch] == [1, 1, 2]
+        assert stub.requests[("GET", "/api/v1/secrets/1")] == 1
+        assert stub.requests[("GET", "/api/v1/secrets/2")] == 1
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from delinea.secrets.server import (
+    RetryPolicy,
+    SecretServer,
+    SecretServerServiceError,
+    SecretServerTimeoutError,
+    _timeouts,
+    deadline,
+)
+from tests.stub_server import StubSecretServer, make_secret
+
+
+def slow(path_prefix, seconds):
+    def latency(method, path):
+        return seconds if path.startswith(path_prefix) else 0
+
+    return latency
+
+
+def test_timeout_caps_each_request(make_secret_server):
+    with StubSecretServer(latency=slow("/api/v1/secrets", 0.5)) as stub:
+        secret_server = make_secret_server(stub)
+        start = time.perf_counter()
+        with pytest.raises(requests.Timeout):
+            secret_server.get_secret(1, timeout=0.2)
+        assert time.perf_counter() - start < 0.45
+
+
+def test_timeout_is_shared_by_sub_requests(monkeypatch, make_secret_server):
+    monkeypatch.setattr(SecretServer, "MAX_ATTACHMENT_WORKERS", 1)
+    with StubSecretServer(
+        [make_secret(1, attachments=3)],
+        latency=slow("/api/v1/secrets/1/fields", 0.3),
+    ) as stub:
+        secret_server = make_secret_server(stub)
+        start = time.perf_counter()
+        # Three attachments take 0.9 seconds one after the other
+        with pytest.raises((requests.Timeout, SecretServerTimeoutError)):
+            secret_server.get_secret(1, timeout=0.7)
+        assert time.perf_counter() - start < 0.85
+        assert secret_server.get_secret(1, timeout=5)["id"] == 1
+
+
+def test_passed_deadline(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(SecretServerTimeoutError):
+            secret_server.get_secret_json(1)
+        # A nested deadline does not extend it
+        with pytest.raises(SecretServerTimeoutError):
+            secret_server.get_secret_json(1, timeout=10)
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 0
+    assert secret_server.get_secret_json(1)
+
+
+def test_connect_and_read_timeouts():
+    assert _timeouts() == (10, 60)
+    assert _timeouts(None) == (10, None)
+    with deadline(5, connect_timeout=1):
+        connect, read = _timeouts()
+        assert connect == 1
+        assert 4.9 < read <= 5
+        assert _timeouts(None)[1] <= 5
+
+
+def test_retries_within_deadline(stub_server, make_secret_server):
+    secret_server = make_secret_server(
+        stub_server, retry_policy=RetryPolicy(backoff=1, jitter=0)
+    )
+    secret_server.ensure_vault_url()
+    stub_server.fail(503)
+    start = time.perf_counter()
+    with pytest.raises(SecretServerServiceError):
+        secret_server.get_secret_json(1, timeout=0.5)
+    assert time.perf_counter() - start < 0.5
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 1
+
+
+def test_iterator_timeout(make_secret_server):
+    with StubSecretServer(
+        [make_secret(id) for id in range(1, 11)],
+        latency=slow("/api/v1/secrets", 0.2),
+    ) as stub:
+        secret_server = make_secret_server(stub)
+        records = secret_server.iter_secrets(page_size=2, timeout=0.5)
+        with pytest.raises((requests.Timeout, SecretServerTimeoutError)):
+            for _ in records:
+                pass
+        assert stub.requests[("GET", "/api/v1/secrets")] < 5
+
+
+def test_async_timeout():
+    httpx = pytest.importorskip("httpx")
+    with StubSecretServer(latency=slow("/api/v1/secrets", 0.5)) as stub:
+
+        async def main():
+            async with AsyncSecretServer(
+                stub.base_url,
+                AsyncAccessTokenAuthorizer(
+                    stub.access_token, stub.base_url, server_type="secret_server"
+                ),
+            ) as secret_server:
+                with pytest.raises(httpx.TimeoutException):
+                    await secret_server.get_secret(1, timeout=0.2)
+                with deadline(0.2):
+                    ids = [
+                        secret["id"] async for secret in secret_server.iter_secrets()
+                    ]
+                return ids
+
+        start = time.perf_counter()
+        with pytest.raises((httpx.TimeoutException, SecretServerTimeoutError)):
+            asyncio.run(main())
+        assert time.perf_counter() - start < 0.85
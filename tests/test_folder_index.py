@@ -0,0 +1,76 @@
+import pytest
+
+from delinea.secrets.server import FolderIndex, SecretServerClientError
+from tests.stub_server import StubSecretServer, make_folder
+
+
+def make_tree():
+    folders = [make_folder(1, name="Root")]
+    for id, name in ((2, "Child"), (3, "Other")):
+        folder = make_folder(id, parent_folder_id=1, name=name)
+        folder["folderPath"] = f"\\Root\\{name}"
+        folders.append(folder)
+    folder = make_folder(4, parent_folder_id=2, name="Grandchild")
+    folder["folderPath"] = "\\Root\\Child\\Grandchild"
+    return folders + [folder]
+
+
+def test_folder_index_resolves_paths_locally(make_secret_server):
+    with StubSecretServer(folders=make_tree()) as stub:
+        secret_server = make_secret_server(stub, folder_index=FolderIndex())
+        folder = secret_server.get_folder_by_path("/root/child/grandchild")
+        assert folder["id"] == 4
+        assert secret_server.get_folder_by_path(r"\Root\Other")["id"] == 3
+        assert stub.requests[("GET", "/api/v1/folders")] == 1
+        assert stub.requests[("GET", "/api/v1/folders/0")] == 0
+
+        index = secret_server.get_folder_index()
+        assert len(index) == 4
+        assert index.folder_id(r"\Root\Child") == 2
+        assert index.child_ids(1) == [2, 3]
+        assert index.subtree_ids(1) == [1, 2, 3, 4]
+        assert index.subtree_ids(2) == [2, 4]
+
+
+def test_folder_index_returns_indexed_folders(make_secret_server):
+    with StubSecretServer(folders=make_tree()) as stub:
+        secret_server = make_secret_server(stub, folder_index=FolderIndex())
+        folder = secret_server.get_folder_by_path(
+            r"\Root\Child", get_all_children=False
+        )
+        assert folder == stub.folders[2]
+        folder["folderName"] = "Changed"
+        assert secret_server.get_folder_index().folder(2)["folderName"] == "Child"
+        assert stub.requests[("GET", "/api/v1/folders/2")] == 0
+        secret_server.get_folder_by_path(r"\Root\Child")
+        assert stub.requests[("GET", "/api/v1/folders/2")] == 1
+
+
+def test_folder_index_falls_back_to_the_server(make_secret_server):
+    with StubSecretServer(folders=make_tree()) as stub:
+        secret_server = make_secret_server(stub, folder_index=FolderIndex(ttl=60))
+        index = secret_server.get_folder_index()
+        # A folder created after the index was built
+        stub.folders[5] = make_folder(5, name="New")
+        assert secret_server.get_folder_by_path(r"\New")["id"] == 5
+        assert index.folder_id(r"\New") == 5
+        assert index.child_ids(-1) == [1, 5]
+        # A folder deleted after the index was built
+        del stub.folders[3]
+        with pytest.raises(SecretServerClientError):
+            secret_server.get_folder_by_path(r"\Root\Other")
+        assert index.folder_id(r"\Root\Other") is None
+        assert stub.requests[("GET", "/api/v1/folders")] == 1
+
+
+def test_folder_index_checks_the_path(make_secret_server):
+    with StubSecretServer(folders=make_tree()) as stub:
+        secret_server = make_secret_server(stub, folder_index=FolderIndex(ttl=60))
+        index = secret_server.get_folder_index()
+        # Child is renamed, and Other takes its name, after the index was built
+        stub.folders[2]["folderPath"] = "\\Root\\Renamed"
+        stub.folders[3]["folderPath"] = "\\Root\\Child"
+        assert secret_server.get_folder_by_path(r"\Root\Child")["id"] == 3
+        assert index.folder_id(r"\Root\Child") == 3
+        assert index.folder_id(r"\Root\Renamed") == 2
+        assert stub.requests[("GET", "/api/v1/folders")] == 1
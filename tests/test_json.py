@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from delinea.secrets.server import (
+    SecretServerError,
+    set_json_backend,
+)
+
+
+@pytest.fixture
+def parsed():
+    parsed = []
+
+    def loads(content):
+        parsed.append(content)
+        return json.loads(content)
+
+    set_json_backend(loads)
+    yield parsed
+    set_json_backend()
+
+
+def test_responses_are_parsed_once_from_bytes(stub_server, parsed, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    assert secret_server.get_secret(1)["id"] == 1
+    assert len(parsed) == 1
+    assert type(parsed[0]) is bytes
+
+
+def test_json_backend_errors(stub_server, make_secret_server):
+    def loads(content):
+        raise ValueError("not JSON")
+
+    secret_server = make_secret_server(stub_server)
+    set_json_backend(loads)
+    try:
+        with pytest.raises(SecretServerError):
+            secret_server.get_secret(1)
+    finally:
+        set_json_backend()
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from delinea.secrets.server import (
+    PasswordGrantAuthorizer,
+    RetryPolicy,
+    SecretServer,
+    SecretServerClientError,
+    SecretServerTimeoutError,
+    deadline,
+    metrics,
+)
+
+
+def test_records_each_endpoint(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    secret_server.get_secret_json(1)
+    secret_server.get_secret_field(1, "attachment-1")
+    with pytest.raises(SecretServerClientError):
+        secret_server.get_folder(1)
+    secret_server.lookup_folders()
+    secret_server.search_secrets()
+
+    stats = metrics.stats()
+    assert {endpoint: stats[endpoint]["requests"] for endpoint in stats} == {
+        "secrets": 2,
+        "fields": 1,
+        "folders": 1,
+        "lookup": 1,
+    }
+    assert stats["fields"]["bytes"] == stub_server.attachment_size
+    assert stats["folders"]["errors"] == 1
+    assert stats["folders"]["statuses"] == {404: 1}
+    secrets = stats["secrets"]
+    assert secrets["errors"] == secrets["retries"] == 0
+    assert secrets["statuses"] == {200: 2}
+    assert secrets["bytes"] > 0
+    latency = secrets["latency"]
+    assert latency["buckets"][float("inf")] == 2
+    assert 0 < latency["max"] <= latency["sum"]
+
+
+def test_records_retries_and_errors(stub_server):
+    secret_server = SecretServer(
+        stub_server.base_url,
+        PasswordGrantAuthorizer(
+            stub_server.base_url,
+            "user",
+            "password",
+            server_type="secret_server",
+            retry_policy=RetryPolicy(backoff=0.01),
+        ),
+    )
+    stub_server.fail(502)
+    secret_server.authorizer.get_access_token()
+    stub_server.fail(503, times=2)
+    secret_server.get_secret_json(1)
+
+    stats = metrics.stats()
+    assert stats["token"]["requests"] == 2
+    assert stats["token"]["statuses"] == {502: 1, 200: 1}
+    assert stats["secrets"]["requests"] == 3
+    assert stats["secrets"]["retries"] == 2
+    assert stats["secrets"]["errors"] == 2
+
+
+def test_records_platform_calls(stub_platform):
+    secret_server = SecretServer(
+        stub_platform.base_url,
+        PasswordGrantAuthorizer(stub_platform.base_url, "client", "secret"),
+    )
+    secret_server.get_secret_json(1)
+
+    stats = metrics.stats()
+    assert stats["health"]["requests"] >= 1
+    assert stats["token"]["requests"] == 1
+    assert stats["vaultbroker"]["requests"] == 1
+    assert stats["secrets"]["requests"] == 1
+
+
+def test_expired_deadline_is_not_recorded(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(SecretServerTimeoutError):
+            secret_server.get_secret_json(1)
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 0
+    assert metrics.stats() == {}
+
+
+def test_hooks(stub_server, make_secret_server):
+    events = []
+
+    def failing_hook(event):
+        raise RuntimeError
+
+    metrics.add_hook(events.append)
+    metrics.add_hook(failing_hook)
+    try:
+        secret_server = make_secret_server(stub_server)
+        secret_server.get_secret_json(1)
+    finally:
+        metrics.remove_hook(events.append)
+        metrics.remove_hook(failing_hook)
+    secret_server.get_secret_json(2)
+
+    assert len(events) == 1
+    event = events[0]
+    assert (event.endpoint, event.status, event.retry, event.error) == (
+        "secrets",
+        200,
+        False,
+        None,
+    )
+    assert event.url == f"{stub_server.base_url}/api/v1/secrets/1"
+
+
+def test_disabled(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    metrics.enabled = False
+    try:
+        secret_server.get_secret_json(1)
+    finally:
+        metrics.enabled = True
+    assert metrics.stats() == {}
+
+
+def test_async(stub_server):
+    pytest.importorskip("httpx")
+
+    async def main():
+        async with AsyncSecretServer(
+            stub_server.base_url,
+            AsyncAccessTokenAuthorizer(stub_server.access_token, stub_server.base_url),
+        ) as secret_server:
+            await secret_server.get_secret_json(1)
+            await secret_server.lookup_folders()
+
+    asyncio.run(main())
+    stats = metrics.stats()
+    assert stats["health"]["requests"] >= 1
+    assert stats["secrets"]["statuses"] == {200: 1}
+    assert stats["lookup"]["requests"] == 1
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from delinea.secrets.server import ServerFolder, ServerSecret
+from tests.stub_server import make_folder, make_secret
+
+
+def test_server_secret():
+    json = make_secret(1)
+    json["lastHeartBeatCheck"] = "2024-01-02T03:04:05.1234567"
+    json["someNewAttribute"] = "value"
+    secret = ServerSecret(**json)
+    assert secret.secret_template_name == "Password"
+    assert secret.last_heart_beat_check == datetime(2024, 1, 2, 3, 4, 5)
+    assert secret.last_password_change_attempt == datetime(1, 1, 1)
+    assert secret.some_new_attribute == "value"
+    assert secret.fields["password"].value == "password1"
+    assert secret.fields["password"].is_password is True
+    assert secret == ServerSecret(**json)
+    del json["id"]
+    assert ServerSecret(**json).fields["password"].value == "password1"
+
+
+def test_server_secret_datetime_format():
+    json = make_secret(1)
+    json["lastHeartBeatCheck"] = "01/02/2024 03:04:05"
+    json["lastPasswordChangeAttempt"] = "01/02/2024 03:04:05"
+    secret = ServerSecret(**json, datetime_format="%m/%d/%Y %H:%M:%S")
+    assert secret.last_heart_beat_check == datetime(2024, 1, 2, 3, 4, 5)
+
+
+def test_server_folder():
+    folder = ServerFolder(**make_folder(2, parent_folder_id=1, name="Child"))
+    assert folder.folder_path == "\\Child"
+    assert folder.parent_folder_id == 1
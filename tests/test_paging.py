@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from tests.stub_server import StubSecretServer, make_folder, make_secret
+
+
+def test_iter_secrets_pages(make_secret_server):
+    secrets = [make_secret(id, folder_id=id % 2) for id in range(1, 26)]
+    with StubSecretServer(secrets) as stub:
+        secret_server = make_secret_server(stub)
+        ids = [
+            secret["id"]
+            for secret in secret_server.iter_secrets(
+                {"filter.folderId": 1}, page_size=5
+            )
+        ]
+        assert ids == list(range(1, 26, 2))
+        assert stub.requests[("GET", "/api/v1/secrets")] == 3
+        assert secret_server.get_secret_ids_by_folderid(0) == list(range(2, 26, 2))
+
+
+def test_iter_secrets_stops_early(stub_server, make_secret_server):
+    secret_server = make_secret_server(stub_server)
+    secrets = secret_server.iter_secrets(page_size=2)
+    assert next(secrets)["id"] == 1
+    secrets.close()
+    # The first page and at most one prefetched page
+    assert stub_server.requests[("GET", "/api/v1/secrets")] <= 2
+
+
+def test_iter_folders(make_secret_server):
+    folders = [make_folder(id, parent_folder_id=1) for id in range(2, 10)]
+    with StubSecretServer(folders=[make_folder(1)] + folders) as stub:
+        secret_server = make_secret_server(stub)
+        assert secret_server.get_child_folder_ids_by_folderid(1) == list(range(2, 10))
+        assert secret_server.get_child_folder_ids_by_folderid(2) == []
+
+        pytest.importorskip("httpx")
+
+        async def main():
+            async with AsyncSecretServer(
+                stub.base_url,
+                AsyncAccessTokenAuthorizer(stub.access_token, stub.base_url),
+            ) as async_secret_server:
+                return [
+                    folder["value"]
+                    async for folder in async_secret_server.iter_folders(
+                        {"filter.parentFolderId": 1}, page_size=3
+                    )
+                ]
+
+        assert asyncio.run(main()) == [f"Folder {id}" for id in range(2, 10)]
+
+
+def test_page_timeouts(stub_server, monkeypatch, make_secret_server):
+    stub_server.folders[1] = make_folder(1)
+    secret_server = make_secret_server(stub_server)
+    read_timeouts = {}
+    get = secret_server.session.get
+
+    def record(url, **kwargs):
+        read_timeouts[url.split("/api/v1/")[-1]] = kwargs["timeout"][1]
+        return get(url, **kwargs)
+
+    monkeypatch.setattr(secret_server.session, "get", record)
+    list(secret_server.iter_secrets())
+    list(secret_server.iter_folders())
+    secret_server.get_folder(1)
+    assert read_timeouts == {"secrets": 60, "folders/lookup": 60, "folders/1": 60}
+    # Under a deadline, folder calls may read for as long as it allows
+    list(secret_server.iter_secrets(timeout=300))
+    list(secret_server.iter_folders(timeout=300))
+    secret_server.get_folder(1, timeout=300)
+    assert read_timeouts["secrets"] == 60
+    assert 60 < read_timeouts["folders/lookup"] <= 300
+    assert 60 < read_timeouts["folders/1"] <= 300
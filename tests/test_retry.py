@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import pytest
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from delinea.secrets.server import (
+    PasswordGrantAuthorizer,
+    RetryPolicy,
+    SecretServer,
+    SecretServerCircuitOpenError,
+    SecretServerClientError,
+    SecretServerServiceError,
+)
+
+
+def test_retries_service_errors(stub_server, make_secret_server):
+    secret_server = make_secret_server(
+        stub_server, server_type=None, retry_policy=RetryPolicy(backoff=0.01)
+    )
+    secret_server.ensure_vault_url()
+    stub_server.fail(503, times=2)
+    assert secret_server.get_secret(1)["id"] == 1
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 3
+
+    stub_server.fail(503, times=3)
+    with pytest.raises(SecretServerServiceError):
+        secret_server.get_secret(2)
+    assert stub_server.requests[("GET", "/api/v1/secrets/2")] == 3
+
+
+def test_honors_retry_after(stub_server, make_secret_server):
+    secret_server = make_secret_server(
+        stub_server, server_type=None, retry_policy=RetryPolicy(max_backoff=1)
+    )
+    secret_server.ensure_vault_url()
+    stub_server.fail(429, retry_after=0.2)
+    start = time.perf_counter()
+    assert secret_server.get_secret(1)["id"] == 1
+    assert time.perf_counter() - start >= 0.2
+
+    # Longer than max_backoff
+    stub_server.fail(429, retry_after=5)
+    with pytest.raises(SecretServerClientError):
+        secret_server.get_secret(2)
+    assert stub_server.requests[("GET", "/api/v1/secrets/2")] == 1
+
+
+def test_circuit_breaker(stub_server, make_secret_server):
+    retry_policy = RetryPolicy(max_attempts=1, failure_threshold=2, reset_timeout=0.2)
+    secret_server = make_secret_server(
+        stub_server, server_type=None, retry_policy=retry_policy
+    )
+    secret_server.ensure_vault_url()
+    stub_server.fail(500, times=3)
+    for _ in range(2):
+        with pytest.raises(SecretServerServiceError):
+            secret_server.get_secret(1)
+    with pytest.raises(SecretServerCircuitOpenError):
+        secret_server.get_secret(1)
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 2
+
+    time.sleep(0.2)
+    # The trial call fails, so the circuit opens again
+    with pytest.raises(SecretServerServiceError):
+        secret_server.get_secret(1)
+    with pytest.raises(SecretServerCircuitOpenError):
+        secret_server.get_secret(1)
+    time.sleep(0.2)
+    assert secret_server.get_secret(1)["id"] == 1
+    assert secret_server.get_secret(2)["id"] == 2
+
+
+def test_open_circuit_keeps_vault_url(stub_platform):
+    retry_policy = RetryPolicy(max_attempts=1, failure_threshold=1, reset_timeout=60)
+    secret_server = SecretServer(
+        stub_platform.base_url,
+        PasswordGrantAuthorizer(stub_platform.base_url, "client", "secret"),
+        retry_policy=retry_policy,
+    )
+    secret_server.get_secret(2)
+    stub_platform.fail(500)
+    with pytest.raises(SecretServerServiceError):
+        secret_server.get_secret(1)
+    resolved = stub_platform.requests[("GET", "/vaultbroker/api/vaults")]
+    for _ in range(5):
+        with pytest.raises(SecretServerCircuitOpenError):
+            secret_server.get_secret(1)
+    assert stub_platform.requests[("GET", "/vaultbroker/api/vaults")] == resolved
+
+
+def test_retries_token_requests(stub_server):
+    authorizer = PasswordGrantAuthorizer(
+        stub_server.base_url,
+        "user",
+        "password",
+        server_type="secret_server",
+        retry_policy=RetryPolicy(backoff=0.01),
+    )
+    stub_server.fail(502)
+    assert authorizer.get_access_token() == stub_server.access_token
+    assert stub_server.requests[("POST", "/oauth2/token")] == 2
+    assert SecretServer(stub_server.base_url, authorizer).retry_policy is (
+        authorizer.retry_policy
+    )
+
+
+def test_async_retries(stub_server):
+    pytest.importorskip("httpx")
+
+    async def main():
+        async with AsyncSecretServer(
+            stub_server.base_url,
+            AsyncAccessTokenAuthorizer(
+                stub_server.access_token,
+                stub_server.base_url,
+                server_type="secret_server",
+            ),
+            retry_policy=RetryPolicy(backoff=0.01),
+        ) as secret_server:
+            stub_server.fail(503, times=2)
+            return await secret_server.get_secret(1)
+
+    assert asyncio.run(main())["id"] == 1
+    assert stub_server.requests[("GET", "/api/v1/secrets/1")] == 3
+
+
+def test_async_download_retries(stub_server):
+    pytest.importorskip("httpx")
+
+    async def main():
+        async with AsyncSecretServer(
+            stub_server.base_url,
+            AsyncAccessTokenAuthorizer(
+                stub_server.access_token,
+                stub_server.base_url,
+                server_type="secret_server",
+            ),
+            retry_policy=RetryPolicy(backoff=0.01),
+        ) as secret_server:
+            stub_server.fail(503, times=2)
+            buffer = bytearray(stub_server.attachment_size)
+            await secret_server.download_secret_field(1, "attachment-1", buffer)
+            return bytes(buffer)
+
+    assert asyncio.run(main()) == stub_server.attachment(1, "attachment-1")
+    assert stub_server.requests[("GET", "/api/v1/secrets/1/fields/attachment-1")] == 3
@@ -0,0 +1,34 @@
+from delinea.secrets.server import (
+    PasswordGrantAuthorizer,
+    SecretServer,
+    create_session,
+)
+
+
+def test_secret_server_shares_authorizer_session(stub_server):
+    authorizer = PasswordGrantAuthorizer(stub_server.base_url, "user", "password")
+    secret_server = SecretServer(stub_server.base_url, authorizer)
+    assert secret_server.session is authorizer.session
+
+
+def test_session_reuses_connections(stub_server):
+    session = create_session(pool_maxsize=1)
+    authorizer = PasswordGrantAuthorizer(
+        stub_server.base_url,
+        "user",
+        "password",
+        session=session,
+        server_type="secret_server",
+    )
+    secret_server = SecretServer(stub_server.base_url, authorizer, session=session)
+    for id in range(1, 11):
+        assert secret_server.get_secret(id)["id"] == id
+    assert stub_server.connections == 1
+
+
+def test_session_without_keep_alive(stub_server, make_secret_server):
+    session = create_session(keep_alive=False)
+    secret_server = make_secret_server(stub_server, session)
+    for id in range(1, 4):
+        secret_server.get_secret(id)
+    assert stub_server.connections == 3
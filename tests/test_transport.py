@@ -0,0 +1,97 @@
+import asyncio
+import io
+
+import pytest
+import requests
+
+from delinea.secrets.aio import (
+    AsyncPasswordGrantAuthorizer,
+    AsyncSecretServer,
+    create_async_client,
+    in_process_transport,
+)
+from delinea.secrets.server import (
+    HTTP2Transport,
+    InProcessTransport,
+    PasswordGrantAuthorizer,
+    RetryPolicy,
+    create_session,
+)
+from tests.stub_server import StubSecretServer, make_secret
+
+
+def test_in_process(make_secret_server):
+    stub = StubSecretServer([make_secret(1, attachments=1)], attachment_size=100000)
+    session = create_session(transport=InProcessTransport(stub.handle))
+    secret_server = make_secret_server(stub, session)
+    authorizer = PasswordGrantAuthorizer(
+        stub.base_url, "user", "password", session=session
+    )
+
+    assert authorizer.get_access_token() == stub.access_token
+    assert secret_server.get_secret(1)["items"][0]["itemValue"] == "user1"
+    dest = io.BytesIO()
+    assert secret_server.download_secret_field(1, "attachment-1", dest) == 100000
+    assert dest.getvalue() == stub.attachment(1, "attachment-1")
+    assert stub.requests[("POST", "/oauth2/token")] == 1
+    assert stub.connections == 0
+
+
+def test_in_process_retries(make_secret_server):
+    stub = StubSecretServer()
+    session = create_session(transport=InProcessTransport(stub.handle))
+    secret_server = make_secret_server(
+        stub, session, retry_policy=RetryPolicy(backoff=0.01)
+    )
+    stub.fail(503)
+    assert secret_server.get_secret_json(1)
+    assert stub.requests[("GET", "/api/v1/secrets/1")] == 2
+
+
+def test_in_process_platform(make_secret_server):
+    stub = StubSecretServer(server_type="platform")
+    session = create_session(transport=InProcessTransport(stub.handle))
+    secret_server = make_secret_server(stub, session, server_type=None)
+    assert secret_server.get_secret(2)["id"] == 2
+    assert stub.requests[("GET", "/vaultbroker/api/vaults")] == 1
+
+
+def test_async_in_process():
+    pytest.importorskip("httpx")
+    stub = StubSecretServer()
+
+    async def main():
+        client = create_async_client(transport=in_process_transport(stub.handle))
+        async with AsyncSecretServer(
+            stub.base_url,
+            AsyncPasswordGrantAuthorizer(
+                stub.base_url, "user", "password", client=client
+            ),
+            client=client,
+        ) as secret_server:
+            return await secret_server.get_secrets([1, 2, 3])
+
+    assert [secret["id"] for secret in asyncio.run(main())] == [1, 2, 3]
+
+
+def test_http2_transport(stub_server, make_secret_server):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    stub_server.attachment_size = 100000
+    stub_server.secrets[1] = make_secret(1, attachments=1)
+    transport = HTTP2Transport()
+    session = create_session(transport=transport)
+    secret_server = make_secret_server(stub_server, session)
+
+    # The stub only speaks HTTP/1.1, which the transport falls back to
+    assert secret_server.get_secret(2)["id"] == 2
+    connections = stub_server.connections
+    dest = io.BytesIO()
+    assert secret_server.download_secret_field(1, "attachment-1", dest) == 100000
+    assert dest.getvalue() == stub_server.attachment(1, "attachment-1")
+    assert secret_server.get_secret(3)["id"] == 3
+    assert stub_server.connections == connections
+
+    with pytest.raises(requests.ConnectionError):
+        session.get("http://127.0.0.1:9", timeout=(1, 1))
+    transport.close()
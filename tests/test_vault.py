@@ -0,0 +1,63 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from delinea.secrets.aio import AsyncPasswordGrantAuthorizer, AsyncSecretServer
+from delinea.secrets.server import PasswordGrantAuthorizer, SecretServer
+
+
+def test_vault_url_is_shared(stub_platform):
+    authorizer = PasswordGrantAuthorizer(stub_platform.base_url, "client", "secret")
+
+    def get_secret(id):
+        return SecretServer(stub_platform.base_url, authorizer).get_secret(id)["id"]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(get_secret, range(1, 11))) == list(range(1, 11))
+    assert stub_platform.requests[("GET", "/vaultbroker/api/vaults")] == 1
+    assert stub_platform.requests[("GET", "/health")] == 1
+
+
+def test_vault_url_expires(stub_platform, monkeypatch):
+    monkeypatch.setattr(SecretServer, "VAULT_URL_TTL", 0)
+    secret_server = SecretServer(
+        stub_platform.base_url,
+        PasswordGrantAuthorizer(stub_platform.base_url, "client", "secret"),
+    )
+    secret_server.get_secret(1)
+    secret_server.get_secret(2)
+    assert stub_platform.requests[("GET", "/vaultbroker/api/vaults")] == 2
+
+
+def test_failing_vault_is_resolved_again(stub_platform):
+    SecretServer._vault_urls[stub_platform.base_url] = (
+        "http://127.0.0.1:9",
+        time.monotonic(),
+    )
+    secret_server = SecretServer(
+        stub_platform.base_url,
+        PasswordGrantAuthorizer(stub_platform.base_url, "client", "secret"),
+    )
+    assert secret_server.get_secret(1)["id"] == 1
+    assert secret_server.base_url == stub_platform.base_url
+    assert stub_platform.requests[("GET", "/vaultbroker/api/vaults")] == 1
+
+
+def test_async_vault_url_is_shared(stub_platform):
+    pytest.importorskip("httpx")
+
+    async def main():
+        authorizer = AsyncPasswordGrantAuthorizer(
+            stub_platform.base_url, "client", "secret"
+        )
+        async with AsyncSecretServer(stub_platform.base_url, authorizer) as server:
+            await server.get_secret(1)
+
+    SecretServer(
+        stub_platform.base_url,
+        PasswordGrantAuthorizer(stub_platform.base_url, "client", "secret"),
+    ).get_secret(1)
+    asyncio.run(main())
+    assert stub_platform.requests[("GET", "/vaultbroker/api/vaults")] == 1
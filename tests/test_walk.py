@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from delinea.secrets.aio import AsyncAccessTokenAuthorizer, AsyncSecretServer
+from delinea.secrets.server import (
+    InProcessTransport,
+    SecretServerTimeoutError,
+    create_session,
+)
+from tests.stub_server import (
+    StubSecretServer,
+    make_folder,
+    make_folder_tree,
+    make_secret,
+)
+
+# Folder 1 has children 2 to 5, each of which has 4 children of its own
+FOLDERS = [make_folder(1, name="Root")] + [
+    make_folder(id, parent_folder_id=1 if id <= 5 else (id - 6) // 4 + 2)
+    for id in range(2, 22)
+]
+SECRETS = [make_secret(id, folder_id=id % 21 + 1) for id in range(1, 64)]
+
+
+def expected():
+    return {
+        folder["id"]: [
+            secret["id"] for secret in SECRETS if secret["folderId"] == folder["id"]
+        ]
+        for folder in FOLDERS
+    }
+
+
+def test_walk_folder(make_secret_server):
+    with StubSecretServer(SECRETS, folders=FOLDERS, latency=0.02) as stub:
+        secret_server = make_secret_server(stub)
+        start = time.perf_counter()
+        walked = dict(secret_server.walk_folder(1, max_workers=8))
+        elapsed = time.perf_counter() - start
+        assert walked == expected()
+        # 21 folders, each listed with at least 2 requests, one level at a time
+        assert elapsed < 21 * 2 * 0.02
+        assert dict(secret_server.walk_folder("Root")) == expected()
+
+
+def test_async_walk_folder():
+    pytest.importorskip("httpx")
+    with StubSecretServer(SECRETS, folders=FOLDERS) as stub:
+
+        async def main():
+            async with AsyncSecretServer(
+                stub.base_url,
+                AsyncAccessTokenAuthorizer(stub.access_token, stub.base_url),
+            ) as secret_server:
+                return {
+                    folder_id: secret_ids
+                    async for folder_id, secret_ids in secret_server.walk_folder(
+                        "\\Root", max_workers=4
+                    )
+                }
+
+        assert asyncio.run(main()) == expected()
+
+
+def test_walk_deep_tree(make_secret_server):
+    folders = make_folder_tree(breadth=3, depth=3)
+
+    def latency(method, path):
+        # Only listing the secrets of a folder is slow
+        return 0.01 if path == "/api/v1/secrets" else 0
+
+    with StubSecretServer(folders=folders, latency=latency) as stub:
+        secret_server = make_secret_server(stub)
+        walked = dict(secret_server.walk_folder(1, max_workers=8))
+    assert sorted(walked) == [folder["id"] for folder in folders] == list(range(1, 41))
+    assert walked[1] == [secret["id"] for secret in stub.secrets.values()]
+
+
+def test_walk_uses_only_its_workers(make_secret_server):
+    stub = StubSecretServer(SECRETS, folders=FOLDERS)
+    threads = set()
+
+    def handler(*request):
+        threads.add(threading.current_thread())
+        return stub.handle(*request)
+
+    session = create_session(transport=InProcessTransport(handler))
+    secret_server = make_secret_server(stub, session)
+    assert dict(secret_server.walk_folder(1, max_workers=4)) == expected()
+    # Every request is made by one of the workers of the walk
+    assert len(threads) <= 4
+
+
+def test_walk_deadline_starts_on_call(make_secret_server):
+    with StubSecretServer(SECRETS, folders=FOLDERS) as stub:
+        secret_server = make_secret_server(stub)
+        walk = secret_server.walk_folder(1, timeout=0.05)
+        time.sleep(0.1)
+        with pytest.raises(SecretServerTimeoutError):
+            next(walk)